@@ -6,18 +6,140 @@ Cloudflare 301 重定向自动更新脚本
 """
 
 import requests
+import copy
 import json
 import logging
-from typing import Optional, Dict, Any
+import threading
+import time
+from typing import Optional, Dict, Any, Iterable, List, Tuple
 from pathlib import Path
+from urllib.parse import quote
+
+from http_client import RETRY_STATUS_CODES, HttpTransport, get_transport
+from rate_limiter import RateLimiter, get_rate_limiter, parse_retry_after
+from shared_cache import SharedCache, get_shared_cache
 
 logger = logging.getLogger(__name__)
 
+# 重定向规则集所在的阶段
+REDIRECT_PHASE = "http_request_redirect"
+
+# 规则集缓存默认有效期（秒）
+DEFAULT_RULESET_CACHE_TTL = 300
+
+# Cloudflare 连接池自动重试的状态码：429 由共享限流器按 Retry-After 统一处理，不在连接池中各自重试
+CLOUDFLARE_RETRY_STATUSES = tuple(code for code in RETRY_STATUS_CODES if code != 429)
+
+# 同一请求遇到 429 的最大重试次数
+MAX_RATE_LIMIT_RETRIES = 5
+
+# PATCH 单条规则时提交的字段（不含 id / version / last_updated 等只读字段）
+RULE_FIELDS = ("action", "expression", "action_parameters", "description", "enabled", "ref", "logging")
+
+# PATCH 返回这些状态码时说明不支持单条规则更新，退回提交整个规则集
+PATCH_UNSUPPORTED_STATUSES = (405, 501)
+
+# Bulk Redirect List 每次提交的条目数
+DEFAULT_BULK_BATCH_SIZE = 1000
+
+# 批量操作状态的轮询间隔与一次同步的默认等待上限（秒）
+BULK_POLL_INTERVAL = 1.0
+BULK_OPERATION_TIMEOUT = 300
+
+
+class RulesetCache:
+    """
+    规则集元数据缓存（zone → phase → 规则集 ID / 最近一次看到的规则集内容与版本）
+    
+    规则集内容按有效期过期；规则集 ID 几乎不会变化，不设有效期，只在请求返回 404 时失效，
+    长时间没有变化后的第一次更新也无需重新列出 zone 的规则集
+    """
+    
+    def __init__(self, ttl: float = DEFAULT_RULESET_CACHE_TTL):
+        """
+        初始化缓存
+        
+        Args:
+            ttl: 规则集内容的有效期（秒）
+        """
+        self.ttl = ttl
+        self._ids: Dict[Tuple[str, str], str] = {}
+        self._rulesets: Dict[Tuple[str, str], Tuple[Dict[str, Any], float]] = {}
+        self._lock = threading.Lock()
+    
+    def _fresh(self, stored_at: float) -> bool:
+        return time.monotonic() - stored_at < self.ttl
+    
+    def get_id(self, zone_id: str, phase: str) -> Optional[str]:
+        """获取缓存的规则集 ID"""
+        with self._lock:
+            return self._ids.get((zone_id, phase))
+    
+    def set_id(self, zone_id: str, phase: str, ruleset_id: str):
+        """缓存规则集 ID"""
+        with self._lock:
+            self._ids[(zone_id, phase)] = ruleset_id
+    
+    def get_ruleset(self, zone_id: str, phase: str) -> Optional[Dict[str, Any]]:
+        """获取缓存的规则集内容（返回副本，调用方可以直接修改）"""
+        with self._lock:
+            entry = self._rulesets.get((zone_id, phase))
+            if entry and self._fresh(entry[1]):
+                return copy.deepcopy(entry[0])
+            return None
+    
+    def set_ruleset(self, zone_id: str, phase: str, ruleset: Dict[str, Any]):
+        """缓存规则集内容（同时缓存其 ID）"""
+        with self._lock:
+            self._rulesets[(zone_id, phase)] = (copy.deepcopy(ruleset), time.monotonic())
+            if ruleset.get("id"):
+                self._ids[(zone_id, phase)] = ruleset["id"]
+    
+    def invalidate(self, zone_id: str, phase: Optional[str] = None, ids: bool = False):
+        """
+        使 zone（或 zone 下某个阶段）缓存的规则集内容失效
+        
+        Args:
+            zone_id: Zone ID
+            phase: 阶段（可选，默认 zone 下的所有阶段）
+            ids: 是否同时使规则集 ID 失效（规则集不存在时）
+        """
+        with self._lock:
+            for store in (self._rulesets, self._ids) if ids else (self._rulesets,):
+                for key in list(store):
+                    if key[0] == zone_id and (phase is None or key[1] == phase):
+                        del store[key]
+
+
+# 进程内共享的规则集缓存
+_ruleset_cache = RulesetCache()
+
+
+def get_rule_target(rule: Optional[Dict[str, Any]]) -> Optional[str]:
+    """读取重定向规则的目标 URL"""
+    if not rule:
+        return None
+    return rule.get("action_parameters", {}).get("from_value", {}).get("target_url", {}).get("value")
+
+
+def find_rule(ruleset: Dict[str, Any], rule_id: str) -> Optional[Dict[str, Any]]:
+    """在规则集中按 ID 查找规则"""
+    for rule in ruleset.get("rules", []):
+        if rule.get("id") == rule_id:
+            return rule
+    return None
+
 
 class CloudflareUpdater:
     """Cloudflare 重定向规则更新器"""
     
-    def __init__(self, api_token: str, zone_id: str, rule_id: Optional[str] = None):
+    def __init__(self, api_token: str, zone_id: str, rule_id: Optional[str] = None,
+                 transport: Optional[HttpTransport] = None,
+                 ruleset_cache: Optional[RulesetCache] = None,
+                 ruleset_id: Optional[str] = None,
+                 rate_limiter: Optional[RateLimiter] = None,
+                 patch_rules: bool = True,
+                 write_cache: Optional[SharedCache] = None):
         """
         初始化 Cloudflare 更新器
         
@@ -25,22 +147,55 @@ class CloudflareUpdater:
             api_token: Cloudflare API Token（需要有编辑规则权限）
             zone_id: Cloudflare Zone ID
             rule_id: 重定向规则 ID（可选，如果要更新现有规则）
+            transport: HTTP 传输（可选，默认使用进程内共享的 "cloudflare" 连接池）
+            ruleset_cache: 规则集缓存（可选，默认使用进程内共享的缓存）
+            ruleset_id: 重定向规则集 ID（可选，已知时无需列出 zone 的全部规则集）
+            rate_limiter: 限流器（可选，默认使用进程内共享的 "cloudflare" 限流器）
+            patch_rules: 更新规则时只 PATCH 单条规则（False 时提交整个规则集）
+            write_cache: 进程间共享的写入去重缓存（可选，同一规则的相同目标在时间窗口内只写入一次）
         """
         self.api_token = api_token
         self.zone_id = zone_id
         self.rule_id = rule_id
+        self.ruleset_id = ruleset_id
         self.base_url = "https://api.cloudflare.com/client/v4"
         self.headers = {
             "Authorization": f"Bearer {api_token}",
             "Content-Type": "application/json"
         }
+        self.transport = transport or get_cloudflare_transport()
+        self.ruleset_cache = ruleset_cache or _ruleset_cache
+        self.rate_limiter = rate_limiter or get_rate_limiter("cloudflare")
+        self.patch_rules = patch_rules
+        self.write_cache = write_cache
+    
+    def _send(self, method: str, url: str, data: Optional[Dict] = None) -> Dict[str, Any]:
+        """
+        经过限流器发送请求；遇到 429 时按 Retry-After 暂停共享令牌桶后重试
+        
+        Returns:
+            响应 JSON
+        """
+        for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+            self.rate_limiter.acquire()
+            if data is None:
+                response = self.transport.request(method, url, headers=self.headers)
+            else:
+                response = self.transport.request(method, url, headers=self.headers, json=data)
+            
+            if response.status_code != 429 or attempt == MAX_RATE_LIMIT_RETRIES:
+                break
+            self.rate_limiter.pause(parse_retry_after(response.headers.get("Retry-After")))
+        
+        response.raise_for_status()
+        return response.json()
     
     def _make_request(self, method: str, endpoint: str, data: Optional[Dict] = None) -> Dict[str, Any]:
         """
         发送 API 请求
         
         Args:
-            method: HTTP 方法（GET, POST, PUT, DELETE）
+            method: HTTP 方法（GET, POST, PUT, PATCH, DELETE）
             endpoint: API 端点
             data: 请求数据
             
@@ -51,19 +206,13 @@ class CloudflareUpdater:
         
         try:
             if method == "GET":
-                response = requests.get(url, headers=self.headers, timeout=30)
-            elif method == "POST":
-                response = requests.post(url, headers=self.headers, json=data, timeout=30)
-            elif method == "PUT":
-                response = requests.put(url, headers=self.headers, json=data, timeout=30)
-            elif method == "DELETE":
-                response = requests.delete(url, headers=self.headers, timeout=30)
+                # 相同的并发 GET（例如多个来源同时拉取同一规则集）只发送一次
+                result = self.rate_limiter.coalesce((self.api_token, url), lambda: self._send(method, url))
+            elif method in ("DELETE", "POST", "PUT", "PATCH"):
+                result = self._send(method, url, data)
             else:
                 raise ValueError(f"不支持的 HTTP 方法: {method}")
             
-            response.raise_for_status()
-            result = response.json()
-            
             if not result.get("success"):
                 errors = result.get("errors", [])
                 error_msg = "; ".join([e.get("message", str(e)) for e in errors])
@@ -78,6 +227,12 @@ class CloudflareUpdater:
             logger.error(f"处理响应失败: {e}")
             raise
     
+    def _invalidate_cache(self, error: Exception):
+        """请求失败后使缓存的规则集内容失效；返回 404（规则集已被删除）时规则集 ID 一并失效"""
+        not_found = (isinstance(error, requests.HTTPError) and error.response is not None
+                     and error.response.status_code == 404)
+        self.ruleset_cache.invalidate(self.zone_id, REDIRECT_PHASE, ids=not_found)
+    
     def list_redirect_rules(self) -> list:
         """
         列出所有重定向规则
@@ -91,13 +246,71 @@ class CloudflareUpdater:
         # 查找 http_request_redirect 类型的规则集
         redirect_rulesets = []
         for ruleset in result.get("result", []):
-            if ruleset.get("phase") == "http_request_redirect":
+            if ruleset.get("phase") == REDIRECT_PHASE:
                 redirect_rulesets.append(ruleset)
         
+        if redirect_rulesets:
+            self.ruleset_cache.set_id(self.zone_id, REDIRECT_PHASE, redirect_rulesets[0]["id"])
+        
         return redirect_rulesets
     
+    def _get_redirect_ruleset_id(self) -> Optional[str]:
+        """获取重定向规则集 ID（优先使用配置值和缓存）"""
+        if self.ruleset_id:
+            return self.ruleset_id
+        
+        ruleset_id = self.ruleset_cache.get_id(self.zone_id, REDIRECT_PHASE)
+        if ruleset_id:
+            return ruleset_id
+        
+        rulesets = self.list_redirect_rules()
+        return rulesets[0]["id"] if rulesets else None
+    
+    def _load_redirect_ruleset(self, use_cache: bool = True) -> Tuple[Dict[str, Any], bool]:
+        """
+        获取重定向规则集内容
+        
+        Args:
+            use_cache: 是否允许使用缓存
+            
+        Returns:
+            (规则集, 是否来自缓存)
+        """
+        if use_cache:
+            ruleset = self.ruleset_cache.get_ruleset(self.zone_id, REDIRECT_PHASE)
+            if ruleset is not None:
+                return ruleset, True
+        
+        ruleset_id = self._get_redirect_ruleset_id()
+        if not ruleset_id:
+            raise Exception("未找到重定向规则集")
+        
+        endpoint = f"/zones/{self.zone_id}/rulesets/{ruleset_id}"
+        try:
+            result = self._make_request("GET", endpoint)
+        except Exception as e:
+            self._invalidate_cache(e)
+            raise
+        
+        ruleset = result.get("result", {})
+        self.ruleset_cache.set_ruleset(self.zone_id, REDIRECT_PHASE, ruleset)
+        return ruleset, False
+    
+    def get_redirect_ruleset(self, use_cache: bool = True) -> Dict[str, Any]:
+        """
+        获取重定向规则集（包含规则列表与版本号）
+        
+        Args:
+            use_cache: 是否允许使用缓存
+            
+        Returns:
+            规则集信息
+        """
+        return self._load_redirect_ruleset(use_cache)[0]
+    
     def create_redirect_rule(self, source_url_pattern: str, target_url: str, 
-                            rule_name: str = "Auto Redirect Rule") -> Dict[str, Any]:
+                            rule_name: str = "Auto Redirect Rule",
+                            skip_unchanged: bool = True) -> Dict[str, Any]:
         """
         创建 301 重定向规则
         
@@ -105,19 +318,21 @@ class CloudflareUpdater:
             source_url_pattern: 源 URL 模式（例如：'http.host eq "onefly.top"'）
             target_url: 目标 URL
             rule_name: 规则名称
+            skip_unchanged: 已存在相同源模式且指向目标的规则时跳过创建
             
         Returns:
-            创建的规则信息
+            创建的规则信息（跳过时 "skipped" 为 True）
         """
-        # 首先获取或创建重定向规则集
-        endpoint = f"/zones/{self.zone_id}/rulesets"
-        result = self._make_request("GET", endpoint)
+        # 首先获取或创建重定向规则集（规则集 ID 优先使用缓存）
+        ruleset_id = self._get_redirect_ruleset_id()
         
-        redirect_ruleset = None
-        for ruleset in result.get("result", []):
-            if ruleset.get("phase") == "http_request_redirect":
-                redirect_ruleset = ruleset
-                break
+        if skip_unchanged and ruleset_id:
+            ruleset = self.get_redirect_ruleset()
+            for rule in ruleset.get("rules", []):
+                if rule.get("expression") == source_url_pattern and get_rule_target(rule) == target_url:
+                    logger.info(f"已存在指向 {target_url} 的重定向规则，跳过创建")
+                    ruleset["skipped"] = True
+                    return ruleset
         
         # 构建重定向规则
         rule_data = {
@@ -136,27 +351,35 @@ class CloudflareUpdater:
             "enabled": True
         }
         
-        if redirect_ruleset:
-            # 更新现有规则集
-            ruleset_id = redirect_ruleset["id"]
-            endpoint = f"/zones/{self.zone_id}/rulesets/{ruleset_id}/rules"
-            result = self._make_request("POST", endpoint, rule_data)
-        else:
-            # 创建新规则集
-            ruleset_data = {
-                "name": "redirect rules",
-                "kind": "zone",
-                "phase": "http_request_redirect",
-                "rules": [rule_data]
-            }
-            endpoint = f"/zones/{self.zone_id}/rulesets"
-            result = self._make_request("POST", endpoint, ruleset_data)
+        try:
+            if ruleset_id:
+                # 更新现有规则集
+                endpoint = f"/zones/{self.zone_id}/rulesets/{ruleset_id}/rules"
+                result = self._make_request("POST", endpoint, rule_data)
+            else:
+                # 创建新规则集
+                ruleset_data = {
+                    "name": "redirect rules",
+                    "kind": "zone",
+                    "phase": REDIRECT_PHASE,
+                    "rules": [rule_data]
+                }
+                endpoint = f"/zones/{self.zone_id}/rulesets"
+                result = self._make_request("POST", endpoint, ruleset_data)
+        except Exception as e:
+            self._invalidate_cache(e)
+            raise
         
+        # 两个接口都返回完整的规则集
+        created = result.get("result", {})
+        self.ruleset_cache.set_ruleset(self.zone_id, REDIRECT_PHASE, created)
         logger.info(f"成功创建重定向规则: {rule_name}")
-        return result.get("result", {})
+        created["skipped"] = False
+        return created
     
     def update_redirect_rule(self, rule_id: str, target_url: str, 
-                            source_url_pattern: Optional[str] = None) -> Dict[str, Any]:
+                            source_url_pattern: Optional[str] = None,
+                            skip_unchanged: bool = True) -> Dict[str, Any]:
         """
         更新现有的 301 重定向规则
         
@@ -164,49 +387,143 @@ class CloudflareUpdater:
             rule_id: 规则 ID
             target_url: 新的目标 URL
             source_url_pattern: 源 URL 模式（可选）
+            skip_unchanged: 规则已指向目标（且源模式一致）时跳过写入
             
         Returns:
-            更新后的规则信息
+            更新后的规则信息（跳过写入时 "skipped" 为 True）
         """
-        # 获取重定向规则集
-        rulesets = self.list_redirect_rules()
-        if not rulesets:
-            raise Exception("未找到重定向规则集")
+        if self.write_cache is None:
+            return self._update_redirect_rule(rule_id, target_url, source_url_pattern, skip_unchanged)
         
-        ruleset_id = rulesets[0]["id"]
-        
-        # 获取现有规则
-        endpoint = f"/zones/{self.zone_id}/rulesets/{ruleset_id}"
-        result = self._make_request("GET", endpoint)
+        # 多个进程（domain_monitor.py / link_updater.py）同时发现同一变化时只写入一次
+        updated: Dict[str, Any] = {}
         
-        # 查找并更新规则
-        rules = result.get("result", {}).get("rules", [])
-        rule_found = False
+        def write() -> Dict[str, Any]:
+            updated.update(self._update_redirect_rule(rule_id, target_url, source_url_pattern, skip_unchanged))
+            return {"version": updated.get("version")}
         
-        for rule in rules:
-            if rule.get("id") == rule_id:
-                rule["action_parameters"]["from_value"]["target_url"]["value"] = target_url
-                if source_url_pattern:
-                    rule["expression"] = source_url_pattern
-                rule_found = True
-                break
+        written, summary = self.write_cache.run_once(
+            f"cloudflare:{self.zone_id}:{rule_id}", f"{target_url}\n{source_url_pattern or ''}", write
+        )
+        if written:
+            return updated
+        return {"version": (summary or {}).get("version"), "skipped": True}
+    
+    def _update_redirect_rule(self, rule_id: str, target_url: str, source_url_pattern: Optional[str],
+                              skip_unchanged: bool) -> Dict[str, Any]:
+        """update_redirect_rule 的实际实现（不做进程间去重）"""
+        # 稳态下规则集来自缓存，只需一次 PATCH；缓存数据导致失败时刷新后重试一次。
+        # 提交整个规则集时必须基于刚读取的内容，否则会覆盖缓存有效期内其他人对其他规则的修改
+        for use_cache in (True, False):
+            ruleset, from_cache = self._load_redirect_ruleset(use_cache and self.patch_rules)
+            
+            rule = find_rule(ruleset, rule_id)
+            if (skip_unchanged and get_rule_target(rule) == target_url
+                    and (not source_url_pattern or rule.get("expression") == source_url_pattern)):
+                logger.info(f"重定向规则 {rule_id} 已指向 {target_url}，跳过写入")
+                ruleset["skipped"] = True
+                return ruleset
+            
+            try:
+                if self.patch_rules:
+                    try:
+                        return self._patch_rule_target(ruleset, rule_id, target_url, source_url_pattern)
+                    except requests.HTTPError as e:
+                        if e.response is None or e.response.status_code not in PATCH_UNSUPPORTED_STATUSES:
+                            raise
+                        logger.warning(f"不支持单条规则更新（{e.response.status_code}），改为提交整个规则集")
+                        self.patch_rules = False
+                    if from_cache:
+                        # 下一轮重新读取规则集后再提交
+                        continue
+                return self._put_rule_target(ruleset, rule_id, target_url, source_url_pattern)
+            except Exception as e:
+                if not from_cache:
+                    raise
+                logger.warning(f"使用缓存的规则集更新失败，刷新后重试: {e}")
+    
+    def _patch_rule_target(self, ruleset: Dict[str, Any], rule_id: str, target_url: str,
+                           source_url_pattern: Optional[str] = None) -> Dict[str, Any]:
+        """
+        只提交指定规则的新定义（PATCH /rulesets/{id}/rules/{rule_id}），
+        请求大小与规则集中的规则数量无关，也不会覆盖其他规则的并发修改（失败时使缓存失效）
         
-        if not rule_found:
-            raise Exception(f"未找到规则 ID: {rule_id}")
+        Args:
+            ruleset: 规则集内容
+            rule_id: 规则 ID
+            target_url: 新的目标 URL
+            source_url_pattern: 源 URL 模式（可选）
+            
+        Returns:
+            更新后的规则集信息
+        """
+        try:
+            rule = find_rule(ruleset, rule_id)
+            if rule is None:
+                raise Exception(f"未找到规则 ID: {rule_id}")
+            
+            rule_data = {field: copy.deepcopy(rule[field]) for field in RULE_FIELDS if field in rule}
+            rule_data["action_parameters"]["from_value"]["target_url"]["value"] = target_url
+            if source_url_pattern:
+                rule_data["expression"] = source_url_pattern
+            
+            endpoint = f"/zones/{self.zone_id}/rulesets/{ruleset['id']}/rules/{rule_id}"
+            result = self._make_request("PATCH", endpoint, rule_data)
+        except Exception as e:
+            self._invalidate_cache(e)
+            raise
         
-        # 更新整个规则集
-        update_data = {
-            "rules": rules
-        }
+        # 接口返回更新后的完整规则集（含新版本号）
+        updated = result.get("result", {})
+        self.ruleset_cache.set_ruleset(self.zone_id, REDIRECT_PHASE, updated)
+        logger.info(f"成功更新重定向规则: {rule_id} -> {target_url}（规则集版本 {updated.get('version')}）")
+        updated["skipped"] = False
+        return updated
+    
+    def _put_rule_target(self, ruleset: Dict[str, Any], rule_id: str, target_url: str,
+                         source_url_pattern: Optional[str] = None) -> Dict[str, Any]:
+        """
+        修改规则集中指定规则的目标 URL 并提交整个规则集（失败时使缓存失效）
         
-        endpoint = f"/zones/{self.zone_id}/rulesets/{ruleset_id}"
-        result = self._make_request("PUT", endpoint, update_data)
+        Args:
+            ruleset: 刚从 API 读取的规则集内容（会被修改；不能使用缓存，否则会覆盖其他规则的并发修改）
+            rule_id: 规则 ID
+            target_url: 新的目标 URL
+            source_url_pattern: 源 URL 模式（可选）
+            
+        Returns:
+            更新后的规则集信息
+        """
+        try:
+            # 查找并更新规则
+            rule = find_rule(ruleset, rule_id)
+            if rule is None:
+                raise Exception(f"未找到规则 ID: {rule_id}")
+            
+            rule["action_parameters"]["from_value"]["target_url"]["value"] = target_url
+            if source_url_pattern:
+                rule["expression"] = source_url_pattern
+            
+            # 更新整个规则集
+            update_data = {
+                "rules": ruleset.get("rules", [])
+            }
+            
+            endpoint = f"/zones/{self.zone_id}/rulesets/{ruleset['id']}"
+            result = self._make_request("PUT", endpoint, update_data)
+        except Exception as e:
+            self._invalidate_cache(e)
+            raise
         
-        logger.info(f"成功更新重定向规则: {rule_id} -> {target_url}")
-        return result.get("result", {})
+        updated = result.get("result", {})
+        self.ruleset_cache.set_ruleset(self.zone_id, REDIRECT_PHASE, updated)
+        logger.info(f"成功更新重定向规则: {rule_id} -> {target_url}（规则集版本 {updated.get('version')}）")
+        updated["skipped"] = False
+        return updated
     
     def update_or_create_redirect(self, source_pattern: str, target_url: str, 
-                                  rule_name: str = "OKX Domain Redirect") -> Dict[str, Any]:
+                                  rule_name: str = "OKX Domain Redirect",
+                                  skip_unchanged: bool = True) -> Dict[str, Any]:
         """
         更新或创建重定向规则（智能判断）
         
@@ -214,22 +531,372 @@ class CloudflareUpdater:
             source_pattern: 源 URL 模式
             target_url: 目标 URL
             rule_name: 规则名称
+            skip_unchanged: 规则已指向目标时跳过写入
             
         Returns:
-            规则信息
+            规则信息（跳过写入时 "skipped" 为 True）
         """
         try:
             if self.rule_id:
                 # 如果指定了 rule_id，尝试更新
-                return self.update_redirect_rule(self.rule_id, target_url, source_pattern)
+                return self.update_redirect_rule(self.rule_id, target_url, source_pattern, skip_unchanged)
             else:
                 # 否则创建新规则
-                return self.create_redirect_rule(source_pattern, target_url, rule_name)
+                return self.create_redirect_rule(source_pattern, target_url, rule_name, skip_unchanged)
         except Exception as e:
             logger.error(f"更新/创建重定向规则失败: {e}")
             raise
 
 
+class BulkRedirectList:
+    """
+    Bulk Redirect List 后端（账户级列表，一条规则匹配列表中的所有源 URL）
+    
+    适用于成千上万个源 URL 指向同一目标的场景：不受单个规则集规则数量的限制，
+    匹配也不随条目数增长变慢。同步时先与现有条目做差异比较：只有新增条目时追加，
+    有条目变化或需要删除时整体替换列表（一次原子操作，替换期间原有条目继续生效）
+    """
+    
+    def __init__(self, updater: CloudflareUpdater, account_id: str, list_name: str,
+                 batch_size: int = DEFAULT_BULK_BATCH_SIZE, status_code: int = 301,
+                 operation_timeout: float = BULK_OPERATION_TIMEOUT):
+        """
+        Args:
+            updater: CloudflareUpdater 实例（共用 API Token、连接池与限流器）
+            account_id: Cloudflare 账户 ID
+            list_name: 列表名称（只能包含小写字母、数字和下划线）
+            batch_size: 只追加条目时每次提交的条目数
+            status_code: 重定向状态码
+            operation_timeout: 一次同步中等待异步批量操作的总时间上限（秒）
+        """
+        self.updater = updater
+        self.account_id = account_id
+        self.list_name = list_name
+        self.batch_size = batch_size
+        self.status_code = status_code
+        self.operation_timeout = operation_timeout
+        self.list_id: Optional[str] = None
+    
+    @property
+    def _lists_endpoint(self) -> str:
+        return f"/accounts/{self.account_id}/rules/lists"
+    
+    def ensure_list(self) -> str:
+        """
+        获取列表 ID，列表不存在时创建
+        
+        Returns:
+            列表 ID
+        """
+        if self.list_id:
+            return self.list_id
+        
+        result = self.updater._make_request("GET", self._lists_endpoint)
+        for item in result.get("result", []):
+            if item.get("name") == self.list_name:
+                self.list_id = item["id"]
+                return self.list_id
+        
+        result = self.updater._make_request("POST", self._lists_endpoint, {
+            "name": self.list_name,
+            "kind": "redirect",
+            "description": "Auto-managed redirect list"
+        })
+        self.list_id = result["result"]["id"]
+        logger.info(f"已创建 Bulk Redirect List: {self.list_name}（{self.list_id}）")
+        return self.list_id
+    
+    def ensure_rule(self, description: str = "Auto Bulk Redirect") -> bool:
+        """
+        确保账户级重定向规则集中有一条引用本列表的 Bulk Redirect 规则
+        
+        规则集已存在时只追加这一条规则（POST .../rules），不重写其他规则，它们的 ID 保持不变；
+        规则集不存在时用 PUT 创建入口规则集
+        
+        Returns:
+            是否新建了规则
+        """
+        endpoint = f"/accounts/{self.account_id}/rulesets/phases/{REDIRECT_PHASE}/entrypoint"
+        try:
+            ruleset = self.updater._make_request("GET", endpoint).get("result", {})
+        except requests.HTTPError as e:
+            if e.response is None or e.response.status_code != 404:
+                raise
+            ruleset = {}
+        
+        for rule in ruleset.get("rules", []):
+            from_list = rule.get("action_parameters", {}).get("from_list", {})
+            if from_list.get("name") == self.list_name:
+                return False
+        
+        rule_data = {
+            "expression": f"http.request.full_uri in ${self.list_name}",
+            "action": "redirect",
+            "action_parameters": {
+                "from_list": {"name": self.list_name, "key": "http.request.full_uri"}
+            },
+            "description": description,
+            "enabled": True
+        }
+        if ruleset.get("id"):
+            self.updater._make_request("POST", f"/accounts/{self.account_id}/rulesets/{ruleset['id']}/rules",
+                                       rule_data)
+        else:
+            self.updater._make_request("PUT", endpoint, {"rules": [rule_data]})
+        logger.info(f"已创建引用列表 {self.list_name} 的 Bulk Redirect 规则")
+        return True
+    
+    def list_items(self) -> Dict[str, Dict[str, Any]]:
+        """
+        读取列表中的全部条目（按游标分页）
+        
+        Returns:
+            {源 URL: 条目}
+        """
+        list_id = self.ensure_list()
+        items: Dict[str, Dict[str, Any]] = {}
+        cursor = None
+        while True:
+            endpoint = f"{self._lists_endpoint}/{list_id}/items"
+            if cursor:
+                endpoint += f"?cursor={quote(cursor, safe='')}"
+            result = self.updater._make_request("GET", endpoint)
+            for item in result.get("result", []):
+                redirect = item.get("redirect", {})
+                if redirect.get("source_url"):
+                    items[redirect["source_url"]] = item
+            cursor = result.get("result_info", {}).get("cursors", {}).get("after")
+            if not cursor:
+                return items
+    
+    def _item(self, source_url: str, target_url: str) -> Dict[str, Any]:
+        return {"redirect": {"source_url": source_url, "target_url": target_url,
+                             "status_code": self.status_code}}
+    
+    def diff(self, desired: Dict[str, str], current: Dict[str, Dict[str, Any]],
+             delete_missing: bool = True) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """
+        比较期望的映射与现有条目
+        
+        Args:
+            desired: {源 URL: 目标 URL}
+            current: list_items() 的结果
+            delete_missing: 是否删除不在 desired 中的条目
+            
+        Returns:
+            (需要新增的条目, 需要删除的条目 ID)；目标或状态码变化的条目同时出现在两者中
+        """
+        to_add: List[Dict[str, Any]] = []
+        to_delete: List[str] = []
+        for source_url, target_url in desired.items():
+            existing = current.get(source_url)
+            if existing is not None:
+                redirect = existing.get("redirect", {})
+                if (redirect.get("target_url") == target_url
+                        and redirect.get("status_code", 301) == self.status_code):
+                    continue
+                to_delete.append(existing["id"])
+            to_add.append(self._item(source_url, target_url))
+        if delete_missing:
+            to_delete.extend(item["id"] for source_url, item in current.items() if source_url not in desired)
+        return to_add, to_delete
+    
+    def _wait(self, operation_id: Optional[str], deadline: float):
+        """等待异步批量操作完成（失败或超过 deadline 时抛出异常）"""
+        if not operation_id:
+            return
+        endpoint = f"/accounts/{self.account_id}/rules/lists/bulk_operations/{operation_id}"
+        while True:
+            status = self.updater._make_request("GET", endpoint).get("result", {})
+            state = status.get("status")
+            if state == "completed":
+                return
+            if state == "failed":
+                raise Exception(f"批量操作 {operation_id} 失败: {status.get('error')}")
+            if time.monotonic() >= deadline:
+                raise Exception(f"批量操作 {operation_id} 超过 {self.operation_timeout:g} 秒仍未完成（{state}）")
+            time.sleep(BULK_POLL_INTERVAL)
+    
+    def _batches(self, items: List[Any]) -> Iterable[List[Any]]:
+        for i in range(0, len(items), self.batch_size):
+            yield items[i:i + self.batch_size]
+    
+    def sync(self, desired: Dict[str, str], delete_missing: bool = True) -> Dict[str, int]:
+        """
+        使列表内容与期望的映射一致，只提交有变化的条目
+        
+        只有新增条目时分批追加（POST）；有条目的目标变化或需要删除时，用 PUT 一次性替换列表的全部条目。
+        替换是单个原子操作，完成前原有条目继续生效，不会出现源 URL 暂时没有重定向的空窗；
+        失败或超时时列表保持原样。列表同一时间只能进行一个批量操作，因此各操作依次提交并等待完成
+        
+        Args:
+            desired: {源 URL: 目标 URL}
+            delete_missing: 是否删除不在 desired 中的条目
+            
+        Returns:
+            {"added": 新增或变化的条目数, "deleted": 替换掉的旧条目数, "unchanged": 未变化条目数}
+        """
+        list_id = self.ensure_list()
+        current = self.list_items()
+        to_add, to_delete = self.diff(desired, current, delete_missing)
+        endpoint = f"{self._lists_endpoint}/{list_id}/items"
+        deadline = time.monotonic() + self.operation_timeout
+        
+        if to_delete:
+            # 替换后的完整内容：期望的条目，加上不删除时保留的其他现有条目
+            items = [self._item(source_url, target_url) for source_url, target_url in desired.items()]
+            if not delete_missing:
+                items.extend({"redirect": item["redirect"]} for source_url, item in current.items()
+                             if source_url not in desired)
+            result = self.updater._make_request("PUT", endpoint, items)
+            self._wait(result.get("result", {}).get("operation_id"), deadline)
+        else:
+            for batch in self._batches(to_add):
+                result = self.updater._make_request("POST", endpoint, batch)
+                self._wait(result.get("result", {}).get("operation_id"), deadline)
+        
+        stats = {"added": len(to_add), "deleted": len(to_delete),
+                 "unchanged": len(desired) - len(to_add)}
+        logger.info(f"Bulk Redirect List {self.list_name} 已同步（{'替换' if to_delete else '追加'}）: "
+                    f"新增/变化 {stats['added']}，删除 {stats['deleted']}，未变化 {stats['unchanged']}")
+        return stats
+    
+    def point_all(self, source_urls: Iterable[str], target_url: str,
+                  delete_missing: bool = True) -> Dict[str, int]:
+        """
+        把所有源 URL 重定向到同一目标（例如当前的邀请链接）
+        
+        Args:
+            source_urls: 源 URL
+            target_url: 目标 URL
+            delete_missing: 是否删除不在 source_urls 中的条目
+        """
+        return self.sync({url: target_url for url in source_urls}, delete_missing)
+
+
+def load_source_urls(config: Dict[str, Any]) -> List[str]:
+    """
+    读取 bulk_redirect 配置中的源 URL（source_urls 列表与 source_urls_file 文件，每行一个）
+    
+    Args:
+        config: bulk_redirect 配置
+    """
+    urls = list(config.get("source_urls", []))
+    if config.get("source_urls_file"):
+        path = Path(config["source_urls_file"])
+        if not path.is_absolute():
+            path = Path(__file__).parent / path
+        with open(path, 'r', encoding='utf-8') as f:
+            urls.extend(line.strip() for line in f if line.strip() and not line.startswith('#'))
+    return list(dict.fromkeys(urls))
+
+
+def create_bulk_redirect_list(config: Dict[str, Any],
+                              updater: Optional[CloudflareUpdater] = None) -> Optional[BulkRedirectList]:
+    """
+    根据 cloudflare_config.json 中的 bulk_redirect 字段创建 Bulk Redirect List 后端，例如：
+    {"account_id": "...", "list_name": "join_redirects", "source_urls_file": "bulk_sources.txt"}
+    
+    Args:
+        config: cloudflare_config.json 的内容
+        updater: 共用的 CloudflareUpdater（可选）
+        
+    Returns:
+        BulkRedirectList 实例；未配置时返回 None
+    """
+    bulk = config.get("bulk_redirect")
+    if not bulk:
+        return None
+    return BulkRedirectList(
+        updater or create_updater(config),
+        account_id=bulk["account_id"],
+        list_name=bulk["list_name"],
+        batch_size=bulk.get("batch_size", DEFAULT_BULK_BATCH_SIZE),
+        status_code=bulk.get("status_code", 301),
+        operation_timeout=bulk.get("operation_timeout", BULK_OPERATION_TIMEOUT)
+    )
+
+
+def get_cloudflare_transport(options: Optional[Dict] = None) -> HttpTransport:
+    """
+    获取共享的 Cloudflare 连接池（默认不在连接池中重试 429）
+    
+    Args:
+        options: HttpTransport 的构造参数（可选）
+    """
+    return get_transport("cloudflare", {"retry_statuses": CLOUDFLARE_RETRY_STATUSES, **(options or {})})
+
+
+def zone_configs(config: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    展开多 zone 配置：zones 列表中的每一项覆盖顶层的同名字段（api_token、source_pattern 等）
+    
+    没有 zones 字段时，顶层配置本身就是唯一的 zone
+    
+    Args:
+        config: cloudflare_config.json 的内容
+        
+    Returns:
+        每个 zone 的完整配置（含 "name"，默认为 zone_id）
+    """
+    zones = config.get("zones")
+    if not zones:
+        return [dict(config, name=config.get("name", config.get("zone_id")))]
+    base = {k: v for k, v in config.items() if k != "zones"}
+    merged = []
+    for zone in zones:
+        zone_config = dict(base, **zone)
+        zone_config.setdefault("name", zone_config["zone_id"])
+        merged.append(zone_config)
+    return merged
+
+
+def create_updater(config: Dict[str, Any]) -> CloudflareUpdater:
+    """
+    根据配置创建 Cloudflare 更新器
+    
+    配置中可选的 "http" 字段用于调整共享连接池，例如：
+    {"pool_size": 10, "connect_timeout": 5, "read_timeout": 30, "max_retries": 3, "backoff_factor": 0.5}
+    可选的 "ruleset_cache_ttl" 字段设置该更新器的规则集缓存有效期（秒，默认使用进程内共享的缓存）
+    可选的 "rate_limit" 字段设置进程内共享的请求速率，例如：
+    {"max_requests": 1200, "period": 300, "burst": 10}
+    可选的 "patch_rules" 字段为 false 时，更新规则改为提交整个规则集
+    可选的 "shared_cache" 字段调整进程间写入去重（directory / write_window），设为 false 时关闭
+    
+    Args:
+        config: cloudflare_config.json 的内容
+        
+    Returns:
+        CloudflareUpdater 实例
+    """
+    # 多 zone 配置：返回第一个 zone 的更新器（所有 zone 请使用 zone_fanout.create_fanout）
+    if "zone_id" not in config and config.get("zones"):
+        config = zone_configs(config)[0]
+    
+    # 进程间写入去重默认开启，"shared_cache": false 时关闭
+    shared_cache = config.get("shared_cache")
+    write_cache = None
+    if shared_cache is not False:
+        write_cache = get_shared_cache(shared_cache if isinstance(shared_cache, dict) else None)
+    
+    # 指定了有效期时使用该更新器自己的缓存，不影响进程内其他更新器
+    ruleset_cache = None
+    if "ruleset_cache_ttl" in config:
+        ruleset_cache = RulesetCache(config["ruleset_cache_ttl"])
+    
+    return CloudflareUpdater(
+        api_token=config["api_token"],
+        zone_id=config["zone_id"],
+        rule_id=config.get("rule_id"),
+        transport=get_cloudflare_transport(config.get("http")),
+        ruleset_cache=ruleset_cache,
+        ruleset_id=config.get("ruleset_id"),
+        rate_limiter=get_rate_limiter("cloudflare", config.get("rate_limit")),
+        patch_rules=config.get("patch_rules", True),
+        write_cache=write_cache
+    )
+
+
 def load_config(config_file: str = "cloudflare_config.json") -> Dict[str, str]:
     """
     从配置文件加载 Cloudflare 配置
@@ -273,11 +940,7 @@ def main():
         config = load_config()
         
         # 创建更新器
-        updater = CloudflareUpdater(
-            api_token=config["api_token"],
-            zone_id=config["zone_id"],
-            rule_id=config.get("rule_id")
-        )
+        updater = create_updater(config)
         
         # 测试：列出现有规则
         print("\n当前的重定向规则集:")
@@ -285,7 +948,7 @@ def main():
         for ruleset in rulesets:
             print(f"  - {ruleset.get('name')}: {ruleset.get('id')}")
             for rule in ruleset.get("rules", []):
-                print(f"    • {rule.get('description')}: {rule.get('action_parameters', {}).get('from_value', {}).get('target_url', {}).get('value')}")
+                print(f"    • {rule.get('description')}: {get_rule_target(rule)}")
         
         # 询问是否更新
         print("\n是否要测试更新重定向规则？")
@@ -298,6 +961,8 @@ def main():
             )
             print(f"\n✅ 成功更新重定向规则到: {test_url}")
         
+        print(f"\n限流指标: {updater.rate_limiter.metrics()}")
+        
     except FileNotFoundError as e:
         print(f"❌ {e}")
         sys.exit(1)
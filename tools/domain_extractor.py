@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+域名提取引擎
+将原先的三个正则合并为一个导入时预编译的模式，支持按块增量扫描并在命中后立即停止
+"""
+
+import codecs
+import hashlib
+import re
+import string
+from typing import Iterator, List, Optional
+
+# 合并后的域名模式，分支顺序即原先的优先级：
+#   d1: 匹配 www.xxx.com 格式（只取 www. 之后的部分）
+#   d2: 匹配完整 URL
+#   d3: 匹配文本中 "域名: xxx.com" 之类的标注
+# 同一位置上排在前面的分支优先；d2/d3 能匹配的位置 d1 一定也能匹配到同一个域名，
+# 因此取最左侧的匹配与原先"逐个模式 findall 取第一个"的结果一致
+DOMAIN_PATTERN = re.compile(
+    r'(?:https?://)?(?:www\.)?(?P<d1>[a-zA-Z0-9-]+\.com)'
+    r'|(?P<d2>https?://(?:www\.)?[a-zA-Z0-9-]+\.com)'
+    r'|(?:域名|网址|链接|URL|Domain)[:：\s]*(?P<d3>[a-zA-Z0-9-]+\.com)',
+    re.IGNORECASE
+)
+
+# 可能属于一个尚未读完的匹配的字符（用于决定块边界处需要保留的尾部）
+_TAIL_CHARS = frozenset(string.ascii_letters + string.digits + '.:/-：' + string.whitespace)
+
+# 尾部额外保留的字符数（覆盖 "Domain" 等前缀关键字）
+KEYWORD_MARGIN = 8
+
+# 尾部最多保留的字符数，避免异常页面导致缓冲区无限增长
+MAX_TAIL = 4096
+
+# 默认的读取块大小（字节）
+CHUNK_SIZE = 16 * 1024
+
+
+def normalize_domain(match: 're.Match') -> str:
+    """
+    将匹配结果规范化为基础域名
+
+    Args:
+        match: DOMAIN_PATTERN 的匹配结果
+
+    Returns:
+        带 https:// 前缀、不含 /join 路径的基础域名
+    """
+    domain = match.group('d1') or match.group('d2') or match.group('d3')
+
+    # 清理域名：移除 /join 及后续路径
+    domain = domain.split('/join')[0]
+    domain = domain.rstrip('/')
+
+    # 确保域名格式正确（添加 https://）
+    if not domain.startswith('http'):
+        domain = 'https://' + domain
+    return domain
+
+
+def extract_domain(text: str) -> Optional[str]:
+    """
+    从完整文本中提取第一个基础域名
+
+    Args:
+        text: 文本内容
+
+    Returns:
+        基础域名，未找到返回 None
+    """
+    match = DOMAIN_PATTERN.search(text)
+    return normalize_domain(match) if match else None
+
+
+def iter_domains(text: str) -> Iterator[str]:
+    """
+    按出现顺序遍历文本中的所有基础域名（去重）
+
+    Args:
+        text: 文本内容
+
+    Yields:
+        基础域名
+    """
+    seen = set()
+    for match in DOMAIN_PATTERN.finditer(text):
+        domain = normalize_domain(match)
+        if domain not in seen:
+            seen.add(domain)
+            yield domain
+
+
+def _tail_run(text: str) -> int:
+    """
+    文本末尾连续的 _TAIL_CHARS 字符的起始位置（最多向前 MAX_TAIL 个字符）
+
+    匹配在读到 ".com" 后仍可能随后续数据改变（例如 "www.COM" 之后读到 ".com" 时应为 "COM.com"），
+    而匹配只能跨越 _TAIL_CHARS 字符，因此结束在该位置之前的匹配不再受后续数据影响
+    """
+    limit = max(0, len(text) - MAX_TAIL)
+    i = len(text)
+    while i > limit and text[i - 1] in _TAIL_CHARS:
+        i -= 1
+    return i
+
+
+class StreamingDomainExtractor:
+    """增量域名提取器：逐块喂入字节，找到足够的域名后即可停止读取"""
+
+    def __init__(self, encoding: str = 'utf-8', max_candidates: int = 1):
+        """
+        初始化提取器
+
+        Args:
+            encoding: 响应内容编码
+            max_candidates: 收集到这么多个不同的域名后停止（用于候选域名探测）
+        """
+        self._decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+        self._hasher = hashlib.sha256()
+        self._buffer = ''
+        self.max_candidates = max_candidates
+        self.bytes_consumed = 0
+        self.candidates: List[str] = []
+
+    @property
+    def domain(self) -> Optional[str]:
+        """第一个找到的基础域名"""
+        return self.candidates[0] if self.candidates else None
+
+    @property
+    def done(self) -> bool:
+        """是否已收集到足够的域名"""
+        return len(self.candidates) >= self.max_candidates
+
+    @property
+    def content_hash(self) -> str:
+        """已读取内容的 SHA-256"""
+        return self._hasher.hexdigest()
+
+    def feed(self, chunk: bytes) -> Optional[str]:
+        """
+        喂入一个数据块
+
+        Args:
+            chunk: 原始字节
+
+        Returns:
+            已收集到足够的域名时返回第一个基础域名，否则返回 None
+        """
+        if self.done:
+            return self.domain
+        self.bytes_consumed += len(chunk)
+        self._hasher.update(chunk)
+        return self._scan(self._buffer + self._decoder.decode(chunk), final=False)
+
+    def finish(self) -> Optional[str]:
+        """
+        数据读取完毕，扫描剩余缓冲
+
+        Returns:
+            第一个基础域名；未找到返回 None
+        """
+        if not self.done:
+            self._scan(self._buffer + self._decoder.decode(b'', final=True), final=True)
+        return self.domain
+
+    def _scan(self, text: str, final: bool) -> Optional[str]:
+        # 只采纳结束在末尾连续域名字符之前的匹配，其余匹配留到下一块数据到达后重新扫描
+        stable = len(text) if final else _tail_run(text)
+        end = 0
+        for match in DOMAIN_PATTERN.finditer(text):
+            if match.end() >= stable and not final:
+                break
+            domain = normalize_domain(match)
+            if domain not in self.candidates:
+                self.candidates.append(domain)
+            end = match.end()
+            if self.done:
+                self._buffer = ''
+                return self.domain
+
+        self._buffer = '' if final else text[max(end, stable - KEYWORD_MARGIN, 0):]
+        return None
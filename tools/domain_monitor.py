@@ -8,29 +8,43 @@
 import requests
 import re
 import time
-import json
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, Dict, List
+from typing import Optional, Dict, Iterator, List
 import logging
 import sys
 
-# 配置日志
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('domain_monitor.log', encoding='utf-8'),
-        logging.StreamHandler()
-    ]
-)
+from domain_extractor import CHUNK_SIZE, StreamingDomainExtractor
+from domain_prober import DEFAULT_LATENCY_TOLERANCE, MAX_CANDIDATES, DomainProber
+from health_monitor import HealthMonitor
+from history_store import HistoryStore, open_history_store
+from monitor_state import MonitorState
+from notion_api import NotionApiFetcher
+from http_client import ACCEPT_ENCODING, get_transport
+from log_setup import setup_logging
+from poll_scheduler import PollScheduler, default_budget, get_budget
+from propagation import PropagationPipeline, Sink
+from shared_cache import SharedCache, get_shared_cache, notion_key
+from zone_fanout import ZONE_FAILED
+
 logger = logging.getLogger(__name__)
 
+# 日志文件（按需配置，见 log_setup.setup_logging）
+LOG_FILE = 'domain_monitor.log'
+
+# Notion URL 标题中的域名（例如 APK-www-firgrouxywebb-com-join-df0b826...）
+TITLE_PATTERN = re.compile(r'APK-([a-zA-Z0-9-]+)-df0b826')
+
 
 class DomainMonitor:
     """域名监控器"""
     
-    def __init__(self, notion_url: str, check_interval: int = 300, cloudflare_enabled: bool = False):
+    def __init__(self, notion_url: str, check_interval: int = 300, cloudflare_enabled: bool = False,
+                 history_file: Optional[str] = None, cloudflare_config_file: str = "cloudflare_config.json",
+                 state_file: Optional[str] = None, scheduler: Optional[PollScheduler] = None,
+                 probe_candidates: Optional[bool] = None, probe_path: Optional[str] = None,
+                 notion_api: bool = False, notion_api_base: Optional[str] = None,
+                 shared_cache: Optional[SharedCache] = None):
         """
         初始化域名监控器
         
@@ -38,57 +52,86 @@ class DomainMonitor:
             notion_url: Notion 页面 URL
             check_interval: 检查间隔（秒），默认 5 分钟
             cloudflare_enabled: 是否启用 Cloudflare 自动更新
+            history_file: 历史记录文件（可选，默认 domain_history.jsonl；.db/.sqlite 后缀使用 SQLite）
+            cloudflare_config_file: Cloudflare 配置文件名
+            state_file: 状态快照文件（可选，默认 monitor_state.json）
+            scheduler: 轮询调度器（可选，默认以 check_interval 为基础间隔，共享 "notion" 请求预算）
+            probe_candidates: 是否探测页面中的所有候选域名，选用延迟最低的可访问域名
+                              （默认读取 Cloudflare 配置中的 probe_candidates 字段）
+            probe_path: 探测路径（默认使用 Cloudflare 配置中的 redirect_suffix）
+            notion_api: 是否优先通过 Notion 页面数据接口读取（失败时退回抓取 HTML）
+            notion_api_base: 接口地址（可选，例如本地回放服务器 http://127.0.0.1:8765/api/v3）
+            shared_cache: 进程间共享的抓取缓存（可选，默认使用 shared_cache/ 目录）
         """
         self.notion_url = notion_url
         self.check_interval = check_interval
-        self.history_file = Path(__file__).parent / 'domain_history.json'
-        self.current_domain: Optional[str] = None
-        self.history: List[Dict] = self._load_history()
+        self.scheduler = scheduler or PollScheduler(check_interval,
+                                                    budget=get_budget("notion", default_budget([check_interval])))
+        # 最近一次检查是否因抓取失败而未获取到域名（供调度器退避）
+        self.last_check_failed = False
+        self.history_file = Path(__file__).parent / (history_file or 'domain_history.jsonl')
+        self.cloudflare_config_file = cloudflare_config_file
+        # 从状态快照恢复，重启后不会把已知域名当作首次检测
+        self.state = MonitorState(Path(__file__).parent / (state_file or 'monitor_state.json'))
+        self.current_domain: Optional[str] = self.state.get('last_domain')
+        self.history_store: HistoryStore = open_history_store(
+            self.history_file, legacy_file=self.history_file.with_suffix('.json')
+        )
         self.cloudflare_enabled = cloudflare_enabled
         self.cloudflare_updater = None
+        self.cloudflare_fanout = None
+        
+        # Notion 抓取：共享连接池 + 条件请求缓存；同一主机上的其他进程在 TTL 内复用本进程的抓取结果
+        self.transport = get_transport("notion")
+        self.shared_cache = shared_cache or get_shared_cache()
+        # 最近一次轮询的网络传输字节数（压缩后）与解码后字节数，以及累计值
+        self.last_poll_bytes: Dict[str, int] = {'transferred': 0, 'decoded': 0}
+        self.total_poll_bytes: Dict[str, int] = {'transferred': 0, 'decoded': 0}
+        self._etag: Optional[str] = self.state.get('etag')
+        self._last_modified: Optional[str] = self.state.get('last_modified')
+        self._content_hash: Optional[str] = self.state.get('content_hash')
+        self._last_extracted: Optional[str] = self.state.get('last_domain')
+        self.api_fetcher: Optional[NotionApiFetcher] = None
+        if notion_api:
+            try:
+                self.api_fetcher = NotionApiFetcher(notion_url, api_base=notion_api_base, transport=self.transport)
+            except ValueError as e:
+                logger.warning(f"无法使用 Notion 页面数据接口，将抓取 HTML 页面: {e}")
         
         # 如果启用 Cloudflare，加载配置并初始化更新器
         if self.cloudflare_enabled:
             self._init_cloudflare()
         
-    def _load_history(self) -> List[Dict]:
-        """加载历史记录"""
-        if self.history_file.exists():
-            try:
-                with open(self.history_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except Exception as e:
-                logger.error(f"加载历史记录失败: {e}")
-                return []
-        return []
-    
-    def _save_history(self):
-        """保存历史记录"""
-        try:
-            with open(self.history_file, 'w', encoding='utf-8') as f:
-                json.dump(self.history, f, ensure_ascii=False, indent=2)
-            logger.info("历史记录已保存")
-        except Exception as e:
-            logger.error(f"保存历史记录失败: {e}")
-    
+        # 候选域名探测（默认探测重定向的目标路径 /join/<邀请码>）
+        cf_config = getattr(self, 'cloudflare_config', {})
+        if probe_candidates is None:
+            probe_candidates = cf_config.get("probe_candidates", False)
+        self.prober: Optional[DomainProber] = None
+        if probe_candidates:
+            self.prober = DomainProber(probe_path or cf_config.get("redirect_suffix", "/join/88596413"),
+                                       tolerance=cf_config.get("probe_tolerance", DEFAULT_LATENCY_TOLERANCE))
+        
+        # 域名变化的传播目标（可通过 pipeline.add_sink 添加 Webhook 等）
+        self.pipeline = PropagationPipeline()
+        if self.cloudflare_enabled:
+            self.pipeline.add_sink(Sink('cloudflare', self._update_cloudflare))
+        
     def _init_cloudflare(self):
         """初始化 Cloudflare 更新器"""
         try:
             # 尝试导入 cloudflare_updater 模块
-            from cloudflare_updater import CloudflareUpdater, load_config
+            from cloudflare_updater import load_config
+            from zone_fanout import create_fanout
             
             # 加载配置
-            config = load_config()
+            config = load_config(self.cloudflare_config_file)
             
-            # 创建更新器
-            self.cloudflare_updater = CloudflareUpdater(
-                api_token=config["api_token"],
-                zone_id=config["zone_id"],
-                rule_id=config.get("rule_id")
-            )
+            # 创建各 zone 的更新器（共享连接池）；健康检查等单 zone 功能使用第一个 zone
+            self.cloudflare_fanout = create_fanout(config)
+            self.cloudflare_updater = self.cloudflare_fanout.primary.updater
             
             self.cloudflare_config = config
-            logger.info("✅ Cloudflare 自动更新已启用")
+            logger.info(f"✅ Cloudflare 自动更新已启用（{len(self.cloudflare_fanout.zones)} 个 zone）")
             
         except FileNotFoundError as e:
             logger.error(f"❌ Cloudflare 配置文件不存在: {e}")
@@ -105,99 +148,92 @@ class DomainMonitor:
         """
         从 Notion 页面提取基础域名（不包含 /join/ 路径）
         
+        其他进程（如 link_updater.py）在共享缓存的 TTL 内抓取过同一页面时直接复用其结果；
+        多个进程同时到期时通过文件锁只抓取一次
+        
         Returns:
             提取到的基础域名（如 https://www.firgrouxywebb.com），如果失败则返回 None
         """
+        try:
+            return self.shared_cache.fetch(notion_key(self.notion_url), self._fetch_domain)
+        except (OSError, TimeoutError) as e:
+            logger.warning(f"共享抓取缓存不可用，直接抓取: {e}")
+            return self._fetch_domain()
+    
+    def _fetch_domain(self) -> Optional[str]:
+        """
+        实际抓取 Notion 页面提取基础域名
+        
+        启用 notion_api 时先通过页面数据接口按需读取块文本，接口失败或未找到域名时退回抓取 HTML 页面。
+        启用候选探测时收集最多 MAX_CANDIDATES 个域名，选用延迟最低的可访问域名
+        
+        Returns:
+            提取到的基础域名（如 https://www.firgrouxywebb.com），如果失败则返回 None
+        """
+        if self.api_fetcher:
+            try:
+                logger.info(f"正在读取 Notion 页面数据: {self.api_fetcher.page_id}")
+                extraction = self.api_fetcher.extract(MAX_CANDIDATES if self.prober else 1)
+                self._record_poll_bytes(extraction.bytes_transferred, extraction.bytes_decoded)
+                if extraction.candidates:
+                    return self._select_domain(extraction.candidates, extraction.content_hash,
+                                               extraction.bytes_transferred)
+                logger.info("Notion 页面数据中未找到域名，改为抓取 HTML 页面")
+            except Exception as e:
+                logger.warning(f"读取 Notion 页面数据失败，改为抓取 HTML 页面: {e}")
+        
+        return self._extract_domain_from_html()
+    
+    def _extract_domain_from_html(self) -> Optional[str]:
+        """
+        抓取渲染后的 HTML 页面提取基础域名
+        
+        使用 ETag/Last-Modified 条件请求，页面返回 304 时直接复用上次的结果；
+        否则按块流式读取并增量匹配，命中域名后立即停止读取连接
+        
+        Returns:
+            提取到的基础域名，如果失败则返回 None
+        """
         try:
             # 添加请求头模拟浏览器
             headers = {
                 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
                 'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
                 'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
+                'Accept-Encoding': ACCEPT_ENCODING,
             }
+            if self._etag:
+                headers['If-None-Match'] = self._etag
+            if self._last_modified:
+                headers['If-Modified-Since'] = self._last_modified
             
             logger.info(f"正在访问 Notion 页面: {self.notion_url}")
-            response = requests.get(self.notion_url, headers=headers, timeout=30)
-            response.raise_for_status()
-            
-            content = response.text
-            
-            # 尝试多种正则表达式匹配域名（只提取基础域名部分）
-            patterns = [
-                # 匹配 www.xxx.com 格式（在 /join 之前）
-                r'(https?://)?(?:www\.)?([a-zA-Z0-9-]+\.com)(?:/join)?',
-                # 匹配完整 URL 但只取域名部分
-                r'(https?://(?:www\.)?[a-zA-Z0-9-]+\.com)(?:/join)?',
-                # 匹配文本中的域名
-                r'(?:域名|网址|链接|URL|Domain)[:：\s]*([a-zA-Z0-9-]+\.com)',
-            ]
+            response = self.transport.request('GET', self.notion_url, headers=headers, stream=True)
             
-            for pattern in patterns:
-                matches = re.findall(pattern, content, re.IGNORECASE)
-                if matches:
-                    # 提取并规范化域名（只保留基础域名）
-                    for match in matches:
-                        if isinstance(match, tuple):
-                            domain = match[-1] if match[-1] else match[0]
-                        else:
-                            domain = match
-                        
-                        # 清理域名：移除 /join 及后续路径
-                        domain = domain.split('/join')[0]
-                        domain = domain.rstrip('/')
-                        
-                        # 确保域名格式正确（添加 https://）
-                        if not domain.startswith('http'):
-                            domain = 'https://' + domain
-                        
-                        logger.info(f"提取到基础域名: {domain}")
-                        return domain
-            
-            # 如果没有从内容中提取到，尝试从 URL 标题提取
-            # Notion URL 格式: APK-www-firgrouxywebb-com-join-df0b826...
-            title_match = re.search(r'APK-([a-zA-Z0-9-]+)-df0b826', self.notion_url)
-            if title_match:
-                # 提取域名部分并转换格式
-                # 例如: www-firgrouxywebb-com-join -> www.firgrouxywebb.com
-                domain_slug = title_match.group(1)
+            try:
+                if response.status_code == 304:
+                    logger.info("Notion 页面未修改（304），复用上次提取结果")
+                    self._record_poll_bytes(0, 0)
+                    return self._last_extracted
                 
-                # 处理域名格式
-                # 假设格式为: www-domain-com-join 或 domain-com-join
-                parts = domain_slug.split('-')
+                response.raise_for_status()
+                validators = {'etag': response.headers.get('ETag'),
+                              'last_modified': response.headers.get('Last-Modified')}
                 
-                # 查找 'join' 的位置（如果有）
-                if 'join' in parts:
-                    join_index = parts.index('join')
-                    # join 之前的部分是域名
-                    domain_parts = parts[:join_index]
+                extractor = StreamingDomainExtractor(response.encoding or 'utf-8',
+                                                     max_candidates=MAX_CANDIDATES if self.prober else 1)
+                for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                    if extractor.feed(chunk):
+                        break
                 else:
-                    domain_parts = parts
-                
-                # 重组域名（将 - 替换为 .）
-                if len(domain_parts) >= 2:
-                    # 找到 com/net/org 等顶级域名
-                    tld_candidates = ['com', 'net', 'org', 'io', 'co']
-                    domain_str = None
-                    
-                    for i, part in enumerate(domain_parts):
-                        if part in tld_candidates:
-                            # 重组: 将顶级域名前的部分用 . 连接
-                            domain_str = '.'.join(domain_parts[:i]) + '.' + part
-                            break
-                    
-                    if domain_str:
-                        domain = f"https://{domain_str}"
-                        logger.info(f"从 URL 标题提取到基础域名: {domain}")
-                        return domain
-                
-                # 如果上述方法失败，尝试简单替换（移除 join 部分）
-                domain_str = domain_slug.replace('-join', '').replace('-', '.')
-                domain = f"https://{domain_str}"
-                logger.info(f"从 URL 标题提取到基础域名（简单模式）: {domain}")
-                return domain
+                    extractor.finish()
+            finally:
+                # 提前命中时：剩余内容较少则读完以便复用连接（HTTP/2 下只关闭该请求流），否则关闭连接
+                self.transport.finish(response)
             
-            logger.warning("未能从 Notion 页面提取到域名")
-            return None
+            self._record_poll_bytes(self.transport.transferred_bytes(response) or 0, extractor.bytes_consumed)
+            return self._select_domain(extractor.candidates, extractor.content_hash,
+                                       extractor.bytes_consumed, validators)
             
         except requests.RequestException as e:
             logger.error(f"请求 Notion 页面失败: {e}")
@@ -206,6 +242,109 @@ class DomainMonitor:
             logger.error(f"提取域名时发生错误: {e}")
             return None
     
+    def _record_poll_bytes(self, transferred: int, decoded: int):
+        """记录本次轮询的传输字节数（压缩后）与解码后字节数"""
+        self.last_poll_bytes = {'transferred': transferred, 'decoded': decoded}
+        self.total_poll_bytes['transferred'] += transferred
+        self.total_poll_bytes['decoded'] += decoded
+        if decoded:
+            logger.info(f"本次轮询传输 {transferred} 字节，解码后 {decoded} 字节"
+                        f"（累计 {self.total_poll_bytes['transferred']} / {self.total_poll_bytes['decoded']}）")
+    
+    def _select_domain(self, candidates: List[str], content_hash: str, bytes_read: int,
+                       validators: Optional[Dict[str, Optional[str]]] = None) -> Optional[str]:
+        """
+        根据提取到的候选域名确定结果，并缓存到状态快照
+        
+        Args:
+            candidates: 候选基础域名（按出现顺序）
+            content_hash: 已读取内容的哈希
+            bytes_read: 已读取的字节数
+            validators: HTML 响应的条件请求验证器（etag / last_modified）
+        
+        Returns:
+            基础域名，失败返回 None
+        """
+        # 已读取部分的内容哈希未变化时，结果必然相同
+        if content_hash == self._content_hash:
+            logger.info("Notion 页面内容哈希未变化，复用上次提取结果")
+            if validators:
+                self._etag, self._last_modified = validators['etag'], validators['last_modified']
+                self.state.update(**validators)
+            return self._last_extracted
+        
+        if candidates and self.prober:
+            logger.info(f"提取到 {len(candidates)} 个候选域名（读取 {bytes_read} 字节）")
+            domain = self.prober.pick(candidates)
+            if domain is None:
+                # 不缓存本次结果：下次检查重新抓取并探测，而不是因 304 复用
+                return None
+        elif candidates:
+            logger.info(f"提取到基础域名: {candidates[0]}（读取 {bytes_read} 字节）")
+            domain = candidates[0]
+        else:
+            domain = self._extract_domain_from_title()
+        
+        if validators:
+            self._etag, self._last_modified = validators['etag'], validators['last_modified']
+            self.state.update(**validators)
+        self._content_hash = content_hash
+        self._last_extracted = domain
+        self.state.update(content_hash=content_hash)
+        return domain
+    
+    def _extract_domain_from_title(self) -> Optional[str]:
+        """
+        页面内容中未找到域名时，从 Notion URL 标题提取基础域名
+        
+        Returns:
+            提取到的基础域名，如果失败则返回 None
+        """
+        # Notion URL 格式: APK-www-firgrouxywebb-com-join-df0b826...
+        title_match = TITLE_PATTERN.search(self.notion_url)
+        if title_match:
+            # 提取域名部分并转换格式
+            # 例如: www-firgrouxywebb-com-join -> www.firgrouxywebb.com
+            domain_slug = title_match.group(1)
+            
+            # 处理域名格式
+            # 假设格式为: www-domain-com-join 或 domain-com-join
+            parts = domain_slug.split('-')
+            
+            # 查找 'join' 的位置（如果有）
+            if 'join' in parts:
+                join_index = parts.index('join')
+                # join 之前的部分是域名
+                domain_parts = parts[:join_index]
+            else:
+                domain_parts = parts
+            
+            # 重组域名（将 - 替换为 .）
+            if len(domain_parts) >= 2:
+                # 找到 com/net/org 等顶级域名
+                tld_candidates = ['com', 'net', 'org', 'io', 'co']
+                domain_str = None
+                
+                for i, part in enumerate(domain_parts):
+                    if part in tld_candidates:
+                        # 重组: 将顶级域名前的部分用 . 连接
+                        domain_str = '.'.join(domain_parts[:i]) + '.' + part
+                        break
+                
+                if domain_str:
+                    domain = f"https://{domain_str}"
+                    logger.info(f"从 URL 标题提取到基础域名: {domain}")
+                    return domain
+            
+            # 如果上述方法失败，尝试简单替换（移除 join 部分）
+            domain_str = domain_slug.replace('-join', '').replace('-', '.')
+            domain = f"https://{domain_str}"
+            logger.info(f"从 URL 标题提取到基础域名（简单模式）: {domain}")
+            return domain
+        
+        logger.warning("未能从 Notion 页面提取到域名")
+        return None
+    
     def check_domain_change(self) -> bool:
         """
         检查域名是否发生变化
@@ -214,6 +353,7 @@ class DomainMonitor:
             如果域名发生变化返回 True，否则返回 False
         """
         new_domain = self.extract_domain_from_notion()
+        self.last_check_failed = new_domain is None
         
         if new_domain is None:
             logger.warning("本次检查未能获取域名")
@@ -222,62 +362,113 @@ class DomainMonitor:
         # 首次检查
         if self.current_domain is None:
             self.current_domain = new_domain
+            self.state.update(last_domain=new_domain)
             self._record_change(new_domain, "首次检测")
             logger.info(f"首次检测到基础域名: {new_domain}")
-            # 首次检测也尝试更新 Cloudflare
-            if self.cloudflare_enabled:
-                self._update_cloudflare(new_domain)
+            # 首次检测也推送到各传播目标（Cloudflare 等）
+            self._propagate(new_domain)
             return True
         
         # 检查是否发生变化
         if new_domain != self.current_domain:
             old_domain = self.current_domain
             self.current_domain = new_domain
+            self.state.update(last_domain=new_domain)
             self._record_change(new_domain, f"域名从 {old_domain} 变更")
-            logger.warning(f"⚠️ 基础域名发生变化!")
-            logger.warning(f"旧域名: {old_domain}")
-            logger.warning(f"新域名: {new_domain}")
+            logger.warning(f"⚠️ 基础域名发生变化: {old_domain} -> {new_domain}")
             
-            # 自动更新 Cloudflare
-            if self.cloudflare_enabled:
-                self._update_cloudflare(new_domain)
+            # 并发推送到各传播目标（Cloudflare 等）
+            self._propagate(new_domain)
             
             return True
         
         logger.info(f"基础域名未变化: {new_domain}")
+        
+        # 上次 Cloudflare 更新未成功（或尚未同步）时补做；健康检查主动切换到备用域名时不覆盖
+        if (self.cloudflare_enabled and self.cloudflare_updater and not self.state.get('failover_target')
+                and self.state.get('cloudflare_target') != self._redirect_url(new_domain)):
+            logger.info("Cloudflare 重定向尚未同步到当前域名，重新尝试更新")
+            try:
+                self._update_cloudflare(new_domain)
+            except Exception as e:
+                # 即使 Cloudflare 更新失败，也继续运行监控，下次检查时再补做
+                logger.error(f"❌ 更新 Cloudflare 重定向规则失败: {e}")
         return False
     
-    def _update_cloudflare(self, base_domain: str):
-        """更新 Cloudflare 重定向规则"""
+    def start_health_check(self) -> Optional[HealthMonitor]:
+        """
+        Cloudflare 配置中启用了 health_check 时，启动重定向目标的后台健康检查
+        
+        Returns:
+            已启动的 HealthMonitor，未启用时返回 None
+        """
+        if not (self.cloudflare_enabled and self.cloudflare_updater
+                and self.cloudflare_config.get("health_check", {}).get("enabled")):
+            return None
+        # 多 zone 配置时只对第一个 zone 做健康检查与切换
+        zone_config = self.cloudflare_fanout.primary.config
+        if not zone_config.get("rule_id"):
+            logger.warning("健康检查需要在 Cloudflare 配置中设置 rule_id，已跳过")
+            return None
+        
+        health = HealthMonitor.from_config(
+            self.cloudflare_updater, zone_config,
+            primary=lambda: self.current_domain,
+            history_store=self.history_store,
+            state=self.state,
+            on_switch=lambda url, reason: self._record_change(url, f"健康检查切换: {reason}"),
+        )
+        health.start()
+        return health
+    
+    def _propagate(self, base_domain: str):
+        """把新域名推送到所有传播目标（并发执行，各自超时）"""
+        if self.pipeline.sinks:
+            self.pipeline.run(base_domain)
+    
+    def _redirect_url(self, base_domain: str) -> str:
+        """拼接完整的重定向 URL（基础域名 + redirect_suffix，默认为 /join/88596413）"""
+        redirect_suffix = self.cloudflare_config.get("redirect_suffix", "/join/88596413")
+        return base_domain.rstrip('/') + redirect_suffix
+    
+    def _update_cloudflare(self, base_domain: str) -> bool:
+        """
+        更新 Cloudflare 重定向规则
+        
+        Returns:
+            是否实际写入了规则（失败时抛出异常，传播管道记录为 failed）
+        """
         if not self.cloudflare_updater:
             logger.error("Cloudflare 更新器未初始化")
-            return
+            return False
         
-        try:
-            # 获取重定向后缀（默认为 /join/88596413）
-            redirect_suffix = self.cloudflare_config.get("redirect_suffix", "/join/88596413")
-            
-            # 拼接完整的重定向 URL
-            full_redirect_url = base_domain.rstrip('/') + redirect_suffix
-            
-            logger.info(f"正在更新 Cloudflare 重定向规则...")
-            logger.info(f"基础域名: {base_domain}")
-            logger.info(f"完整重定向 URL: {full_redirect_url}")
-            
-            result = self.cloudflare_updater.update_or_create_redirect(
-                source_pattern=self.cloudflare_config["source_pattern"],
-                target_url=full_redirect_url,
-                rule_name="OKX Domain Auto Redirect"
-            )
-            
-            logger.info(f"✅ Cloudflare 重定向规则已更新: {full_redirect_url}")
-            
-            # 记录到历史
+        # 拼接完整的重定向 URL
+        full_redirect_url = self._redirect_url(base_domain)
+        
+        logger.info(f"正在更新 Cloudflare 重定向规则: {base_domain} -> {full_redirect_url}")
+        
+        # 所有 zone 并发更新
+        fanout = self.cloudflare_fanout.apply(full_redirect_url)
+        
+        # 指向新的官方域名后，之前的健康检查切换状态（只针对第一个 zone）不再有效
+        primary = fanout.results[0]
+        if primary.status != ZONE_FAILED:
+            self.state.update(ruleset_version=primary.result.get("version"), failover_target=None)
+        if fanout.changed:
             self._record_change(full_redirect_url, f"Cloudflare 301 重定向已更新")
-            
-        except Exception as e:
-            logger.error(f"❌ 更新 Cloudflare 重定向规则失败: {e}")
-            # 即使 Cloudflare 更新失败，也继续运行监控
+        
+        # 任何 zone 失败都视为传播失败：不记录 cloudflare_target，下次检查时重试（已指向目标的 zone 跳过写入）
+        if fanout.failed:
+            raise Exception(f"{len(fanout.failed)}/{len(fanout.results)} 个 zone 更新失败"
+                            f"（{', '.join(r.name for r in fanout.failed)}）: {fanout.failed[0].error}")
+        self.state.update(cloudflare_target=full_redirect_url)
+        
+        if not fanout.changed:
+            logger.info(f"Cloudflare 重定向规则已指向 {full_redirect_url}，无需更新")
+            return False
+        
+        logger.info(f"✅ Cloudflare 重定向规则已更新: {full_redirect_url}")
+        return True
     
     def _record_change(self, domain: str, change_type: str):
         """
@@ -292,27 +483,43 @@ class DomainMonitor:
             'domain': domain,
             'change_type': change_type
         }
-        self.history.append(record)
-        self._save_history()
+        try:
+            self.history_store.append(record)
+        except Exception as e:
+            logger.error(f"保存历史记录失败: {e}")
     
     def get_current_domain(self) -> Optional[str]:
         """获取当前域名"""
         return self.current_domain
     
-    def get_history(self) -> List[Dict]:
-        """获取历史记录"""
-        return self.history
+    def get_history(self, start: Optional[str] = None, end: Optional[str] = None,
+                    domain: Optional[str] = None, offset: int = 0,
+                    limit: Optional[int] = None) -> Iterator[Dict]:
+        """
+        按时间顺序惰性遍历历史记录
+        
+        Args:
+            start: 起始时间（ISO 格式，包含）
+            end: 结束时间（ISO 格式，不包含）
+            domain: 只返回该域名的记录
+            offset: 跳过的记录数
+            limit: 最多返回的记录数
+            
+        Returns:
+            历史记录迭代器
+        """
+        return self.history_store.query(start, end, domain, offset, limit)
     
     def print_history(self):
         """打印历史记录"""
-        if not self.history:
+        if self.history_store.count() == 0:
             print("暂无历史记录")
             return
         
         print("\n" + "="*80)
         print("域名变化历史记录")
         print("="*80)
-        for i, record in enumerate(self.history, 1):
+        for i, record in enumerate(self.get_history(), 1):
             print(f"\n记录 {i}:")
             print(f"  时间: {record['timestamp']}")
             print(f"  域名: {record['domain']}")
@@ -323,20 +530,26 @@ class DomainMonitor:
         """运行监控"""
         logger.info("开始监控域名变化...")
         logger.info(f"Notion 页面: {self.notion_url}")
-        logger.info(f"检查间隔: {self.check_interval} 秒")
+        logger.info(f"基础检查间隔: {self.check_interval} 秒（稳定时逐步拉长，变化后缩短）")
+        health = self.start_health_check()
         
         try:
             while True:
-                self.check_domain_change()
-                logger.info(f"等待 {self.check_interval} 秒后进行下次检查...")
-                time.sleep(self.check_interval)
+                changed = self.check_domain_change()
+                delay = self.scheduler.next_delay(changed=changed, failed=self.last_check_failed)
+                logger.info(f"等待 {delay:.0f} 秒后进行下次检查...")
+                time.sleep(delay)
         except KeyboardInterrupt:
             logger.info("\n监控已停止")
+            if health:
+                health.stop()
             self.print_history()
 
 
 def main():
     """主函数"""
+    setup_logging(LOG_FILE)
+    
     # Notion 页面 URL
     NOTION_URL = "https://conscious-meerkat-b7e.notion.site/APK-www-firgrouxywebb-com-join-df0b826aa4b840fea1aa4f351529afd1"
     
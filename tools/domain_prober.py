@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+候选域名探测
+并发访问页面中找到的所有候选域名（含 /join/<邀请码> 路径），分别测量 DNS、TCP 连接、
+TLS 握手和首字节时间（TTFB），选出延迟最低的可访问域名，避免把用户重定向到失效或缓慢的镜像。
+TTFB 与最快候选相差不超过容差的候选视为一样快，其中按页面中的出现顺序选择，
+网络抖动不会使选择来回切换，页面上无关的链接也不会因为略快而被选中
+"""
+
+import logging
+import socket
+import ssl
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, Optional
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+# 单个候选的探测超时（秒）
+DEFAULT_PROBE_TIMEOUT = 5.0
+
+# 同时探测的候选数
+DEFAULT_PROBE_WORKERS = 8
+
+# 从页面中最多收集的候选域名数
+MAX_CANDIDATES = 5
+
+# 读取响应头的上限（字节）
+MAX_HEAD_BYTES = 8192
+
+# TTFB 与最快候选相差不超过该值（秒）时视为一样快，按页面顺序选择
+DEFAULT_LATENCY_TOLERANCE = 0.1
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+
+
+class ProbeResult:
+    """单个候选的探测结果（时间均为从开始探测起累计的秒数）"""
+
+    def __init__(self, domain: str, url: str):
+        self.domain = domain
+        self.url = url
+        self.status: Optional[int] = None
+        self.location: Optional[str] = None
+        self.dns: Optional[float] = None
+        self.connect: Optional[float] = None
+        self.tls: Optional[float] = None
+        self.ttfb: Optional[float] = None
+        self.error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        """
+        是否可访问：返回 2xx，或重定向到同一主机（例如 /join/ 页面跳转到带语言前缀的路径）
+
+        重定向到其他主机的候选（停用后转走的域名、页面上无关的短链接等）视为不可用
+        """
+        if self.status is None:
+            return False
+        if 200 <= self.status < 300:
+            return True
+        if 300 <= self.status < 400 and self.location:
+            host = urlparse(self.location).hostname
+            return host is None or host == urlparse(self.url).hostname
+        return False
+
+    def __repr__(self) -> str:
+        if not self.ok:
+            location = f", location={self.location}" if self.location else ""
+            return f"ProbeResult({self.domain}, status={self.status}{location}, error={self.error})"
+        return (f"ProbeResult({self.domain}, status={self.status}, dns={self.dns * 1000:.0f}ms, "
+                f"connect={self.connect * 1000:.0f}ms, tls={(self.tls or self.connect) * 1000:.0f}ms, "
+                f"ttfb={self.ttfb * 1000:.0f}ms)")
+
+
+def probe_url(domain: str, path: str = '/', timeout: float = DEFAULT_PROBE_TIMEOUT) -> ProbeResult:
+    """
+    探测单个候选：解析、连接、（https 时）TLS 握手，发送 GET 并读取状态行
+
+    Args:
+        domain: 基础域名（如 https://www.example.com）
+        path: 请求路径（如 /join/88596413）
+        timeout: 每个阶段的超时（秒）
+
+    Returns:
+        探测结果
+    """
+    url = domain.rstrip('/') + (path if path.startswith('/') else '/' + path)
+    result = ProbeResult(domain, url)
+    parsed = urlparse(url)
+    https = parsed.scheme == 'https'
+    host = parsed.hostname
+    port = parsed.port or (443 if https else 80)
+    target = parsed.path or '/'
+    if parsed.query:
+        target += '?' + parsed.query
+
+    sock = None
+    started = time.perf_counter()
+    try:
+        family, socktype, proto, _, sockaddr = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)[0]
+        result.dns = time.perf_counter() - started
+
+        sock = socket.socket(family, socktype, proto)
+        sock.settimeout(timeout)
+        sock.connect(sockaddr)
+        result.connect = time.perf_counter() - started
+
+        if https:
+            sock = ssl.create_default_context().wrap_socket(sock, server_hostname=host)
+            result.tls = time.perf_counter() - started
+
+        request = (f"GET {target} HTTP/1.1\r\nHost: {parsed.netloc}\r\nUser-Agent: {USER_AGENT}\r\n"
+                   f"Accept: */*\r\nConnection: close\r\n\r\n")
+        sock.sendall(request.encode('ascii'))
+
+        head = sock.recv(1024)
+        result.ttfb = time.perf_counter() - started
+        # 读到响应头结束（需要 Location 判断重定向的去向）
+        while b'\r\n\r\n' not in head and len(head) < MAX_HEAD_BYTES:
+            more = sock.recv(1024)
+            if not more:
+                break
+            head += more
+
+        lines = head.split(b'\r\n\r\n', 1)[0].decode('latin-1').split('\r\n')
+        parts = lines[0].split()
+        if len(parts) < 2 or not parts[1].isdigit():
+            result.error = f"无效的响应: {lines[0][:80]!r}"
+        else:
+            result.status = int(parts[1])
+            for line in lines[1:]:
+                name, _, value = line.partition(':')
+                if name.strip().lower() == 'location':
+                    result.location = value.strip()
+                    break
+    except (OSError, ValueError) as e:
+        result.error = str(e) or e.__class__.__name__
+    finally:
+        if sock is not None:
+            sock.close()
+    return result
+
+
+class DomainProber:
+    """并发探测候选域名，选出延迟最低的可访问域名"""
+
+    def __init__(self, path: str = '/', timeout: float = DEFAULT_PROBE_TIMEOUT,
+                 max_workers: int = DEFAULT_PROBE_WORKERS, tolerance: float = DEFAULT_LATENCY_TOLERANCE):
+        """
+        Args:
+            path: 探测路径（如 /join/88596413）
+            timeout: 单个候选的超时（秒）
+            max_workers: 共享线程池大小
+            tolerance: TTFB 容差（秒），与最快候选相差不超过该值的候选按页面顺序选择
+        """
+        self.path = path
+        self.timeout = timeout
+        self.tolerance = tolerance
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='probe')
+
+    def rank(self, candidates: Iterable[str]) -> List[ProbeResult]:
+        """
+        并发探测所有候选并排序：TTFB 与最快候选相差不超过容差的可访问候选排在最前，按候选顺序排列；
+        其余可访问的候选按 TTFB 排列；不可访问的候选按候选顺序排在最后
+
+        Args:
+            candidates: 候选基础域名（按优先级排列）
+
+        Returns:
+            探测结果
+        """
+        candidates = list(dict.fromkeys(candidates))
+        order = {domain: i for i, domain in enumerate(candidates)}
+        results = list(self._executor.map(lambda d: probe_url(d, self.path, self.timeout), candidates))
+
+        fastest = min((r.ttfb for r in results if r.ok), default=None)
+
+        def key(r: ProbeResult):
+            if not r.ok:
+                return 2, float('inf'), order[r.domain]
+            if r.ttfb <= fastest + self.tolerance:
+                return 0, 0.0, order[r.domain]
+            return 1, r.ttfb, order[r.domain]
+
+        results.sort(key=key)
+        for r in results:
+            logger.info(f"候选域名探测: {r}")
+        return results
+
+    def pick(self, candidates: Iterable[str]) -> Optional[str]:
+        """
+        选出延迟最低的可访问候选（容差内一样快时取页面中靠前的）
+
+        Args:
+            candidates: 候选基础域名（按页面中的出现顺序）
+
+        Returns:
+            最佳域名；全部不可访问时返回 None
+        """
+        results = self.rank(candidates)
+        if results and results[0].ok:
+            best = results[0]
+            logger.info(f"选用延迟最低的可访问域名: {best.domain}（TTFB {best.ttfb * 1000:.0f} ms，"
+                        f"容差 {self.tolerance * 1000:.0f} ms）")
+            return best.domain
+        logger.warning("所有候选域名均不可访问")
+        return None
+
+    def close(self):
+        """关闭线程池"""
+        self._executor.shutdown(wait=False)
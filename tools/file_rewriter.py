@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量文件改写
+在线程池中并发替换多个文件中的链接，只改写内容确实变化的文件，
+并通过"临时文件 + 重命名"保证写入的原子性
+"""
+
+import logging
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 默认并发数
+DEFAULT_MAX_WORKERS = 8
+
+
+class RewriteResult:
+    """单个文件的改写结果"""
+
+    def __init__(self, path: Path, exists: bool = True, changed: bool = False,
+                 replacements: int = 0, elapsed: float = 0.0, error: Optional[str] = None,
+                 content: Optional[bytes] = None):
+        """
+        Args:
+            path: 文件路径
+            exists: 文件是否存在
+            changed: 内容是否发生变化（已写入）
+            replacements: 替换次数
+            elapsed: 耗时（秒）
+            error: 错误信息
+            content: 写入后的文件内容（仅 changed 时有值）
+        """
+        self.path = path
+        self.exists = exists
+        self.changed = changed
+        self.replacements = replacements
+        self.elapsed = elapsed
+        self.error = error
+        self.content = content
+
+    def __repr__(self) -> str:
+        return (f"RewriteResult({self.path}, changed={self.changed}, "
+                f"replacements={self.replacements}, elapsed={self.elapsed * 1000:.1f}ms)")
+
+
+def atomic_write_bytes(path: Path, data: bytes):
+    """
+    原子写入文件：写入同目录下的临时文件并 fsync，再重命名覆盖目标文件
+
+    Args:
+        path: 目标文件路径
+        data: 文件内容
+    """
+    path = Path(path)
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=str(path.parent))
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        if path.exists():
+            shutil.copymode(path, tmp_name)
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+
+
+def atomic_write_text(path: Path, text: str, encoding: str = 'utf-8'):
+    """原子写入文本文件"""
+    atomic_write_bytes(path, text.encode(encoding))
+
+
+def rewrite_file(path: Path, replacements: Dict[str, str], encoding: str = 'utf-8') -> RewriteResult:
+    """
+    替换单个文件中的字符串（按字节处理，保留原有换行符）
+
+    Args:
+        path: 文件路径
+        replacements: {旧字符串: 新字符串}
+        encoding: 文件编码
+
+    Returns:
+        改写结果
+    """
+    path = Path(path)
+    started = time.perf_counter()
+    try:
+        if not path.exists():
+            return RewriteResult(path, exists=False, elapsed=time.perf_counter() - started)
+
+        content = path.read_bytes()
+        new_content = content
+        count = 0
+        for old, new in replacements.items():
+            old_bytes = old.encode(encoding)
+            occurrences = new_content.count(old_bytes)
+            if occurrences:
+                count += occurrences
+                new_content = new_content.replace(old_bytes, new.encode(encoding))
+
+        changed = new_content != content
+        if changed:
+            atomic_write_bytes(path, new_content)
+        return RewriteResult(path, changed=changed, replacements=count,
+                             elapsed=time.perf_counter() - started,
+                             content=new_content if changed else None)
+    except Exception as e:
+        return RewriteResult(path, elapsed=time.perf_counter() - started, error=str(e))
+
+
+def rewrite_files(paths: Iterable[Path], replacements: Dict[str, str],
+                  max_workers: int = DEFAULT_MAX_WORKERS) -> List[RewriteResult]:
+    """
+    并发改写多个文件
+
+    Args:
+        paths: 文件路径列表
+        replacements: {旧字符串: 新字符串}
+        max_workers: 线程池大小
+
+    Returns:
+        与 paths 顺序一致的改写结果
+    """
+    paths = list(paths)
+    if not paths:
+        return []
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(paths)), thread_name_prefix='rewrite') as executor:
+        return list(executor.map(lambda p: rewrite_file(p, replacements), paths))
+
+
+def splice_file(path: Path, old: str, new: str, offsets: List[int],
+                encoding: str = 'utf-8') -> RewriteResult:
+    """
+    按已知的字节偏移替换文件中的字符串；偏移与内容不符时退回全文替换
+
+    Args:
+        path: 文件路径
+        old: 旧字符串
+        new: 新字符串
+        offsets: old 在文件中的字节偏移（升序）
+        encoding: 文件编码
+
+    Returns:
+        改写结果
+    """
+    path = Path(path)
+    started = time.perf_counter()
+    try:
+        content = path.read_bytes()
+        old_bytes, new_bytes = old.encode(encoding), new.encode(encoding)
+
+        if not all(content.startswith(old_bytes, pos) for pos in offsets):
+            logger.warning(f"链接偏移已过期，改为全文替换: {path}")
+            return rewrite_file(path, {old: new}, encoding)
+
+        parts, last = [], 0
+        for pos in offsets:
+            parts.append(content[last:pos])
+            parts.append(new_bytes)
+            last = pos + len(old_bytes)
+        parts.append(content[last:])
+        new_content = b''.join(parts)
+
+        changed = new_content != content
+        if changed:
+            atomic_write_bytes(path, new_content)
+        return RewriteResult(path, changed=changed, replacements=len(offsets),
+                             elapsed=time.perf_counter() - started,
+                             content=new_content if changed else None)
+    except FileNotFoundError:
+        return RewriteResult(path, exists=False, elapsed=time.perf_counter() - started)
+    except Exception as e:
+        return RewriteResult(path, elapsed=time.perf_counter() - started, error=str(e))
+
+
+def splice_files(targets: Dict[Path, List[int]], old: str, new: str,
+                 max_workers: int = DEFAULT_MAX_WORKERS) -> List[RewriteResult]:
+    """
+    并发按偏移改写多个文件
+
+    Args:
+        targets: {文件路径: old 的字节偏移列表}
+        old: 旧字符串
+        new: 新字符串
+        max_workers: 线程池大小
+
+    Returns:
+        改写结果
+    """
+    if not targets:
+        return []
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(targets)), thread_name_prefix='rewrite') as executor:
+        return list(executor.map(lambda item: splice_file(item[0], old, new, item[1]), targets.items()))
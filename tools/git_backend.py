@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+git 提交后端
+porcelain: git add + git commit（会刷新整个索引，耗时随仓库规模增长）
+plumbing:  直接用 hash-object / ls-tree + mktree / commit-tree / update-ref 从文件内容构建提交，
+           只读取变化路径上的目录，不扫描工作区，最后用 update-index --index-info 同步索引条目
+
+python3 git_backend.py benchmark [文件数] 在合成的大仓库上比较两种后端
+"""
+
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 可选的后端名称
+BACKENDS = ('porcelain', 'plumbing')
+
+
+class GitError(Exception):
+    """git 命令执行失败"""
+
+
+class GitBackend(ABC):
+    """git 提交后端基类"""
+
+    def __init__(self, repo_path: Path):
+        """
+        Args:
+            repo_path: 仓库根目录
+        """
+        self.repo_path = Path(repo_path)
+
+    def _git(self, *args: str, input: Optional[bytes] = None,
+             check: bool = True) -> subprocess.CompletedProcess:
+        result = subprocess.run(['git'] + list(args), cwd=self.repo_path, input=input,
+                                capture_output=True)
+        if check and result.returncode != 0:
+            raise GitError(f"git {args[0]} 失败: {result.stderr.decode('utf-8', 'replace').strip()}")
+        return result
+
+    @abstractmethod
+    def commit(self, message: str, files: Iterable[Path],
+               contents: Optional[Dict[Path, bytes]] = None) -> Optional[str]:
+        """
+        提交文件
+
+        Args:
+            message: 提交信息
+            files: 需要提交的文件
+            contents: 已知的文件内容 {路径: 内容}（可选，缺省时从磁盘读取）
+
+        Returns:
+            新提交的哈希，没有需要提交的更改时返回 None
+        """
+
+    def push(self) -> bool:
+        """
+        推送到远程仓库
+
+        Returns:
+            是否成功
+        """
+        result = self._git('push', check=False)
+        if result.returncode != 0:
+            logger.error(f"git push 失败: {result.stderr.decode('utf-8', 'replace')}")
+            return False
+        return True
+
+
+class PorcelainBackend(GitBackend):
+    """git add + git commit"""
+
+    def commit(self, message: str, files: Iterable[Path],
+               contents: Optional[Dict[Path, bytes]] = None) -> Optional[str]:
+        self._git('add', *[str(f) for f in files])
+        result = self._git('commit', '-m', message, check=False)
+        if result.returncode != 0:
+            if b'nothing to commit' in result.stdout + result.stderr:
+                return None
+            raise GitError(f"git commit 失败: {result.stderr.decode('utf-8', 'replace').strip()}")
+        return self._git('rev-parse', 'HEAD').stdout.decode().strip()
+
+
+class PlumbingBackend(GitBackend):
+    """
+    用底层命令构建提交
+
+    不扫描工作区，也不会运行 pre-commit 等钩子
+    """
+
+    def _relative(self, files: Iterable[Path]) -> Dict[str, Path]:
+        """把文件路径转换为仓库内的相对路径，跳过仓库外和被忽略的文件"""
+        root = self.repo_path.resolve()
+        relative: Dict[str, Path] = {}
+        for path in files:
+            try:
+                rel = Path(path).resolve().relative_to(root).as_posix()
+            except ValueError:
+                logger.warning(f"文件不在仓库内，跳过: {path}")
+                continue
+            relative[rel] = Path(path)
+
+        if relative:
+            ignored = self._git('check-ignore', '--stdin', '--no-index',
+                                input='\n'.join(relative).encode('utf-8'), check=False)
+            for rel in ignored.stdout.decode('utf-8').splitlines():
+                logger.warning(f"文件被 .gitignore 忽略，跳过: {rel}")
+                relative.pop(rel, None)
+        return relative
+
+    def _write_tree(self, base: Optional[str], blobs: Dict[str, str], modes: Dict[str, str],
+                    prefix: str = '') -> str:
+        """
+        在 base 树的基础上替换 blobs 中的文件，逐层写出新的树对象
+
+        只读取变化路径上的目录（ls-tree / mktree），与仓库文件总数无关
+
+        Args:
+            base: 原有树对象（目录不存在时为 None）
+            blobs: {相对于当前目录的路径: blob 哈希}
+            modes: 输出参数，{仓库内相对路径: 文件模式}
+            prefix: 当前目录在仓库内的路径
+
+        Returns:
+            新的树对象哈希
+        """
+        entries: Dict[str, List[str]] = {}
+        if base:
+            listing = self._git('ls-tree', '-z', base).stdout.decode('utf-8')
+            for item in filter(None, listing.split('\0')):
+                meta, _, name = item.partition('\t')
+                entries[name] = meta.split()
+
+        subdirs: Dict[str, Dict[str, str]] = {}
+        for path, blob in blobs.items():
+            head, sep, rest = path.partition('/')
+            if sep:
+                subdirs.setdefault(head, {})[rest] = blob
+                continue
+            existing = entries.get(head)
+            if existing and existing[1] == 'blob':
+                mode = existing[0]
+            else:
+                mode = '100755' if os.access(self.repo_path / prefix / head, os.X_OK) else '100644'
+            modes[prefix + head] = mode
+            entries[head] = [mode, 'blob', blob]
+
+        for name, sub in subdirs.items():
+            existing = entries.get(name)
+            subtree = existing[2] if existing and existing[1] == 'tree' else None
+            entries[name] = ['040000', 'tree', self._write_tree(subtree, sub, modes, f'{prefix}{name}/')]
+
+        # mktree 会自行排序，无需预先排序
+        listing = ''.join(f'{mode} {kind} {sha}\t{name}\0' for name, (mode, kind, sha) in entries.items())
+        return self._git('mktree', '-z', input=listing.encode('utf-8')).stdout.decode().strip()
+
+    def commit(self, message: str, files: Iterable[Path],
+               contents: Optional[Dict[Path, bytes]] = None) -> Optional[str]:
+        contents = contents or {}
+        relative = self._relative(files)
+
+        blobs: Dict[str, str] = {}
+        for rel, path in relative.items():
+            data = contents.get(path)
+            if data is None:
+                try:
+                    data = path.read_bytes()
+                except FileNotFoundError:
+                    logger.warning(f"文件不存在，跳过: {path}")
+                    continue
+            # --path 使 .gitattributes 中的换行符等过滤规则与 git add 一致
+            blobs[rel] = self._git('hash-object', '-w', '--stdin', f'--path={rel}', input=data).stdout.decode().strip()
+        if not blobs:
+            return None
+
+        head = self._git('rev-parse', '--verify', '-q', 'HEAD', check=False).stdout.decode().strip()
+        base = self._git('rev-parse', f'{head}^{{tree}}').stdout.decode().strip() if head else None
+        modes: Dict[str, str] = {}
+        tree = self._write_tree(base, blobs, modes)
+        if tree == base:
+            return None
+
+        parents = ['-p', head] if head else []
+        commit = self._git('commit-tree', tree, *parents, input=message.encode('utf-8')).stdout.decode().strip()
+        # 带旧值的 update-ref：HEAD 在此期间被其他进程移动时失败，而不是覆盖他人的提交
+        self._git('update-ref', '-m', f'commit: {message.splitlines()[0]}', 'HEAD', commit, head or '0' * 40)
+
+        # 同步索引中这几个条目（只写一次索引，不扫描工作区），避免 git status 显示反向的暂存更改
+        index_info = ''.join(f'{modes[rel]} {blob}\t{rel}\n' for rel, blob in blobs.items())
+        self._git('update-index', '--add', '--index-info', input=index_info.encode('utf-8'))
+        return commit
+
+
+def create_backend(name: str, repo_path: Path) -> GitBackend:
+    """
+    根据名称创建后端
+
+    Args:
+        name: 'porcelain' 或 'plumbing'
+        repo_path: 仓库根目录
+
+    Returns:
+        git 提交后端
+    """
+    if name == 'plumbing':
+        return PlumbingBackend(repo_path)
+    if name == 'porcelain':
+        return PorcelainBackend(repo_path)
+    raise ValueError(f"未知的 git 后端: {name}（可选: {', '.join(BACKENDS)}）")
+
+
+def benchmark(num_files: int = 20000, rounds: int = 5):
+    """
+    在合成仓库上比较两种后端的提交耗时
+
+    Args:
+        num_files: 仓库中被跟踪的文件数
+        rounds: 每种后端提交的次数
+    """
+    workdir = Path(tempfile.mkdtemp(prefix='git-bench-'))
+    try:
+        repo = workdir / 'repo'
+        pages = repo / 'src' / 'app'
+        pages.mkdir(parents=True)
+        for i in range(num_files):
+            sub = repo / 'src' / 'components' / f'c{i // 500}'
+            sub.mkdir(parents=True, exist_ok=True)
+            (sub / f'component_{i}.tsx').write_text(f'export const C{i} = () => null;\n')
+        targets = [pages / 'page.tsx', pages / 'okx' / 'page.tsx']
+        targets[1].parent.mkdir()
+        for path in targets:
+            path.write_text('<a href="https://www.example.com/join/0">join</a>\n')
+
+        backend = PorcelainBackend(repo)
+        backend._git('init', '-q')
+        backend._git('config', 'user.email', 'bench@example.com')
+        backend._git('config', 'user.name', 'bench')
+        backend._git('add', '-A')
+        backend._git('commit', '-q', '-m', 'init')
+
+        print(f"合成仓库: {num_files + len(targets)} 个文件，每种后端提交 {rounds} 次")
+        for name in BACKENDS:
+            backend = create_backend(name, repo)
+            elapsed = []
+            for r in range(rounds):
+                link = f'https://www.{name}{r}.com/join/0'
+                contents = {}
+                for path in targets:
+                    data = f'<a href="{link}">join</a>\n'.encode('utf-8')
+                    path.write_bytes(data)
+                    contents[path] = data
+                started = time.perf_counter()
+                backend.commit(f'chore: 自动更新注册链接为 {link}', targets, contents)
+                elapsed.append(time.perf_counter() - started)
+            elapsed.sort()
+            print(f"{name:10s} 中位数 {elapsed[len(elapsed) // 2] * 1000:8.1f} ms  "
+                  f"最慢 {elapsed[-1] * 1000:8.1f} ms")
+
+        status = PorcelainBackend(repo)._git('status', '--porcelain').stdout.decode().strip()
+        print("工作区状态: " + ("干净" if not status else status))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main():
+    """命令行: python3 git_backend.py benchmark [文件数]"""
+    if len(sys.argv) < 2 or sys.argv[1] != 'benchmark':
+        print("用法: python3 git_backend.py benchmark [文件数]")
+        sys.exit(1)
+    benchmark(int(sys.argv[2]) if len(sys.argv) > 2 else 20000)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+后台 git 提交队列
+在静默窗口内合并多次链接变化为一次提交，并在后台线程中带重试地推送，
+检测循环不会因 git push 的网络 I/O 而阻塞
+"""
+
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 默认静默窗口（秒）：最后一次变化后等待这么久没有新变化才提交
+DEFAULT_QUIET_WINDOW = 60
+
+# 推送重试
+DEFAULT_PUSH_RETRIES = 5
+DEFAULT_RETRY_BACKOFF = 10
+
+
+class CommitQueue:
+    """合并提交、异步推送的 git 队列"""
+
+    def __init__(self, commit_fn: Callable[[str, List[Path]], bool], push_fn: Callable[[], bool],
+                 quiet_window: float = DEFAULT_QUIET_WINDOW,
+                 push_retries: int = DEFAULT_PUSH_RETRIES,
+                 retry_backoff: float = DEFAULT_RETRY_BACKOFF):
+        """
+        初始化队列
+
+        Args:
+            commit_fn: 提交函数 commit_fn(最新链接, 额外文件) -> 是否成功
+            push_fn: 推送函数 push_fn() -> 是否成功
+            quiet_window: 静默窗口（秒）
+            push_retries: 推送失败后的最大重试次数
+            retry_backoff: 重试退避基数（秒），第 n 次重试等待 retry_backoff * 2^(n-1)
+        """
+        self.commit_fn = commit_fn
+        self.push_fn = push_fn
+        self.quiet_window = quiet_window
+        self.push_retries = push_retries
+        self.retry_backoff = retry_backoff
+
+        self._cond = threading.Condition()
+        self._pending_link: Optional[str] = None
+        self._pending_files: List[Path] = []
+        self._pending_count = 0
+        self._deadline = 0.0
+        self._push_pending = False
+        self._busy = False
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """启动后台线程"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._worker, name='git-commit-queue', daemon=True)
+            self._thread.start()
+
+    def submit(self, new_link: str, files: Optional[List[Path]] = None):
+        """
+        提交一次链接变化（立即返回）
+
+        Args:
+            new_link: 最新链接（用于提交信息）
+            files: 除配置文件列表外需要一并提交的文件（可选）
+        """
+        with self._cond:
+            self._pending_link = new_link
+            for f in files or []:
+                if f not in self._pending_files:
+                    self._pending_files.append(f)
+            self._pending_count += 1
+            self._deadline = time.monotonic() + self.quiet_window
+            self._cond.notify_all()
+        logger.info(f"已加入提交队列，{self.quiet_window:g} 秒内无新变化后提交")
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        立即提交并推送队列中的变化，等待完成
+
+        Args:
+            timeout: 最长等待时间（秒）
+
+        Returns:
+            队列是否已清空
+        """
+        end = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            self._deadline = 0.0
+            self._cond.notify_all()
+            while self._pending_link or self._push_pending or self._busy:
+                remaining = None if end is None else end - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def stop(self, timeout: Optional[float] = None):
+        """清空队列后停止后台线程"""
+        self.flush(timeout)
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                # 等待静默窗口结束
+                while not self._stopping:
+                    if self._pending_link or self._push_pending:
+                        wait = self._deadline - time.monotonic()
+                        if wait <= 0:
+                            break
+                        self._cond.wait(wait)
+                    else:
+                        self._cond.wait()
+                if self._stopping:
+                    return
+
+                link, files, count = self._pending_link, self._pending_files, self._pending_count
+                self._pending_link, self._pending_files, self._pending_count = None, [], 0
+                self._busy = True
+
+            try:
+                self._process(link, files, count)
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+    def _process(self, link: Optional[str], files: List[Path], count: int):
+        """执行一次合并提交与推送"""
+        if link:
+            if count > 1:
+                logger.info(f"合并 {count} 次链接变化为一次提交")
+            if not self.commit_fn(link, files):
+                logger.error("提交失败，等待下一次变化后重试")
+                return
+            self._push_pending = True
+
+        for attempt in range(self.push_retries + 1):
+            if self.push_fn():
+                self._push_pending = False
+                return
+            if attempt < self.push_retries:
+                delay = self.retry_backoff * (2 ** attempt)
+                logger.warning(f"git push 失败，{delay:g} 秒后重试（{attempt + 1}/{self.push_retries}）")
+                with self._cond:
+                    # 有新变化或被要求停止时提前结束等待
+                    self._cond.wait_for(lambda: self._stopping or self._pending_link is not None, delay)
+                    if self._stopping or self._pending_link is not None:
+                        return
+
+        # 本地提交已保留，下一次提交后的推送会一并推送
+        logger.error("git push 多次重试仍失败，将在下一次变化时再次推送")
+        self._push_pending = False
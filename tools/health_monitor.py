@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+重定向目标健康检查
+后台定期探测当前 301 目标以及历史记录中最近的域名，在内存中保存滚动的可用率和延迟百分位；
+目标连续失败或明显变慢时，通过 CloudflareUpdater.update_redirect_rule 切换到最佳的备用域名，
+原域名恢复后再切回
+"""
+
+import logging
+import threading
+from collections import deque
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlparse
+
+from domain_prober import DomainProber
+from history_store import HistoryStore
+from monitor_state import MonitorState
+
+logger = logging.getLogger(__name__)
+
+# 默认探测间隔（秒）
+DEFAULT_HEALTH_INTERVAL = 60
+
+# 每个域名保留的样本数
+DEFAULT_WINDOW = 20
+
+# 计算百分位和可用率前至少需要的样本数
+MIN_SAMPLES = 5
+
+# 参与探测的最近历史域名数
+MAX_ALTERNATIVES = 5
+
+# 查找最近历史域名时读取的记录数
+HISTORY_LOOKBACK = 50
+
+
+def base_domain(url: str) -> Optional[str]:
+    """URL 的 scheme://host 部分（历史记录中既有基础域名也有完整的重定向 URL）"""
+    parsed = urlparse(url if '://' in url else f'https://{url}')
+    return f"{parsed.scheme}://{parsed.netloc}" if parsed.netloc else None
+
+
+class RollingStats:
+    """单个域名最近若干次探测的滚动统计"""
+
+    def __init__(self, window: int = DEFAULT_WINDOW):
+        self.samples: deque = deque(maxlen=window)
+        self.consecutive_failures = 0
+        self.consecutive_successes = 0
+
+    def add(self, ok: bool, latency: Optional[float]):
+        """记录一次探测结果"""
+        self.samples.append((ok, latency))
+        if ok:
+            self.consecutive_successes += 1
+            self.consecutive_failures = 0
+        else:
+            self.consecutive_failures += 1
+            self.consecutive_successes = 0
+
+    @property
+    def availability(self) -> float:
+        """可用率（0~1）"""
+        if not self.samples:
+            return 0.0
+        return sum(1 for ok, _ in self.samples if ok) / len(self.samples)
+
+    def percentile(self, p: float) -> Optional[float]:
+        """
+        成功探测的 TTFB 百分位（秒）
+
+        Args:
+            p: 百分位（0~100）
+        """
+        latencies = sorted(latency for ok, latency in self.samples if ok)
+        if not latencies:
+            return None
+        index = min(len(latencies) - 1, int(round(p / 100 * (len(latencies) - 1))))
+        return latencies[index]
+
+    def __repr__(self) -> str:
+        p50, p90 = self.percentile(50), self.percentile(90)
+        fmt = lambda v: f"{v * 1000:.0f}ms" if v is not None else "-"
+        return (f"可用率 {self.availability:.0%}，p50 {fmt(p50)}，p90 {fmt(p90)}，"
+                f"连续失败 {self.consecutive_failures} 次（{len(self.samples)} 个样本）")
+
+
+class HealthMonitor:
+    """重定向目标的后台健康检查与自动切换"""
+
+    def __init__(self, updater, rule_id: str, primary: Callable[[], Optional[str]],
+                 history_store: HistoryStore, state: MonitorState, redirect_suffix: str,
+                 interval: float = DEFAULT_HEALTH_INTERVAL, window: int = DEFAULT_WINDOW,
+                 max_failures: int = 3, max_p90: float = 3.0, min_availability: float = 0.5,
+                 failback_after: int = 5, on_switch: Optional[Callable[[str, str], None]] = None):
+        """
+        Args:
+            updater: CloudflareUpdater 实例
+            rule_id: 重定向规则 ID
+            primary: 返回当前官方基础域名（来自 Notion）的函数
+            history_store: 域名历史记录（用于挑选备用域名）
+            state: 状态快照（记录当前目标与是否处于切换状态）
+            redirect_suffix: 重定向路径（如 /join/88596413），同时作为探测路径
+            interval: 探测间隔（秒）
+            window: 每个域名保留的样本数
+            max_failures: 连续失败达到该次数视为异常
+            max_p90: TTFB p90 超过该值（秒）视为异常
+            min_availability: 可用率低于该值视为异常
+            failback_after: 切换后，官方域名连续成功该次数时切回
+            on_switch: 切换后的回调 on_switch(新目标 URL, 原因)
+        """
+        self.updater = updater
+        self.rule_id = rule_id
+        self.primary = primary
+        self.history_store = history_store
+        self.state = state
+        self.redirect_suffix = redirect_suffix
+        self.interval = interval
+        self.window = window
+        self.max_failures = max_failures
+        self.max_p90 = max_p90
+        self.min_availability = min_availability
+        self.failback_after = failback_after
+        self.on_switch = on_switch
+
+        self.prober = DomainProber(redirect_suffix)
+        self.stats: Dict[str, RollingStats] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_config(cls, updater, config: Dict, primary: Callable[[], Optional[str]],
+                    history_store: HistoryStore, state: MonitorState,
+                    on_switch: Optional[Callable[[str, str], None]] = None) -> 'HealthMonitor':
+        """
+        根据 Cloudflare 配置创建（health_check 字段中的参数覆盖默认值）
+
+        Args:
+            updater: CloudflareUpdater 实例
+            config: cloudflare_config.json 的内容
+            primary: 返回当前官方基础域名的函数
+            history_store: 域名历史记录
+            state: 状态快照
+            on_switch: 切换后的回调
+        """
+        options = {k: v for k, v in config.get("health_check", {}).items() if k != "enabled"}
+        return cls(updater, config["rule_id"], primary, history_store, state,
+                   config.get("redirect_suffix", "/join/88596413"), on_switch=on_switch, **options)
+
+    def start(self):
+        """启动后台线程"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='health-monitor', daemon=True)
+            self._thread.start()
+            logger.info(f"重定向目标健康检查已启动，每 {self.interval:g} 秒探测一次")
+
+    def stop(self):
+        """停止后台线程"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(self.prober.timeout + 1)
+        self.prober.close()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                logger.error(f"健康检查失败: {e}")
+
+    def _stats(self, domain: str) -> RollingStats:
+        stats = self.stats.get(domain)
+        if stats is None:
+            stats = self.stats[domain] = RollingStats(self.window)
+        return stats
+
+    def degraded(self, domain: str) -> bool:
+        """域名是否处于异常状态"""
+        stats = self._stats(domain)
+        if stats.consecutive_failures >= self.max_failures:
+            return True
+        if len(stats.samples) < MIN_SAMPLES:
+            return False
+        p90 = stats.percentile(90)
+        return stats.availability < self.min_availability or (p90 is not None and p90 > self.max_p90)
+
+    def _alternatives(self, exclude: List[str]) -> List[str]:
+        """历史记录中最近出现过的其他域名（新的在前）"""
+        total = self.history_store.count()
+        records = list(self.history_store.query(offset=max(0, total - HISTORY_LOOKBACK)))
+        alternatives: List[str] = []
+        for record in reversed(records):
+            domain = base_domain(record.get('domain', ''))
+            if domain and domain not in exclude and domain not in alternatives:
+                alternatives.append(domain)
+            if len(alternatives) >= MAX_ALTERNATIVES:
+                break
+        return alternatives
+
+    def _best(self, candidates: List[str]) -> Optional[str]:
+        """最近一次探测成功、未处于异常状态且 p50 最低的域名"""
+        healthy = [d for d in candidates
+                   if self._stats(d).consecutive_successes > 0 and not self.degraded(d)]
+        return min(healthy, key=lambda d: self._stats(d).percentile(50), default=None)
+
+    def check(self):
+        """执行一轮探测，必要时切换重定向目标"""
+        primary = self.primary()
+        if not primary:
+            return
+        primary = base_domain(primary)
+        failover = self.state.get('failover_target')
+        active = failover or primary
+
+        alternatives = self._alternatives([primary])
+        for result in self.prober.rank([primary] + alternatives):
+            self._stats(result.domain).add(result.ok, result.ttfb)
+
+        # 只保留仍在探测范围内的域名的统计
+        for domain in list(self.stats):
+            if domain != primary and domain not in alternatives:
+                del self.stats[domain]
+
+        logger.info(f"当前目标 {active}: {self._stats(active)}")
+
+        if failover:
+            if self._stats(primary).consecutive_successes >= self.failback_after and not self.degraded(primary):
+                self._switch(primary, primary, f"官方域名 {primary} 已恢复")
+            elif self.degraded(failover):
+                target = self._best([primary] + [d for d in alternatives if d != failover])
+                if target:
+                    self._switch(target, primary, f"备用域名 {failover} 异常")
+        elif self.degraded(primary):
+            target = self._best(alternatives)
+            if target:
+                self._switch(target, primary, f"官方域名 {primary} 异常（{self._stats(primary)}）")
+            else:
+                logger.warning(f"官方域名 {primary} 异常，但没有可用的备用域名")
+
+    def _switch(self, domain: str, primary: str, reason: str):
+        """把重定向目标切换到 domain"""
+        target_url = domain.rstrip('/') + self.redirect_suffix
+        logger.warning(f"⚠️ {reason}，切换重定向目标到 {target_url}")
+        result = self.updater.update_redirect_rule(self.rule_id, target_url)
+        self.state.update(cloudflare_target=target_url, ruleset_version=result.get('version'),
+                          failover_target=None if domain == primary else domain)
+        if self.on_switch:
+            self.on_switch(target_url, reason)
@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+域名历史记录存储
+提供只追加的 JSONL 与 SQLite 两种后端，支持按时间范围和域名的索引查询、轮转与压缩
+"""
+
+import bisect
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# JSONL 文件超过该大小时自动轮转（字节）
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+
+# SQLite 查询每次从游标读取的行数
+QUERY_PAGE_SIZE = 100
+
+
+class HistoryStore(ABC):
+    """历史记录存储接口（记录格式: {'timestamp', 'domain', 'change_type'}）"""
+
+    @abstractmethod
+    def append(self, record: Dict):
+        """追加一条记录"""
+
+    @abstractmethod
+    def query(self, start: Optional[str] = None, end: Optional[str] = None,
+              domain: Optional[str] = None, offset: int = 0,
+              limit: Optional[int] = None) -> Iterator[Dict]:
+        """
+        按时间顺序惰性遍历记录
+
+        Args:
+            start: 起始时间（ISO 格式，包含）
+            end: 结束时间（ISO 格式，不包含）
+            domain: 只返回该域名的记录
+            offset: 跳过的记录数
+            limit: 最多返回的记录数
+
+        Yields:
+            历史记录
+        """
+
+    @abstractmethod
+    def count(self) -> int:
+        """记录总数"""
+
+    @abstractmethod
+    def domains(self) -> List[str]:
+        """出现过的所有域名（按首次出现顺序）"""
+
+    @abstractmethod
+    def compact(self, keep_last: Optional[int] = None, before: Optional[str] = None):
+        """
+        压缩存储，删除旧记录
+
+        Args:
+            keep_last: 只保留最近的 N 条记录
+            before: 删除该时间（ISO 格式）之前的记录
+        """
+
+    def close(self):
+        """关闭存储"""
+
+
+class JsonlHistoryStore(HistoryStore):
+    """
+    只追加的 JSONL 存储，内存中只保存时间戳、域名到（文件, 偏移）的索引
+
+    轮转后的归档文件 <name>.<时间>.jsonl 仍然计入索引，查询和域名列表覆盖全部历史
+    """
+
+    def __init__(self, path: Path, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        初始化存储
+
+        Args:
+            path: JSONL 文件路径
+            max_bytes: 超过该大小时自动轮转（0 表示不轮转）
+        """
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # 归档文件（从旧到新）+ 当前文件，索引中的文件序号指向这里
+        self._files: List[Path] = []
+        # 按追加顺序排列的时间戳与 (文件序号, 偏移)；时间戳单调递增，可直接二分查找
+        self._timestamps: List[str] = []
+        self._offsets: List[Tuple[int, int]] = []
+        # 域名 -> 记录序号列表
+        self._by_domain: Dict[str, List[int]] = {}
+        self._build_index()
+
+    def _archives(self) -> List[Path]:
+        """按时间顺序排列的归档文件"""
+        pattern = re.compile(re.escape(self.path.stem) + r'\.(\d{14})(?:\.(\d+))?'
+                             + re.escape(self.path.suffix) + '$')
+        archives = []
+        for candidate in self.path.parent.glob(f"{self.path.stem}.*{self.path.suffix}"):
+            match = pattern.match(candidate.name)
+            if match:
+                archives.append((match.group(1), int(match.group(2) or 0), candidate))
+        return [path for _, _, path in sorted(archives)]
+
+    def _build_index(self):
+        """扫描归档文件与当前文件建立索引"""
+        self._files = self._archives() + [self.path]
+        self._timestamps, self._offsets, self._by_domain = [], [], {}
+        for file_no, path in enumerate(self._files):
+            if not path.exists():
+                continue
+            with open(path, 'rb') as f:
+                offset = 0
+                for line in f:
+                    if line.strip():
+                        try:
+                            self._index_record(json.loads(line), file_no, offset)
+                        except ValueError:
+                            logger.warning(f"跳过损坏的历史记录行（{path.name} 偏移 {offset}）")
+                    offset += len(line)
+
+    def _index_record(self, record: Dict, file_no: int, offset: int):
+        self._by_domain.setdefault(record['domain'], []).append(len(self._offsets))
+        self._timestamps.append(record['timestamp'])
+        self._offsets.append((file_no, offset))
+
+    def append(self, record: Dict):
+        line = (json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8')
+        with self._lock:
+            if self.max_bytes and self.path.exists() and self.path.stat().st_size + len(line) > self.max_bytes:
+                self._rotate()
+            with open(self.path, 'ab') as f:
+                offset = f.tell()
+                f.write(line)
+            self._index_record(record, len(self._files) - 1, offset)
+
+    def _rotate(self):
+        """将当前文件归档为 <name>.<时间>.jsonl，并重新开始（归档中的记录保留在索引中）"""
+        stamp = datetime.now().strftime('%Y%m%d%H%M%S')
+        archive = self.path.with_name(f"{self.path.stem}.{stamp}{self.path.suffix}")
+        n = 0
+        while archive.exists():
+            n += 1
+            archive = self.path.with_name(f"{self.path.stem}.{stamp}.{n}{self.path.suffix}")
+        os.replace(self.path, archive)
+        # 当前文件的序号改为指向归档文件，新的当前文件排在最后
+        self._files[-1] = archive
+        self._files.append(self.path)
+        logger.info(f"历史记录已轮转: {archive.name}")
+
+    def _select(self, start: Optional[str], end: Optional[str], domain: Optional[str]) -> List[int]:
+        """根据索引选出匹配记录的序号"""
+        lo = bisect.bisect_left(self._timestamps, start) if start else 0
+        hi = bisect.bisect_left(self._timestamps, end) if end else len(self._timestamps)
+        if domain is None:
+            return list(range(lo, hi))
+        positions = self._by_domain.get(domain, [])
+        return positions[bisect.bisect_left(positions, lo):bisect.bisect_left(positions, hi)]
+
+    @staticmethod
+    def _read_lines(files: List[Path], entries: List[Tuple[int, int]]) -> Iterator[bytes]:
+        """按 (文件序号, 偏移) 读取原始行（每个文件只打开一次）"""
+        handles = {}
+        try:
+            for file_no, pos in entries:
+                f = handles.get(file_no)
+                if f is None:
+                    f = handles[file_no] = open(files[file_no], 'rb')
+                f.seek(pos)
+                yield f.readline()
+        finally:
+            for f in handles.values():
+                f.close()
+
+    def query(self, start: Optional[str] = None, end: Optional[str] = None,
+              domain: Optional[str] = None, offset: int = 0,
+              limit: Optional[int] = None) -> Iterator[Dict]:
+        with self._lock:
+            selected = self._select(start, end, domain)
+            entries = [self._offsets[i] for i in selected]
+            files = list(self._files)
+
+        entries = entries[offset:] if limit is None else entries[offset:offset + limit]
+        for line in self._read_lines(files, entries):
+            yield json.loads(line)
+
+    def count(self) -> int:
+        return len(self._offsets)
+
+    def domains(self) -> List[str]:
+        with self._lock:
+            return sorted(self._by_domain, key=lambda d: self._by_domain[d][0])
+
+    def compact(self, keep_last: Optional[int] = None, before: Optional[str] = None):
+        """压缩后保留的记录（包括归档文件中的）写入当前文件，并删除归档文件"""
+        with self._lock:
+            if not self._offsets and not self.path.exists():
+                return
+            selected = self._select(before, None, None)
+            if keep_last is not None:
+                selected = selected[-keep_last:] if keep_last else []
+
+            # 先写临时文件再替换，避免压缩过程中崩溃导致数据丢失
+            tmp_path = self.path.with_suffix(self.path.suffix + '.tmp')
+            with open(tmp_path, 'wb') as dst:
+                for line in self._read_lines(self._files, [self._offsets[i] for i in selected]):
+                    dst.write(line)
+            os.replace(tmp_path, self.path)
+            for archive in self._files[:-1]:
+                archive.unlink(missing_ok=True)
+            self._build_index()
+        logger.info(f"历史记录已压缩，剩余 {self.count()} 条")
+
+
+class SqliteHistoryStore(HistoryStore):
+    """SQLite 存储，按时间戳和域名建立索引"""
+
+    def __init__(self, path: Path):
+        """
+        初始化存储
+
+        Args:
+            path: 数据库文件路径
+        """
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS history (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp TEXT NOT NULL,
+                domain TEXT NOT NULL,
+                change_type TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_history_timestamp ON history (timestamp);
+            CREATE INDEX IF NOT EXISTS idx_history_domain ON history (domain, timestamp);
+            """
+        )
+
+    def append(self, record: Dict):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO history (timestamp, domain, change_type) VALUES (?, ?, ?)",
+                (record['timestamp'], record['domain'], record['change_type'])
+            )
+
+    @staticmethod
+    def _where(start: Optional[str], end: Optional[str], domain: Optional[str]) -> Tuple[str, list]:
+        clauses, params = [], []
+        if start:
+            clauses.append("timestamp >= ?")
+            params.append(start)
+        if end:
+            clauses.append("timestamp < ?")
+            params.append(end)
+        if domain is not None:
+            clauses.append("domain = ?")
+            params.append(domain)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def query(self, start: Optional[str] = None, end: Optional[str] = None,
+              domain: Optional[str] = None, offset: int = 0,
+              limit: Optional[int] = None) -> Iterator[Dict]:
+        where, params = self._where(start, end, domain)
+        sql = f"SELECT timestamp, domain, change_type FROM history{where} ORDER BY id LIMIT ? OFFSET ?"
+        params += [-1 if limit is None else limit, offset]
+
+        with self._lock:
+            cursor = self._conn.execute(sql, params)
+        while True:
+            with self._lock:
+                rows = cursor.fetchmany(QUERY_PAGE_SIZE)
+            if not rows:
+                break
+            for timestamp, domain_value, change_type in rows:
+                yield {'timestamp': timestamp, 'domain': domain_value, 'change_type': change_type}
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM history").fetchone()[0]
+
+    def domains(self) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute("SELECT domain FROM history GROUP BY domain ORDER BY MIN(id)").fetchall()
+        return [row[0] for row in rows]
+
+    def compact(self, keep_last: Optional[int] = None, before: Optional[str] = None):
+        with self._lock:
+            with self._conn:
+                if before:
+                    self._conn.execute("DELETE FROM history WHERE timestamp < ?", (before,))
+                if keep_last is not None:
+                    self._conn.execute(
+                        "DELETE FROM history WHERE id NOT IN (SELECT id FROM history ORDER BY id DESC LIMIT ?)",
+                        (keep_last,)
+                    )
+            self._conn.execute("VACUUM")
+        logger.info(f"历史记录已压缩，剩余 {self.count()} 条")
+
+    def close(self):
+        self._conn.close()
+
+
+def open_history_store(path: Path, legacy_file: Optional[Path] = None) -> HistoryStore:
+    """
+    打开历史记录存储（.db/.sqlite 使用 SQLite，其余使用 JSONL）
+
+    Args:
+        path: 存储文件路径
+        legacy_file: 旧版 domain_history.json（可选，新存储为空时一次性导入）
+
+    Returns:
+        HistoryStore 实例
+    """
+    path = Path(path)
+    if path.suffix in ('.db', '.sqlite', '.sqlite3'):
+        store: HistoryStore = SqliteHistoryStore(path)
+    else:
+        store = JsonlHistoryStore(path)
+
+    if legacy_file and Path(legacy_file).exists() and store.count() == 0:
+        try:
+            with open(legacy_file, 'r', encoding='utf-8') as f:
+                records = json.load(f)
+            for record in records:
+                store.append(record)
+            logger.info(f"已从 {Path(legacy_file).name} 导入 {len(records)} 条历史记录")
+        except Exception as e:
+            logger.error(f"导入旧版历史记录失败: {e}")
+
+    return store
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+共享 HTTP 传输层
+为 Cloudflare API 等调用提供连接池、keep-alive、分离的连接/读取超时以及带指数退避的重试；
+Notion 轮询可选使用 HTTP/2（需要安装 httpx[http2]），并显式协商 br/gzip 压缩
+"""
+
+import logging
+import threading
+from typing import Dict, Iterable, Iterator, Optional, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+try:
+    import brotli  # noqa: F401  urllib3 / httpx 安装了 brotli 时才能解码 br
+    HAS_BROTLI = True
+except ImportError:
+    try:
+        import brotlicffi  # noqa: F401
+        HAS_BROTLI = True
+    except ImportError:
+        HAS_BROTLI = False
+
+logger = logging.getLogger(__name__)
+
+# 默认参数
+DEFAULT_POOL_SIZE = 10
+DEFAULT_CONNECT_TIMEOUT = 5.0
+DEFAULT_READ_TIMEOUT = 30.0
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF_FACTOR = 0.5
+
+# 需要重试的状态码（限流 + 服务端错误）
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# 允许重试的方法（POST 不是幂等的，重试可能重复创建规则，因此不包含）
+RETRY_METHODS = frozenset(["GET", "HEAD", "PUT", "DELETE", "OPTIONS", "PATCH"])
+
+# 只声明能够解码的压缩格式
+ACCEPT_ENCODING = "br, gzip, deflate" if HAS_BROTLI else "gzip, deflate"
+
+# 提前停止读取时，剩余内容不超过该字节数（压缩后）则读完，使连接可以放回连接池复用
+DEFAULT_DRAIN_LIMIT = 256 * 1024
+
+
+class _StatusRetry(Retry):
+    """只重试 status_forcelist 中的状态码（urllib3 默认对带 Retry-After 的 413/429/503 总是重试）"""
+
+    def is_retry(self, method: str, status_code: int, has_retry_after: bool = False) -> bool:
+        if self.status_forcelist is not None and status_code not in self.status_forcelist:
+            return False
+        return super().is_retry(method, status_code, has_retry_after)
+
+
+class HttpTransport:
+    """基于 requests.Session 的连接池传输"""
+
+    def __init__(self, pool_size: int = DEFAULT_POOL_SIZE,
+                 connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout: float = DEFAULT_READ_TIMEOUT,
+                 max_retries: int = DEFAULT_MAX_RETRIES,
+                 backoff_factor: float = DEFAULT_BACKOFF_FACTOR,
+                 retry_statuses: Iterable[int] = RETRY_STATUS_CODES):
+        """
+        初始化传输
+
+        Args:
+            pool_size: 每个主机的连接池大小
+            connect_timeout: 连接超时（秒）
+            read_timeout: 读取超时（秒）
+            max_retries: 最大重试次数
+            backoff_factor: 指数退避因子（第 n 次重试等待 backoff_factor * 2^(n-1) 秒）
+            retry_statuses: 需要重试的 HTTP 状态码
+        """
+        self.timeout: Tuple[float, float] = (connect_timeout, read_timeout)
+
+        retry = _StatusRetry(
+            total=max_retries,
+            connect=max_retries,
+            read=max_retries,
+            status=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=tuple(retry_statuses),
+            allowed_methods=RETRY_METHODS,
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+            max_retries=retry,
+        )
+
+        self.session = requests.Session()
+        self.session.headers["Accept-Encoding"] = ACCEPT_ENCODING
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        发送请求（未指定 timeout 时使用默认的连接/读取超时）
+
+        Args:
+            method: HTTP 方法
+            url: 请求地址
+            **kwargs: 透传给 requests.Session.request 的参数
+
+        Returns:
+            响应对象
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session.request(method, url, **kwargs)
+
+    @staticmethod
+    def transferred_bytes(response: requests.Response) -> Optional[int]:
+        """流式响应已从网络读取的字节数（压缩后）"""
+        try:
+            return response.raw.tell()
+        except Exception:
+            return None
+
+    def finish(self, response: requests.Response, drain_limit: int = DEFAULT_DRAIN_LIMIT):
+        """
+        结束一个提前停止读取的流式响应
+
+        根据 Content-Length 与已读取的字节数判断剩余内容：不超过 drain_limit 时读完，
+        连接放回连接池供下次轮询复用；剩余内容较多或长度未知（分块传输）时直接关闭连接，不做无用的下载。
+        iter_content 已经通过解码器读取过，urllib3 不允许之后改为不解码读取，因此继续解码读完
+
+        Args:
+            response: 流式响应
+            drain_limit: 允许再读取的最大字节数（压缩后）
+        """
+        try:
+            remaining = int(response.headers["Content-Length"]) - response.raw.tell()
+            if 0 < remaining <= drain_limit:
+                for _ in response.raw.stream(64 * 1024, decode_content=True):
+                    pass
+        except (KeyError, ValueError):
+            pass
+        except Exception as e:
+            logger.debug(f"读完剩余响应失败: {e}")
+        response.close()
+
+    def close(self):
+        """关闭连接池"""
+        self.session.close()
+
+
+class _Http2Response:
+    """把 httpx 响应包装成 DomainMonitor 等调用方使用的 requests 风格接口"""
+
+    def __init__(self, response: 'httpx.Response'):
+        self._response = response
+        self.status_code = response.status_code
+        self.headers = response.headers
+        self.encoding = response.charset_encoding
+        self.http_version = response.http_version
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} Error for url: {self._response.url}", response=self)
+
+    def iter_content(self, chunk_size: Optional[int] = None) -> Iterator[bytes]:
+        try:
+            yield from self._response.iter_bytes(chunk_size)
+        except httpx.HTTPError as e:
+            raise requests.ConnectionError(str(e)) from e
+
+    @property
+    def content(self) -> bytes:
+        return self._response.read()
+
+    def json(self):
+        return self._response.json()
+
+    def close(self):
+        self._response.close()
+
+
+class Http2Transport:
+    """基于 httpx 的 HTTP/2 传输（同一主机的所有请求复用一个连接，提前关闭响应也不会断开连接）"""
+
+    def __init__(self, pool_size: int = DEFAULT_POOL_SIZE,
+                 connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout: float = DEFAULT_READ_TIMEOUT,
+                 max_retries: int = DEFAULT_MAX_RETRIES, **_):
+        """
+        初始化传输（参数与 HttpTransport 相同；httpx 只对连接失败重试）
+
+        Args:
+            pool_size: 最大连接数
+            connect_timeout: 连接超时（秒）
+            read_timeout: 读取超时（秒）
+            max_retries: 连接失败的最大重试次数
+        """
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.client = httpx.Client(
+            http2=True,
+            timeout=self.timeout,
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+            transport=httpx.HTTPTransport(http2=True, retries=max_retries),
+            headers={"Accept-Encoding": ACCEPT_ENCODING},
+        )
+
+    def request(self, method: str, url: str, stream: bool = False, **kwargs) -> _Http2Response:
+        """
+        发送请求
+
+        Args:
+            method: HTTP 方法
+            url: 请求地址
+            stream: 是否流式读取响应
+            **kwargs: headers / json / params / timeout
+
+        Returns:
+            requests 风格的响应对象
+        """
+        request = self.client.build_request(method, url, headers=kwargs.get("headers"), json=kwargs.get("json"),
+                                            params=kwargs.get("params"), timeout=kwargs.get("timeout", self.timeout))
+        try:
+            response = self.client.send(request, stream=stream)
+        except httpx.HTTPError as e:
+            raise requests.ConnectionError(str(e)) from e
+        return _Http2Response(response)
+
+    @staticmethod
+    def transferred_bytes(response: _Http2Response) -> Optional[int]:
+        """已从网络读取的字节数（压缩后）"""
+        return response._response.num_bytes_downloaded
+
+    def finish(self, response: _Http2Response, drain_limit: int = DEFAULT_DRAIN_LIMIT):
+        """结束流式响应（HTTP/2 关闭单个流不影响连接复用，无需读完）"""
+        response.close()
+
+    def close(self):
+        """关闭连接"""
+        self.client.close()
+
+
+def create_transport(options: Optional[Dict] = None) -> Union[HttpTransport, Http2Transport]:
+    """
+    根据参数创建传输：options 中 "http2": true 且已安装 httpx 时使用 HTTP/2，否则使用 requests
+
+    Args:
+        options: 传输参数
+
+    Returns:
+        HttpTransport 或 Http2Transport
+    """
+    options = dict(options or {})
+    if options.pop("http2", False):
+        if httpx is not None:
+            try:
+                return Http2Transport(**options)
+            except ImportError as e:
+                # httpx 已安装但缺少 h2 依赖
+                logger.warning(f"HTTP/2 不可用（{e}），改用 HTTP/1.1")
+        else:
+            logger.warning("未安装 httpx，HTTP/2 不可用，改用 HTTP/1.1（pip install 'httpx[http2]'）")
+    return HttpTransport(**options)
+
+
+_transports: Dict[str, HttpTransport] = {}
+_transports_lock = threading.Lock()
+
+
+def get_transport(name: str = "default", options: Optional[Dict] = None) -> Union[HttpTransport, Http2Transport]:
+    """
+    获取进程内共享的传输实例（按名称复用，首次创建时使用 options）
+
+    Args:
+        name: 传输名称，例如 "cloudflare"
+        options: 传输的构造参数（可选，"http2": true 时使用 HTTP/2）
+
+    Returns:
+        共享的传输
+    """
+    with _transports_lock:
+        transport = _transports.get(name)
+        if transport is None:
+            transport = create_transport(options)
+            _transports[name] = transport
+            logger.debug(f"已创建共享 HTTP 传输: {name}")
+        return transport
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文件 → 链接增量索引
+记录每个文件中出现的链接及其字节偏移，按 mtime/size/inode 判断文件是否变化，
+只重新扫描变化过的文件，并可以即时回答"某个链接在哪些文件中使用"
+"""
+
+import json
+import logging
+import os
+import re
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from file_rewriter import atomic_write_text
+
+logger = logging.getLogger(__name__)
+
+# 索引文件路径
+INDEX_PATH = Path(__file__).parent / 'link_index.json'
+
+# 被索引的链接（http/https URL，遇到引号、空白和括号等结束）
+URL_PATTERN = re.compile(rb'https?://[A-Za-z0-9.-]+(?:/[^\s"\'<>`(){}\[\]]*)?')
+
+# 同时索引嵌在其他 URL 中的链接（例如 ?url=https://... 参数）：在每个 http(s):// 出现的位置都匹配一次
+NESTED_URL_PATTERN = re.compile(b'(?=(' + URL_PATTERN.pattern + b'))')
+
+# 索引格式版本（扫描规则变化时递增，旧索引整体重建）
+INDEX_VERSION = 2
+
+
+def _stat_key(st: os.stat_result) -> List[int]:
+    return [st.st_mtime_ns, st.st_size, st.st_ino]
+
+
+def scan_links(content: bytes) -> Dict[str, List[int]]:
+    """
+    扫描内容中的链接（包括嵌在其他 URL 中的链接，各自从其 http(s):// 处开始记录）
+
+    Args:
+        content: 文件内容
+
+    Returns:
+        {链接: [字节偏移]}
+    """
+    links: Dict[str, List[int]] = {}
+    for match in NESTED_URL_PATTERN.finditer(content):
+        links.setdefault(match.group(1).decode('utf-8', 'replace'), []).append(match.start())
+    return links
+
+
+class LinkIndex:
+    """持久化的文件 → 链接索引"""
+
+    def __init__(self, path: Path = INDEX_PATH):
+        """
+        初始化并加载索引
+
+        Args:
+            path: 索引文件路径
+        """
+        self.path = Path(path)
+        # {文件路径: {"key": [mtime_ns, size, inode], "links": {链接: [偏移]}}}
+        self.files: Dict[str, Dict] = self._load()
+        self._dirty = False
+
+    def _load(self) -> Dict[str, Dict]:
+        if not self.path.exists():
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') != INDEX_VERSION:
+                logger.info("链接索引格式已更新，将重新建立")
+                return {}
+            return data.get('files', {})
+        except Exception as e:
+            logger.warning(f"加载链接索引失败，将重新建立: {e}")
+            return {}
+
+    def refresh(self, paths: Iterable[Path]) -> List[str]:
+        """
+        增量刷新索引：只重新扫描 mtime/size/inode 发生变化的文件
+
+        Args:
+            paths: 需要索引的文件
+
+        Returns:
+            重新扫描过的文件列表
+        """
+        rescanned = []
+        for path in paths:
+            name = str(path)
+            try:
+                st = os.stat(name)
+            except FileNotFoundError:
+                if self.files.pop(name, None) is not None:
+                    self._dirty = True
+                continue
+
+            entry = self.files.get(name)
+            if entry and entry['key'] == _stat_key(st):
+                continue
+
+            with open(name, 'rb') as f:
+                content = f.read()
+            self.files[name] = {'key': _stat_key(st), 'links': scan_links(content)}
+            self._dirty = True
+            rescanned.append(name)
+
+        if rescanned:
+            logger.info(f"链接索引已刷新 {len(rescanned)} 个文件")
+        return rescanned
+
+    def update(self, path: Path, content: bytes):
+        """
+        文件被改写后，根据新内容更新索引（无需再次读取文件）
+
+        Args:
+            path: 文件路径
+            content: 写入的内容
+        """
+        name = str(path)
+        self.files[name] = {'key': _stat_key(os.stat(name)), 'links': scan_links(content)}
+        self._dirty = True
+
+    def where_used(self, link: str) -> Dict[str, List[int]]:
+        """
+        查询链接被哪些文件使用（也匹配以该链接开头的更长 URL，例如带查询参数的链接，
+        以及嵌在其他 URL 参数中的链接），结果与 str.replace 替换的位置一致
+
+        Args:
+            link: 链接
+
+        Returns:
+            {文件路径: [字节偏移]}
+        """
+        length = len(link.encode('utf-8'))
+        usage: Dict[str, List[int]] = {}
+        for name, entry in self.files.items():
+            offsets = []
+            # 与 str.replace 相同，从左到右取互不重叠的出现位置
+            for pos in sorted(pos for url, positions in entry['links'].items()
+                              if url.startswith(link) for pos in positions):
+                if not offsets or pos >= offsets[-1] + length:
+                    offsets.append(pos)
+            if offsets:
+                usage[name] = offsets
+        return usage
+
+    def save(self):
+        """有变化时写回索引文件"""
+        if not self._dirty:
+            return
+        try:
+            atomic_write_text(self.path, json.dumps({'version': INDEX_VERSION, 'files': self.files},
+                                                  ensure_ascii=False))
+            self._dirty = False
+        except Exception as e:
+            logger.error(f"保存链接索引失败: {e}")
+
+
+def main():
+    """命令行查询: python3 link_index.py <链接>"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+
+    if len(sys.argv) != 2:
+        print("用法: python3 link_index.py <链接>")
+        sys.exit(1)
+
+    from link_updater import load_config
+    index = LinkIndex()
+    index.refresh(Path(f) for f in load_config()['files'])
+    index.save()
+
+    usage = index.where_used(sys.argv[1])
+    if not usage:
+        print("没有文件使用该链接")
+    for name, offsets in usage.items():
+        print(f"{name}: {', '.join(str(pos) for pos in offsets)}")
+
+
+if __name__ == "__main__":
+    main()
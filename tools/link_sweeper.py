@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+旧域名链接清扫
+用历史记录中出现过的所有域名构建一个多模式匹配器，扫描整个源码目录，
+一次性把指向旧域名的链接改写为当前域名
+"""
+
+import logging
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from file_rewriter import atomic_write_bytes
+
+logger = logging.getLogger(__name__)
+
+# 不进入的目录
+SKIP_DIRS = frozenset(['node_modules', '.git', '.next', '.vercel', '__pycache__', 'dist', 'build'])
+
+# 按扩展名直接跳过的二进制文件
+BINARY_SUFFIXES = frozenset([
+    '.png', '.jpg', '.jpeg', '.gif', '.webp', '.ico', '.svgz', '.ttf', '.otf', '.woff', '.woff2',
+    '.pdf', '.zip', '.gz', '.br', '.mp4', '.mp3', '.wasm',
+])
+
+# 用于判断是否为二进制文件的前缀长度
+SNIFF_BYTES = 8192
+
+# 文件数低于该值时在当前进程内扫描（进程池启动开销大于收益）
+PROCESS_POOL_THRESHOLD = 500
+
+# 每个进程任务处理的文件数
+BATCH_SIZE = 256
+
+
+def host_of(url: str) -> Optional[str]:
+    """
+    提取不含 www. 前缀的主机名
+
+    Args:
+        url: 完整 URL 或裸域名
+
+    Returns:
+        主机名（小写），无法解析时返回 None
+    """
+    netloc = urlparse(url if '://' in url else f'https://{url}').netloc.lower()
+    if not netloc:
+        return None
+    return netloc[4:] if netloc.startswith('www.') else netloc
+
+
+def build_pattern(hosts: Iterable[str]) -> bytes:
+    """
+    把多个主机名合并为一个匹配模式（可选的 www. 前缀，两侧不能紧邻域名字符）
+
+    长的主机名排在前面，保证 "a.b.com" 优先于 "b.com" 命中；
+    其后的点号只允许出现在句末（"old.com." 命中，"old.com.cn" 不命中）
+
+    Args:
+        hosts: 主机名列表
+
+    Returns:
+        正则表达式（bytes）
+    """
+    alternatives = b'|'.join(re.escape(h.encode('ascii')) for h in sorted(set(hosts), key=len, reverse=True))
+    return rb'(?<![A-Za-z0-9.-])(?:www\.)?(?:' + alternatives + rb')(?![A-Za-z0-9-]|\.[A-Za-z0-9-])'
+
+
+_compiled: Dict[bytes, 're.Pattern'] = {}
+
+
+def _compile(pattern: bytes) -> 're.Pattern':
+    """每个进程只编译一次"""
+    regex = _compiled.get(pattern)
+    if regex is None:
+        regex = _compiled[pattern] = re.compile(pattern, re.IGNORECASE)
+    return regex
+
+
+def is_binary(head: bytes) -> bool:
+    """根据文件开头是否包含 NUL 字节判断是否为二进制文件"""
+    return b'\0' in head
+
+
+def iter_files(root: Path) -> Iterator[str]:
+    """递归遍历目录下需要扫描的文件"""
+    stack = [str(root)]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in SKIP_DIRS:
+                        stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    if os.path.splitext(entry.name)[1].lower() not in BINARY_SUFFIXES:
+                        yield entry.path
+
+
+def _sweep_batch(paths: List[str], pattern: bytes, replacement: bytes,
+                 dry_run: bool) -> Tuple[Dict[str, int], int]:
+    """
+    扫描并改写一批文件（进程池任务）
+
+    Returns:
+        ({文件路径: 替换次数}, 跳过的二进制文件数)
+    """
+    regex = _compile(pattern)
+    matches: Dict[str, int] = {}
+    binary = 0
+    for path in paths:
+        try:
+            with open(path, 'rb') as f:
+                head = f.read(SNIFF_BYTES)
+                if is_binary(head):
+                    binary += 1
+                    continue
+                content = head + f.read()
+        except OSError as e:
+            logger.warning(f"无法读取文件: {path}: {e}")
+            continue
+
+        new_content, count = regex.subn(replacement, content)
+        if count:
+            matches[path] = count
+            if not dry_run:
+                atomic_write_bytes(Path(path), new_content)
+    return matches, binary
+
+
+class SweepResult:
+    """清扫结果"""
+
+    def __init__(self):
+        self.files_scanned = 0
+        self.binary_skipped = 0
+        self.matches: Dict[str, int] = {}
+        self.elapsed = 0.0
+
+    @property
+    def files_changed(self) -> List[Path]:
+        """包含旧域名的文件"""
+        return [Path(p) for p in sorted(self.matches)]
+
+
+def sweep(root: Path, stale_urls: Iterable[str], new_url: str, dry_run: bool = False,
+          max_workers: Optional[int] = None) -> SweepResult:
+    """
+    扫描 root 下所有文本文件，把指向旧域名的链接改写为新域名
+
+    Args:
+        root: 扫描的根目录（例如站点的 src/）
+        stale_urls: 历史域名或链接
+        new_url: 当前链接（只使用其主机名部分，路径保持不变）
+        dry_run: 只统计，不写入
+        max_workers: 进程池大小（默认 CPU 核数）
+
+    Returns:
+        清扫结果
+    """
+    result = SweepResult()
+    started = time.perf_counter()
+
+    new_netloc = urlparse(new_url).netloc
+    current_host = host_of(new_url)
+    hosts = {h for h in (host_of(u) for u in stale_urls) if h and h != current_host}
+    if not hosts:
+        logger.info("没有需要清扫的旧域名")
+        return result
+
+    pattern = build_pattern(hosts)
+    replacement = new_netloc.encode('ascii')
+    paths = list(iter_files(root))
+    result.files_scanned = len(paths)
+
+    if len(paths) < PROCESS_POOL_THRESHOLD:
+        batches = [_sweep_batch(paths, pattern, replacement, dry_run)]
+    else:
+        chunks = [paths[i:i + BATCH_SIZE] for i in range(0, len(paths), BATCH_SIZE)]
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            batches = list(executor.map(_sweep_batch, chunks, [pattern] * len(chunks),
+                                        [replacement] * len(chunks), [dry_run] * len(chunks)))
+
+    for matches, binary in batches:
+        result.matches.update(matches)
+        result.binary_skipped += binary
+    result.elapsed = time.perf_counter() - started
+
+    logger.info(f"清扫完成: 扫描 {result.files_scanned} 个文件，{len(hosts)} 个旧域名，"
+                f"{len(result.matches)} 个文件包含旧链接，耗时 {result.elapsed * 1000:.1f} ms")
+    return result
@@ -6,29 +6,49 @@
 """
 
 import json
-import subprocess
 import logging
 import time
 import re
 import requests
+import sys
+import threading
 from pathlib import Path
 from datetime import datetime
-from cloudflare_updater import CloudflareUpdater, load_config as load_cf_config
-
-# 配置日志
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('link_updater.log', encoding='utf-8'),
-        logging.StreamHandler()
-    ]
-)
+from typing import Dict, List, Optional
+from cloudflare_updater import create_bulk_redirect_list, load_config as load_cf_config, load_source_urls
+from file_rewriter import DEFAULT_MAX_WORKERS, atomic_write_text, splice_files
+from git_backend import create_backend
+from git_queue import DEFAULT_QUIET_WINDOW, CommitQueue
+from history_store import open_history_store
+from link_index import LinkIndex
+from link_sweeper import SweepResult, sweep
+from log_setup import setup_logging
+from monitor_state import MonitorState
+from poll_scheduler import PollScheduler
+from propagation import DEFAULT_SINK_TIMEOUT, PropagationPipeline, PropagationResult, Sink
+from shared_cache import get_shared_cache, notion_key
+from zone_fanout import ZONE_FAILED, create_fanout
+
 logger = logging.getLogger(__name__)
 
+# 日志文件（按需配置，见 log_setup.setup_logging）
+LOG_FILE = 'link_updater.log'
+
 # 配置文件路径
 CONFIG_PATH = Path(__file__).parent / 'link_config.json'
 
+# 状态快照路径（记录最近一次同步到 Cloudflare 的目标）
+STATE_PATH = Path(__file__).parent / 'link_state.json'
+
+# 域名历史记录（由 domain_monitor.py 写入）
+HISTORY_PATH = Path(__file__).parent / 'domain_history.jsonl'
+
+# 站点仓库路径
+REPO_PATH = Path("/home/tosky")
+
+# 退出时等待提交队列清空的最长时间（秒）
+COMMIT_FLUSH_TIMEOUT = 120
+
 
 def load_config() -> dict:
     """加载配置文件"""
@@ -37,9 +57,8 @@ def load_config() -> dict:
 
 
 def save_config(config: dict):
-    """保存配置文件"""
-    with open(CONFIG_PATH, 'w', encoding='utf-8') as f:
-        json.dump(config, f, ensure_ascii=False, indent=2)
+    """保存配置文件（原子写入）"""
+    atomic_write_text(CONFIG_PATH, json.dumps(config, ensure_ascii=False, indent=2))
 
 
 class LinkUpdater:
@@ -50,36 +69,101 @@ class LinkUpdater:
         初始化链接更新器
 
         Args:
-            check_interval: 检查间隔（秒）
+            check_interval: 基础检查间隔（秒）
         """
         self.config = load_config()
         self.files = [Path(f) for f in self.config['files']]
         self.check_interval = check_interval
+        # 自适应轮询：稳定时拉长间隔，变化后短时间内加密检查
+        # （只解析 URL 标题或读取共享缓存，不请求 Notion，因此不占用 Notion 请求预算）
+        self.scheduler = PollScheduler.from_config(check_interval, self.config.get('polling'))
+        self.last_check_failed = False
+        self.state = MonitorState(STATE_PATH)
+        self.link_index = LinkIndex()
+        # 与 domain_monitor.py 共享的抓取缓存（其抓取的页面内容比 URL 标题更准确）
+        self.shared_cache = get_shared_cache(self.config.get('shared_cache'))
+        # git 提交后端（porcelain / plumbing）
+        self.git = create_backend(self.config.get('git_backend', 'porcelain'), REPO_PATH)
+        # update_files 最近写入的文件内容，供 plumbing 后端直接构建提交
+        self._written: Dict[Path, bytes] = {}
+        # 持续监控时使用的后台提交队列（单次运行时为 None，同步提交）
+        self.commit_queue: Optional[CommitQueue] = None
+        # 链接更新锁（monitor_manager.py 中多个来源的回调可能同时推送新链接；可重入，回调先检查再调用 apply_link）
+        self.update_lock = threading.RLock()
 
         # 初始化 Cloudflare 更新器
         try:
             cf_config = load_cf_config()
-            self.cf_updater = CloudflareUpdater(
-                api_token=cf_config["api_token"],
-                zone_id=cf_config["zone_id"],
-                rule_id=cf_config.get("rule_id")
-            )
+            # 每个 zone 一个更新器，重定向变化并发应用到所有 zone
+            self.cf_fanout = create_fanout(cf_config)
+            self.cf_updater = self.cf_fanout.primary.updater
             self.cf_config = cf_config
-            logger.info("Cloudflare 更新器已初始化")
+            logger.info(f"Cloudflare 更新器已初始化（{len(self.cf_fanout.zones)} 个 zone）")
         except Exception as e:
             logger.warning(f"Cloudflare 初始化失败: {e}")
+            self.cf_fanout = None
             self.cf_updater = None
             self.cf_config = None
 
+        # 可选的 Bulk Redirect List：大量文章 URL 统一重定向到当前链接
+        self.bulk_redirects = None
+        self.bulk_sources: List[str] = []
+        if self.cf_updater and self.cf_config.get('bulk_redirect'):
+            try:
+                self.bulk_redirects = create_bulk_redirect_list(self.cf_config, self.cf_updater)
+                self.bulk_sources = load_source_urls(self.cf_config['bulk_redirect'])
+                # 列表本身不会生效，需要账户级规则引用它（不存在时创建）
+                self.bulk_redirects.ensure_list()
+                self.bulk_redirects.ensure_rule()
+                logger.info(f"Bulk Redirect List 已配置: {len(self.bulk_sources)} 个源 URL")
+            except Exception as e:
+                logger.error(f"Bulk Redirect List 初始化失败，不会同步列表: {e}")
+                self.bulk_redirects = None
+
+        self.pipeline = self._build_pipeline()
+        # 不含 Cloudflare 重定向的管道（monitor_manager.py 中重定向由各来源的 DomainMonitor 负责，按需创建）
+        self._files_pipeline: Optional[PropagationPipeline] = None
+
+    def _build_pipeline(self, cloudflare: bool = True) -> PropagationPipeline:
+        """
+        构建变化传播管道：Cloudflare 与文件改写并发进行，git 在文件改写产生变化后执行
+
+        各目标的超时可通过配置中的 propagation_timeouts 字段调整（秒）
+
+        Args:
+            cloudflare: 是否包含 Cloudflare 重定向规则目标
+        """
+        timeouts = self.config.get('propagation_timeouts', {})
+        pipeline = PropagationPipeline()
+        if self.cf_updater and cloudflare:
+            pipeline.add_sink(Sink('cloudflare', self.update_cloudflare,
+                                   timeout=timeouts.get('cloudflare', DEFAULT_SINK_TIMEOUT)))
+        if self.bulk_redirects:
+            # 超时需要大于等待批量操作的上限，否则列表仍在同步时就会报告超时
+            pipeline.add_sink(Sink('bulk_redirects', self.update_bulk_redirects,
+                                   timeout=timeouts.get('bulk_redirects',
+                                                        self.bulk_redirects.operation_timeout + DEFAULT_SINK_TIMEOUT)))
+        pipeline.add_sink(Sink('files', self.update_files, timeout=timeouts.get('files', DEFAULT_SINK_TIMEOUT)))
+        pipeline.add_sink(Sink('git', self._propagate_git, timeout=timeouts.get('git', 2 * DEFAULT_SINK_TIMEOUT),
+                               depends_on=['files']))
+        return pipeline
+
     def extract_domain_from_notion(self) -> str:
         """
         从 Notion URL 标题提取官方域名
         URL 格式: APK-www-firgrouxywebb-com-join-df0b826...
         提取为: www.firgrouxywebb.com
+
+        domain_monitor.py 在共享缓存的 TTL 内抓取过同一页面时，优先使用其从页面内容中提取的域名
         """
         try:
             notion_url = self.config['notion_url']
 
+            cached = self.shared_cache.get(notion_key(notion_url))
+            if cached:
+                logger.info(f"使用共享缓存中 domain_monitor 抓取的域名: {cached}")
+                return cached
+
             # 从 URL 标题提取域名
             # 格式: APK-www-domainname-com-join-xxx
             match = re.search(r'APK-(www-[a-zA-Z0-9-]+-com)-join', notion_url)
@@ -105,46 +189,60 @@ class LinkUpdater:
             new_link: 新的完整链接
 
         Returns:
-            是否更新成功
+            是否更新了文件（有文件更新失败时抛出异常，且不修改 current_link）
         """
-        try:
-            old_link = self.config['current_link']
-            updated_count = 0
-
-            for file_path in self.files:
-                if not file_path.exists():
-                    logger.warning(f"文件不存在: {file_path}")
-                    continue
+        old_link = self.config['current_link']
 
-                content = file_path.read_text(encoding='utf-8')
+        started = time.perf_counter()
 
-                if old_link not in content:
-                    logger.info(f"文件中没有旧链接: {file_path.name}")
-                    continue
+        # 增量刷新链接索引：未变化的文件只做一次 stat，不重新读取
+        self.link_index.refresh(self.files)
+        usage = self.link_index.where_used(old_link)
 
-                # 精确替换
-                new_content = content.replace(old_link, new_link)
-                file_path.write_text(new_content, encoding='utf-8')
-                logger.info(f"已更新: {file_path}")
+        targets = {}
+        for file_path in self.files:
+            if str(file_path) not in self.link_index.files:
+                logger.warning(f"文件不存在: {file_path}")
+            elif str(file_path) not in usage:
+                logger.info(f"文件中没有旧链接: {file_path.name}")
+            else:
+                targets[file_path] = usage[str(file_path)]
+
+        # 线程池并发按偏移改写（临时文件 + 重命名，保证原子性）
+        results = splice_files(targets, old_link, new_link,
+                               max_workers=self.config.get('max_workers', DEFAULT_MAX_WORKERS))
+        elapsed = time.perf_counter() - started
+
+        updated_count = 0
+        failed = []
+        for result in results:
+            if result.error:
+                logger.error(f"更新文件失败: {result.path}: {result.error}")
+                failed.append(result.path)
+            elif result.changed:
+                self.link_index.update(result.path, result.content)
+                self._written[result.path] = result.content
+                logger.info(f"已更新: {result.path}（{result.replacements} 处，{result.elapsed * 1000:.1f} ms）")
                 updated_count += 1
+        self.link_index.save()
 
-            if updated_count > 0:
-                logger.info(f"共更新 {updated_count} 个文件")
-                logger.info(f"  旧链接: {old_link}")
-                logger.info(f"  新链接: {new_link}")
+        # 有文件更新失败时不推进 current_link：下次运行仍以旧链接为准，重新处理失败的文件
+        if failed:
+            raise Exception(f"{len(failed)} 个文件更新失败，current_link 保持为 {old_link}")
 
-                # 更新配置文件
-                self.config['current_link'] = new_link
-                self.config['last_updated'] = datetime.now().isoformat()
-                save_config(self.config)
+        if updated_count > 0:
+            logger.info(f"共更新 {updated_count} 个文件，耗时 {elapsed * 1000:.1f} ms")
+            logger.info(f"  旧链接: {old_link}")
+            logger.info(f"  新链接: {new_link}")
 
-                return True
-            else:
-                logger.info("没有文件需要更新")
-                return False
+            # 更新配置文件
+            self.config['current_link'] = new_link
+            self.config['last_updated'] = datetime.now().isoformat()
+            save_config(self.config)
 
-        except Exception as e:
-            logger.error(f"更新文件失败: {e}")
+            return True
+        else:
+            logger.info("没有文件需要更新")
             return False
 
     def update_cloudflare(self, new_link: str) -> bool:
@@ -155,105 +253,123 @@ class LinkUpdater:
             new_link: 新的完整链接
 
         Returns:
-            是否更新成功
+            是否实际写入了规则（规则已指向新链接时跳过写入，返回 False；失败时抛出异常）
         """
-        if not self.cf_config:
+        if not self.cf_updater:
             logger.warning("Cloudflare 配置未加载，跳过")
             return False
 
-        try:
-            import requests
-
-            headers = {
-                "Authorization": f"Bearer {self.cf_config['api_token']}",
-                "Content-Type": "application/json"
-            }
-
-            zone_id = self.cf_config['zone_id']
-            ruleset_id = self.cf_config['ruleset_id']
-            rule_id = self.cf_config['rule_id']
-
-            # 获取当前规则集
-            url = f"https://api.cloudflare.com/client/v4/zones/{zone_id}/rulesets/{ruleset_id}"
-            resp = requests.get(url, headers=headers, timeout=30)
-            resp.raise_for_status()
-            ruleset = resp.json().get('result', {})
-
-            # 更新目标规则的 target_url
-            rules = ruleset.get('rules', [])
-            for rule in rules:
-                if rule.get('id') == rule_id:
-                    rule['action_parameters']['from_value']['target_url']['value'] = new_link
-                    break
-
-            # 提交更新
-            update_data = {"rules": rules}
-            resp = requests.put(url, headers=headers, json=update_data, timeout=30)
-            resp.raise_for_status()
-
-            logger.info("=" * 50)
-            logger.info("Cloudflare 301 重定向规则更新成功")
-            logger.info("-" * 50)
-            logger.info("Rule name: okx")
-            logger.info("From: https://onefly.top/posts/8888.html")
-            logger.info(f"To:   {new_link}")
-            logger.info("Status: 301 Permanent Redirect")
-            logger.info("=" * 50)
-            return True
+        # 先比较再写入：规则已指向新链接的 zone 不再提交；各 zone 并发更新
+        fanout = self.cf_fanout.apply(new_link, update_expression=False)
+        primary = fanout.results[0]
+        if primary.status != ZONE_FAILED:
+            self.state.update(ruleset_version=primary.result.get('version'))
 
-        except Exception as e:
-            logger.error(f"更新 Cloudflare 失败: {e}")
+        # 任何 zone 失败都视为失败：不记录 cloudflare_target，下次检查时重试（已指向新链接的 zone 跳过写入）
+        if fanout.failed:
+            raise Exception(f"{len(fanout.failed)}/{len(fanout.results)} 个 zone 更新失败"
+                            f"（{', '.join(r.name for r in fanout.failed)}）: {fanout.failed[0].error}")
+        self.state.update(cloudflare_target=new_link)
+
+        if not fanout.changed:
+            logger.info(f"Cloudflare 重定向规则已指向 {new_link}，跳过写入")
             return False
 
-    def git_commit_and_push(self, new_link: str) -> bool:
+        logger.info(f"Cloudflare 301 重定向已更新: {self.cf_config.get('source_pattern', '')} -> {new_link}")
+        return True
+
+    def update_bulk_redirects(self, new_link: str) -> bool:
         """
-        提交 git 并推送
+        把 Bulk Redirect List 中的所有源 URL 指向新链接（只提交有变化的条目）
 
         Args:
-            new_link: 新链接（用于提交信息）
+            new_link: 新的完整链接
 
         Returns:
-            是否成功
+            是否有条目发生了变化
+        """
+        if not self.bulk_redirects:
+            return False
+        stats = self.bulk_redirects.point_all(self.bulk_sources, new_link)
+        return bool(stats['added'] or stats['deleted'])
+
+    def sweep_stale_links(self, new_link: Optional[str] = None, dry_run: bool = False) -> SweepResult:
+        """
+        清扫整个源码目录中指向历史旧域名的链接
+
+        Args:
+            new_link: 当前链接（默认使用配置中的 current_link）
+            dry_run: 只统计，不写入
+
+        Returns:
+            清扫结果
         """
+        new_link = new_link or self.config['current_link']
+        root = Path(self.config.get('sweep_root', REPO_PATH / 'src'))
+
+        store = open_history_store(HISTORY_PATH, legacy_file=HISTORY_PATH.with_suffix('.json'))
         try:
-            repo_path = Path("/home/tosky")
-
-            # git add 所有文件和 config
-            files_to_add = [str(f) for f in self.files] + [str(CONFIG_PATH)]
-            subprocess.run(
-                ['git', 'add'] + files_to_add,
-                cwd=repo_path,
-                capture_output=True,
-                text=True,
-                check=True
-            )
+            stale = store.domains()
+        finally:
+            store.close()
+
+        result = sweep(root, stale, new_link, dry_run=dry_run)
+        for path in result.files_changed:
+            logger.info(f"{'发现' if dry_run else '已更新'}旧链接: {path}（{result.matches[str(path)]} 处）")
+        return result
+
+    def where_used(self, link: str) -> dict:
+        """
+        查询链接在配置的文件中的使用位置
+
+        Args:
+            link: 链接
+
+        Returns:
+            {文件路径: [字节偏移]}
+        """
+        self.link_index.refresh(self.files)
+        self.link_index.save()
+        return self.link_index.where_used(link)
+
+    def git_commit(self, new_link: str, extra_files: Optional[List[Path]] = None) -> bool:
+        """
+        提交 git（不推送）
+
+        Args:
+            new_link: 新链接（用于提交信息）
+            extra_files: 除配置文件列表外需要一并提交的文件（可选）
 
-            # git commit
+        Returns:
+            是否成功（没有需要提交的更改也视为成功）
+        """
+        try:
+            # 所有文件和 config；plumbing 后端直接使用 update_files 写入的内容，无需重新读取
+            files_to_add = self.files + (extra_files or []) + [CONFIG_PATH]
             commit_msg = f"chore: 自动更新注册链接为 {new_link}"
-            result = subprocess.run(
-                ['git', 'commit', '-m', commit_msg],
-                cwd=repo_path,
-                capture_output=True,
-                text=True
-            )
-            if result.returncode != 0:
-                if 'nothing to commit' in result.stdout + result.stderr:
-                    logger.info("没有需要提交的更改")
-                    return True
-                logger.error(f"git commit 失败: {result.stderr}")
-                return False
+            started = time.perf_counter()
+            commit = self.git.commit(commit_msg, files_to_add, dict(self._written))
+            self._written.clear()
+            if commit is None:
+                logger.info("没有需要提交的更改")
+                return True
 
-            logger.info(f"git commit 成功: {commit_msg}")
+            logger.info(f"git commit 成功: {commit_msg}（{commit[:7]}，{(time.perf_counter() - started) * 1000:.1f} ms）")
+            return True
 
-            # git push
-            result = subprocess.run(
-                ['git', 'push'],
-                cwd=repo_path,
-                capture_output=True,
-                text=True
-            )
-            if result.returncode != 0:
-                logger.error(f"git push 失败: {result.stderr}")
+        except Exception as e:
+            logger.error(f"git 操作失败: {e}")
+            return False
+
+    def git_push(self) -> bool:
+        """
+        推送到远程仓库
+
+        Returns:
+            是否成功
+        """
+        try:
+            if not self.git.push():
                 return False
 
             logger.info("git push 成功，部署将自动触发")
@@ -263,6 +379,65 @@ class LinkUpdater:
             logger.error(f"git 操作失败: {e}")
             return False
 
+    def git_commit_and_push(self, new_link: str, extra_files: Optional[List[Path]] = None) -> bool:
+        """
+        提交 git 并推送
+
+        Args:
+            new_link: 新链接（用于提交信息）
+            extra_files: 除配置文件列表外需要一并提交的文件（可选）
+
+        Returns:
+            是否成功
+        """
+        return self.git_commit(new_link, extra_files) and self.git_push()
+
+    def _propagate_git(self, new_link: str) -> bool:
+        """传播目标：提交并推送（持续监控模式下交给后台队列，不阻塞；同步提交失败时抛出异常）"""
+        if self.commit_queue:
+            self.commit_queue.submit(new_link)
+            return True
+        if not self.git_commit_and_push(new_link):
+            raise Exception("git 提交或推送失败")
+        logger.info("链接更新完成!")
+        return True
+
+    def apply_link(self, new_link: str, cloudflare: bool = True) -> PropagationResult:
+        """
+        把新链接推送到所有目标：Cloudflare、Bulk Redirect List 与站点文件并发进行，文件变化后提交 git
+        （持续监控时交给后台提交队列）
+
+        Args:
+            new_link: 新链接
+            cloudflare: 是否更新 Cloudflare 重定向规则
+
+        Returns:
+            传播结果
+        """
+        with self.update_lock:
+            if cloudflare:
+                pipeline = self.pipeline
+            else:
+                if self._files_pipeline is None:
+                    self._files_pipeline = self._build_pipeline(cloudflare=False)
+                pipeline = self._files_pipeline
+            return pipeline.run(new_link)
+
+    def start_commit_queue(self):
+        """启动后台提交队列（之后的 git 提交与推送经队列合并执行，不阻塞传播）"""
+        if self.commit_queue is None:
+            self.commit_queue = CommitQueue(
+                self.git_commit, self.git_push,
+                quiet_window=self.config.get('commit_quiet_window', DEFAULT_QUIET_WINDOW)
+            )
+            self.commit_queue.start()
+
+    def stop_commit_queue(self):
+        """停止后台提交队列，等待队列中的更改提交完成"""
+        if self.commit_queue is not None:
+            self.commit_queue.stop(timeout=COMMIT_FLUSH_TIMEOUT)
+            self.commit_queue = None
+
     def check_and_update(self) -> bool:
         """
         检查域名变化并更新
@@ -272,6 +447,7 @@ class LinkUpdater:
         """
         # 获取最新域名
         new_domain = self.extract_domain_from_notion()
+        self.last_check_failed = not new_domain
 
         if not new_domain:
             logger.warning("无法获取新域名")
@@ -285,46 +461,52 @@ class LinkUpdater:
         current_link = self.config['current_link']
         if current_link == new_link:
             logger.info(f"链接未变化: {current_link}")
+            # 只有上次 Cloudflare 同步未完成时才访问 API，否则本次无需任何网络请求
+            if self.cf_updater and self.state.get('cloudflare_target') != current_link:
+                logger.info("Cloudflare 重定向尚未同步到当前链接，重新尝试更新")
+                try:
+                    return self.update_cloudflare(current_link)
+                except Exception as e:
+                    logger.error(f"更新 Cloudflare 失败: {e}")
+                    return False
             return False
 
         logger.info(f"检测到链接变化:")
         logger.info(f"  当前: {current_link}")
         logger.info(f"  新的: {new_link}")
 
-        # 更新所有文件
-        files_updated = self.update_files(new_link)
-
-        # 更新 Cloudflare 重定向
-        cf_updated = self.update_cloudflare(new_link)
-
-        if files_updated:
-            # 提交并推送
-            if self.git_commit_and_push(new_link):
-                logger.info("链接更新完成!")
-                return True
-
-        return files_updated or cf_updated
+        # Cloudflare 重定向与文件改写并发进行，文件有变化后再提交 git
+        return self.apply_link(new_link).changed
 
     def run(self):
         """运行持续监控"""
         logger.info("=" * 60)
         logger.info("链接自动更新脚本启动")
         logger.info(f"当前链接: {self.config['current_link']}")
-        logger.info(f"监控间隔: {self.check_interval} 秒")
+        logger.info(f"基础监控间隔: {self.check_interval} 秒（稳定时逐步拉长，变化后缩短）")
         logger.info("=" * 60)
 
+        self.start_commit_queue()
+
         try:
             while True:
-                self.check_and_update()
-                logger.info(f"等待 {self.check_interval} 秒后进行下次检查...")
-                time.sleep(self.check_interval)
+                changed = self.check_and_update()
+                delay = self.scheduler.next_delay(changed=changed, failed=self.last_check_failed)
+                logger.info(f"等待 {delay:.0f} 秒后进行下次检查...")
+                time.sleep(delay)
         except KeyboardInterrupt:
-            logger.info("\n监控已停止")
+            logger.info("\n监控已停止，正在提交队列中的更改...")
+            self.stop_commit_queue()
 
 
 def main():
-    """主函数"""
+    """主函数（python3 link_updater.py check：不询问，单次检查并更新，供 cron 使用）"""
     config = load_config()
+    setup_logging(LOG_FILE, config.get('logging'))
+
+    if sys.argv[1:2] == ['check']:
+        LinkUpdater().check_and_update()
+        return
 
     print("=" * 60)
     print("链接自动更新脚本")
@@ -336,8 +518,19 @@ def main():
     print("\n请选择运行模式:")
     print("1. 单次检查并更新")
     print("2. 持续监控并自动更新")
+    print("3. 清扫所有旧域名链接")
+
+    choice = input("\n请输入选项 (1/2/3): ").strip()
 
-    choice = input("\n请输入选项 (1/2): ").strip()
+    if choice == '3':
+        updater = LinkUpdater()
+        result = updater.sweep_stale_links()
+        if result.matches:
+            updater.git_commit_and_push(config['current_link'], result.files_changed)
+            print(f"\n已更新 {len(result.matches)} 个文件并提交")
+        else:
+            print("\n没有发现旧域名链接")
+        return
 
     interval_input = input("检查间隔（秒，默认300）: ").strip()
     check_interval = int(interval_input) if interval_input.isdigit() else 300
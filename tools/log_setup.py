@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+非阻塞日志配置
+日志记录只把记录放入内存队列，由后台 QueueListener 线程写入控制台和按大小/时间轮转的日志文件，
+轮询循环不再等待磁盘 I/O；可选每行一个 JSON 对象的紧凑格式。
+在入口处按需调用 setup_logging()，导入模块时不修改日志配置
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# 默认格式（与原来的 basicConfig 一致）
+DEFAULT_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+# 按大小轮转：单个文件上限与保留的旧文件数
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_BACKUP_COUNT = 5
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_lock = threading.Lock()
+
+
+class JsonFormatter(logging.Formatter):
+    """每条记录一行 JSON（便于 jq / 日志采集处理）"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            'ts': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            # QueueHandler 入队前已把异常堆栈合并到消息中
+            'msg': record.getMessage(),
+        }
+        return json.dumps(data, ensure_ascii=False)
+
+
+def _file_handler(path: Path, max_bytes: int, backup_count: int, when: Optional[str]) -> logging.Handler:
+    """按时间（指定 when 时，例如 "midnight"）或按大小轮转的文件处理器"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if when:
+        return logging.handlers.TimedRotatingFileHandler(path, when=when, backupCount=backup_count,
+                                                         encoding='utf-8')
+    return logging.handlers.RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count,
+                                                encoding='utf-8')
+
+
+def setup_logging(log_file: Optional[str] = None, options: Optional[Dict] = None, force: bool = False) -> bool:
+    """
+    配置根日志器：QueueHandler 入队，后台 QueueListener 写入控制台与轮转文件
+
+    Args:
+        log_file: 日志文件名（相对路径基于 tools 目录；None 表示只输出到控制台）
+        options: 可选参数：level（默认 INFO）、max_bytes、backup_count、
+                 when（按时间轮转，例如 "midnight"）、json（true 时使用 JSON 行格式）、console（默认 true）
+        force: 已配置过时是否替换原有配置
+
+    Returns:
+        是否进行了配置（已配置且未指定 force 时返回 False）
+    """
+    global _listener
+    options = options or {}
+    root = logging.getLogger()
+
+    with _lock:
+        if root.handlers and not force:
+            return False
+        _stop_listener()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+            handler.close()
+
+        formatter = JsonFormatter() if options.get('json') else logging.Formatter(DEFAULT_FORMAT)
+        handlers: List[logging.Handler] = []
+        if options.get('console', True):
+            handlers.append(logging.StreamHandler())
+        if log_file:
+            path = Path(log_file)
+            if not path.is_absolute():
+                path = Path(__file__).parent / path
+            handlers.append(_file_handler(path, options.get('max_bytes', DEFAULT_MAX_BYTES),
+                                          options.get('backup_count', DEFAULT_BACKUP_COUNT), options.get('when')))
+        for handler in handlers:
+            handler.setFormatter(formatter)
+
+        log_queue: queue.Queue = queue.Queue(-1)
+        root.addHandler(logging.handlers.QueueHandler(log_queue))
+        root.setLevel(options.get('level', 'INFO'))
+
+        _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+    return True
+
+
+def _stop_listener():
+    """停止后台线程（先写出队列中剩余的日志），关闭其处理器"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+def shutdown_logging():
+    """停止后台线程并写出队列中剩余的日志（进程退出时自动调用）"""
+    with _lock:
+        _stop_listener()
+
+
+atexit.register(shutdown_logging)
@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多来源域名监控管理器
+在一个进程内基于 asyncio 同时监控多个 Notion 页面，每个来源有独立的检查间隔，
+并限制同时进行的抓取数量
+"""
+
+import asyncio
+import json
+import logging
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from domain_monitor import DomainMonitor
+from http_client import DEFAULT_POOL_SIZE, get_transport
+from log_setup import setup_logging
+from poll_scheduler import PollScheduler, default_budget, get_budget
+
+logger = logging.getLogger(__name__)
+
+# 配置文件路径
+SOURCES_PATH = Path(__file__).parent / 'monitor_sources.json'
+
+# 默认同时执行的变化回调数量
+DEFAULT_CALLBACK_WORKERS = 4
+
+# 变化回调：callback(来源名称, 旧域名, 新域名)，旧域名在首次检测时为 None
+ChangeCallback = Callable[[str, Optional[str], str], None]
+
+
+class MonitorSource:
+    """单个监控来源的配置"""
+
+    def __init__(self, name: str, notion_url: str, check_interval: int = 300,
+                 cloudflare_enabled: bool = False, update_files: bool = False,
+                 cloudflare_config_file: str = "cloudflare_config.json", polling: Optional[Dict] = None,
+                 probe_candidates: Optional[bool] = None, notion_api: bool = False,
+                 notion_api_base: Optional[str] = None):
+        """
+        初始化监控来源
+
+        Args:
+            name: 来源名称（同时用于区分历史记录文件）
+            notion_url: Notion 页面 URL
+            check_interval: 基础检查间隔（秒）
+            cloudflare_enabled: 域名变化时是否更新 Cloudflare 重定向规则
+            update_files: 域名变化时是否通过 LinkUpdater 更新站点文件中的链接
+            cloudflare_config_file: 该来源使用的 Cloudflare 配置文件名
+            polling: 自适应轮询参数（可选，见 PollScheduler）
+            probe_candidates: 是否探测页面中的候选域名，选用延迟最低的可访问域名（默认读取 Cloudflare 配置）
+            notion_api: 是否优先通过 Notion 页面数据接口读取（失败时退回抓取 HTML）
+            notion_api_base: Notion 接口地址（可选）
+        """
+        self.name = name
+        self.notion_url = notion_url
+        self.check_interval = check_interval
+        self.cloudflare_enabled = cloudflare_enabled
+        self.update_files = update_files
+        self.cloudflare_config_file = cloudflare_config_file
+        self.polling = polling
+        self.probe_candidates = probe_candidates
+        self.notion_api = notion_api
+        self.notion_api_base = notion_api_base
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'MonitorSource':
+        """从配置字典创建"""
+        return cls(
+            name=data['name'],
+            notion_url=data['notion_url'],
+            check_interval=data.get('check_interval', 300),
+            cloudflare_enabled=data.get('cloudflare_enabled', False),
+            update_files=data.get('update_files', False),
+            cloudflare_config_file=data.get('cloudflare_config_file', 'cloudflare_config.json'),
+            polling=data.get('polling'),
+            probe_candidates=data.get('probe_candidates'),
+            notion_api=data.get('notion_api', False),
+            notion_api_base=data.get('notion_api_base'),
+        )
+
+
+def make_file_update_callback(link_updater) -> ChangeCallback:
+    """
+    创建把新域名写入站点文件并提交 git 的回调（经 LinkUpdater 的传播管道执行，
+    Cloudflare 重定向由来源自己的 DomainMonitor 负责，不重复更新）
+
+    Args:
+        link_updater: LinkUpdater 实例
+
+    Returns:
+        变化回调
+    """
+    def callback(name: str, old_domain: Optional[str], new_domain: str):
+        invite_code = link_updater.config['invite_code']
+        new_link = f"{new_domain.rstrip('/')}/join/{invite_code}"
+        # 多个来源共用同一个 LinkUpdater，推送新链接需要串行
+        with link_updater.update_lock:
+            if new_link == link_updater.config['current_link']:
+                return
+            logger.info(f"[{name}] 更新站点文件链接: {new_link}")
+            result = link_updater.apply_link(new_link, cloudflare=False)
+        if not result.ok:
+            raise Exception(f"链接传播失败: {result.summary()}")
+
+    return callback
+
+
+class MonitorManager:
+    """基于 asyncio 的多来源监控管理器"""
+
+    def __init__(self, max_concurrent_fetches: int = 10, request_budget: Optional[Dict] = None,
+                 notion_http: Optional[Dict] = None, max_callback_workers: int = DEFAULT_CALLBACK_WORKERS):
+        """
+        初始化管理器
+
+        Args:
+            max_concurrent_fetches: 同时进行的抓取数量上限
+            request_budget: 所有来源共享的 Notion 请求预算（max_requests / period / burst，可选）
+            notion_http: Notion 共享连接池的额外参数（例如 {"http2": true}，可选）
+            max_callback_workers: 同时执行的变化回调数量上限
+        """
+        self.max_concurrent_fetches = max_concurrent_fetches
+        self.sources: List[MonitorSource] = []
+        self.monitors: Dict[str, DomainMonitor] = {}
+        self._callbacks: Dict[str, List[ChangeCallback]] = {}
+        self._global_callbacks: List[ChangeCallback] = []
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrent_fetches,
+                                            thread_name_prefix='monitor-fetch')
+        # 变化回调（文件改写、git 推送等）使用独立的线程池，不占用抓取线程
+        self._callback_executor = ThreadPoolExecutor(max_workers=max_callback_workers,
+                                                     thread_name_prefix='monitor-callback')
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        # 文件更新回调使用的 LinkUpdater（由 create_manager 设置，运行期间启用后台提交队列）
+        self.link_updater = None
+
+        # 预先创建 Notion 共享连接池，使连接数与并发上限匹配
+        get_transport("notion", {"pool_size": max(max_concurrent_fetches, DEFAULT_POOL_SIZE),
+                                 **(notion_http or {})})
+        self.budget = get_budget("notion", request_budget)
+
+    def add_source(self, source: MonitorSource) -> DomainMonitor:
+        """
+        添加监控来源
+
+        Args:
+            source: 来源配置
+
+        Returns:
+            为该来源创建的 DomainMonitor
+        """
+        if source.name in self.monitors:
+            raise ValueError(f"重复的来源名称: {source.name}")
+
+        monitor = DomainMonitor(
+            source.notion_url,
+            check_interval=source.check_interval,
+            cloudflare_enabled=source.cloudflare_enabled,
+            history_file=f"domain_history_{source.name}.jsonl",
+            state_file=f"monitor_state_{source.name}.json",
+            cloudflare_config_file=source.cloudflare_config_file,
+            scheduler=PollScheduler.from_config(source.check_interval, source.polling, budget=self.budget),
+            probe_candidates=source.probe_candidates,
+            notion_api=source.notion_api,
+            notion_api_base=source.notion_api_base,
+        )
+        self.sources.append(source)
+        self.monitors[source.name] = monitor
+        return monitor
+
+    def add_callback(self, callback: ChangeCallback, source_name: Optional[str] = None):
+        """
+        注册域名变化回调
+
+        Args:
+            callback: 回调函数
+            source_name: 只对指定来源生效（可选，默认对所有来源生效）
+        """
+        if source_name is None:
+            self._global_callbacks.append(callback)
+        else:
+            self._callbacks.setdefault(source_name, []).append(callback)
+
+    async def _check(self, source: MonitorSource, monitor: DomainMonitor) -> bool:
+        """执行一次检查（在线程池中运行阻塞的抓取），返回域名是否变化"""
+        loop = asyncio.get_running_loop()
+        old_domain = monitor.get_current_domain()
+
+        async with self._semaphore:
+            changed = await loop.run_in_executor(self._executor, monitor.check_domain_change)
+
+        if not changed:
+            return False
+
+        new_domain = monitor.get_current_domain()
+        for callback in self._global_callbacks + self._callbacks.get(source.name, []):
+            try:
+                await loop.run_in_executor(self._callback_executor, callback, source.name, old_domain, new_domain)
+            except Exception as e:
+                logger.error(f"[{source.name}] 变化回调执行失败: {e}")
+        return True
+
+    async def _watch(self, source: MonitorSource, monitor: DomainMonitor):
+        """单个来源的监控循环"""
+        # 随机错开各来源的首次检查，避免同时发起大量请求
+        await asyncio.sleep(monitor.scheduler.first_delay(min(source.check_interval, 10)))
+
+        while True:
+            changed, failed = False, False
+            try:
+                changed = await self._check(source, monitor)
+                failed = monitor.last_check_failed
+            except Exception as e:
+                logger.error(f"[{source.name}] 检查失败: {e}")
+                failed = True
+            await asyncio.sleep(monitor.scheduler.next_delay(changed=changed, failed=failed))
+
+    async def run(self):
+        """运行所有来源的监控（直到被取消）"""
+        self._semaphore = asyncio.Semaphore(self.max_concurrent_fetches)
+        logger.info(f"开始监控 {len(self.sources)} 个来源，最大并发抓取数: {self.max_concurrent_fetches}")
+
+        if self.link_updater:
+            self.link_updater.start_commit_queue()
+        health_monitors = [h for h in (m.start_health_check() for m in self.monitors.values()) if h]
+        tasks = [
+            asyncio.create_task(self._watch(source, self.monitors[source.name]), name=source.name)
+            for source in self.sources
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            for health in health_monitors:
+                health.stop()
+            if self.link_updater:
+                logger.info("正在提交队列中的更改...")
+                self.link_updater.stop_commit_queue()
+
+    def run_forever(self):
+        """阻塞运行，Ctrl+C 停止"""
+        try:
+            asyncio.run(self.run())
+        except KeyboardInterrupt:
+            logger.info("\n监控已停止")
+        finally:
+            self._executor.shutdown(wait=False)
+            self._callback_executor.shutdown(wait=False)
+
+
+def load_sources(config_file: Path = SOURCES_PATH) -> Dict:
+    """
+    加载多来源监控配置
+
+    Args:
+        config_file: 配置文件路径
+
+    Returns:
+        配置字典
+    """
+    with open(config_file, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def create_manager(config: Dict) -> MonitorManager:
+    """
+    根据配置创建管理器，并为需要的来源挂接文件更新回调
+
+    Args:
+        config: monitor_sources.json 的内容
+
+    Returns:
+        MonitorManager 实例
+    """
+    # 默认预算按来源数量与各自的检查间隔放大（见 poll_scheduler.default_budget）
+    request_budget = config.get('request_budget') or default_budget(
+        source.get('check_interval', 300) for source in config['sources']
+    )
+    manager = MonitorManager(config.get('max_concurrent_fetches', 10), request_budget,
+                             config.get('notion_http'),
+                             config.get('max_callback_workers', DEFAULT_CALLBACK_WORKERS))
+    link_updater = None
+
+    for data in config['sources']:
+        source = MonitorSource.from_dict(data)
+        manager.add_source(source)
+
+        if source.update_files:
+            if link_updater is None:
+                from link_updater import LinkUpdater
+                link_updater = LinkUpdater()
+                manager.link_updater = link_updater
+            manager.add_callback(make_file_update_callback(link_updater), source.name)
+
+    return manager
+
+
+def main():
+    """主函数"""
+    try:
+        config = load_sources()
+    except FileNotFoundError:
+        print(f"❌ 配置文件不存在: {SOURCES_PATH}")
+        print("请复制 monitor_sources.json.example 为 monitor_sources.json 并填入配置")
+        sys.exit(1)
+
+    # 所有来源共用一个日志文件（各 DomainMonitor 不再单独配置）
+    setup_logging(config.get('log_file'), config.get('logging'))
+
+    manager = create_manager(config)
+    print(f"开始监控 {len(manager.sources)} 个来源，按 Ctrl+C 停止\n")
+    manager.run_forever()
+
+
+if __name__ == "__main__":
+    main()
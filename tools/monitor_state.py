@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+监控状态持久化
+保存最近一次检测到的域名、页面内容哈希、Cloudflare 目标与规则集版本，
+使重启或 cron 调用后无需重复请求和写入
+"""
+
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class MonitorState:
+    """小型 JSON 状态快照（原子写入，可在多个线程中更新）"""
+
+    def __init__(self, path: Path):
+        """
+        初始化并加载状态
+
+        Args:
+            path: 状态文件路径
+        """
+        self.path = Path(path)
+        self.data: Dict[str, Any] = self._load()
+        self._lock = threading.Lock()
+
+    def _load(self) -> Dict[str, Any]:
+        """加载状态文件，不存在或损坏时返回空状态"""
+        if not self.path.exists():
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"加载监控状态失败，将重新开始: {e}")
+            return {}
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """读取状态值"""
+        return self.data.get(key, default)
+
+    def update(self, **values: Optional[Any]):
+        """
+        更新状态，只有值发生变化时才写入文件
+
+        Args:
+            **values: 需要更新的字段
+        """
+        with self._lock:
+            changed = {k: v for k, v in values.items() if self.data.get(k) != v}
+            if not changed:
+                return
+
+            self.data.update(changed)
+            self.data['updated_at'] = datetime.now().isoformat()
+            try:
+                # 先写临时文件再替换，保证状态文件不会被写坏
+                tmp_path = self.path.with_suffix(self.path.suffix + '.tmp')
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(self.data, f, ensure_ascii=False, indent=2)
+                os.replace(tmp_path, self.path)
+            except Exception as e:
+                logger.error(f"保存监控状态失败: {e}")
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Notion 页面数据接口
+通过公开页面的 JSON 接口（/api/v3/syncRecordValues）按需读取页面块，
+从结构化的块文本中提取域名，不再下载以打包 JS 为主的渲染后 HTML
+
+命令行:
+  python3 notion_api.py fetch <notion_url> [api_base]     提取域名并显示传输字节数
+  python3 notion_api.py record <notion_url> <文件>         录制接口响应
+  python3 notion_api.py serve <文件> [端口]                 在本地回放录制的响应（配合 api_base 使用）
+"""
+
+import hashlib
+import json
+import logging
+import re
+import sys
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List, Optional
+from urllib.parse import urlparse
+
+from domain_extractor import iter_domains
+from http_client import HttpTransport, get_transport
+
+logger = logging.getLogger(__name__)
+
+# Notion URL 末尾的 32 位页面 ID
+PAGE_ID_PATTERN = re.compile(r'([0-9a-f]{32})(?:[?#].*)?$', re.IGNORECASE)
+
+# 每次请求的子块数
+BLOCK_BATCH = 20
+
+# 最多读取的子块数
+MAX_BLOCKS = 100
+
+
+def page_id_from_url(notion_url: str) -> Optional[str]:
+    """
+    从 Notion URL 中提取页面 ID（带连字符的 UUID 格式）
+
+    Args:
+        notion_url: 例如 https://xxx.notion.site/APK-www-xxx-com-join-df0b826aa4b840fea1aa4f351529afd1
+
+    Returns:
+        页面 ID，无法识别时返回 None
+    """
+    match = PAGE_ID_PATTERN.search(urlparse(notion_url).path)
+    if not match:
+        return None
+    raw = match.group(1).lower()
+    return f"{raw[:8]}-{raw[8:12]}-{raw[12:16]}-{raw[16:20]}-{raw[20:]}"
+
+
+def api_base_from_url(notion_url: str) -> str:
+    """公开页面所在站点的接口地址（例如 https://xxx.notion.site/api/v3）"""
+    parsed = urlparse(notion_url)
+    return f"{parsed.scheme}://{parsed.netloc}/api/v3"
+
+
+def _block_value(entry: Optional[Dict]) -> Optional[Dict]:
+    """兼容 recordMap 中 {"value": {...}} 与 {"value": {"value": {...}}} 两种结构"""
+    value = (entry or {}).get('value')
+    if isinstance(value, dict) and 'id' not in value and isinstance(value.get('value'), dict):
+        value = value['value']
+    return value
+
+
+def _strings(node: Any) -> Iterator[str]:
+    """遍历块属性中的所有字符串（富文本的文字与链接注释）"""
+    if isinstance(node, str):
+        yield node
+    elif isinstance(node, list):
+        for item in node:
+            yield from _strings(item)
+    elif isinstance(node, dict):
+        for item in node.values():
+            yield from _strings(item)
+
+
+def block_text(block: Dict) -> str:
+    """块的文本内容（包括链接目标），用于域名匹配"""
+    return '\n'.join(_strings(block.get('properties', {})))
+
+
+class NotionApiFetcher:
+    """按需读取 Notion 页面块并提取域名"""
+
+    def __init__(self, notion_url: str, api_base: Optional[str] = None,
+                 transport: Optional[HttpTransport] = None):
+        """
+        Args:
+            notion_url: Notion 页面 URL（页面 ID 取自其末尾）
+            api_base: 接口地址（默认 https://<页面所在站点>/api/v3，可指向本地回放服务器）
+            transport: HTTP 连接池（默认共享的 "notion" 连接池）
+        """
+        self.page_id = page_id_from_url(notion_url)
+        if not self.page_id:
+            raise ValueError(f"无法从 Notion URL 中识别页面 ID: {notion_url}")
+        self.api_base = (api_base or api_base_from_url(notion_url)).rstrip('/')
+        self.transport = transport or get_transport("notion")
+        self.bytes_transferred = 0
+        self.bytes_decoded = 0
+
+    def _sync_record_values(self, block_ids: List[str]) -> Dict[str, Dict]:
+        """一次请求读取多个块，返回 {块 ID: 块内容}"""
+        payload = {"requests": [{"pointer": {"table": "block", "id": block_id}, "version": -1}
+                                for block_id in block_ids]}
+        response = self.transport.request('POST', f"{self.api_base}/syncRecordValues", json=payload)
+        response.raise_for_status()
+        content = response.content
+        self.bytes_decoded += len(content)
+        self.bytes_transferred += self.transport.transferred_bytes(response) or len(content)
+
+        blocks = response.json().get('recordMap', {}).get('block', {})
+        values = {}
+        for block_id, entry in blocks.items():
+            value = _block_value(entry)
+            if value:
+                values[block_id] = value
+        return values
+
+    def iter_texts(self) -> Iterator[str]:
+        """
+        依次返回页面标题与各子块的文本；调用方找到所需内容后停止迭代即可不再请求后续块
+
+        Yields:
+            块文本
+        """
+        page = self._sync_record_values([self.page_id]).get(self.page_id)
+        if not page:
+            raise ValueError(f"Notion 接口未返回页面块: {self.page_id}")
+        yield block_text(page)
+
+        children = page.get('content', [])[:MAX_BLOCKS]
+        for i in range(0, len(children), BLOCK_BATCH):
+            batch = children[i:i + BLOCK_BATCH]
+            blocks = self._sync_record_values(batch)
+            for block_id in batch:
+                if block_id in blocks:
+                    yield block_text(blocks[block_id])
+
+    def extract(self, max_candidates: int = 1) -> 'ApiExtraction':
+        """
+        提取页面中的域名
+
+        Args:
+            max_candidates: 收集到这么多个不同的域名后停止读取
+
+        Returns:
+            提取结果
+        """
+        extraction = ApiExtraction()
+        self.bytes_transferred = self.bytes_decoded = 0
+        for text in self.iter_texts():
+            extraction.hasher.update(text.encode('utf-8'))
+            for domain in iter_domains(text):
+                if domain not in extraction.candidates:
+                    extraction.candidates.append(domain)
+            if len(extraction.candidates) >= max_candidates:
+                break
+        extraction.bytes_transferred = self.bytes_transferred
+        extraction.bytes_decoded = self.bytes_decoded
+        return extraction
+
+
+class ApiExtraction:
+    """接口提取结果"""
+
+    def __init__(self):
+        self.candidates: List[str] = []
+        self.hasher = hashlib.sha256()
+        self.bytes_transferred = 0
+        self.bytes_decoded = 0
+
+    @property
+    def domain(self) -> Optional[str]:
+        return self.candidates[0] if self.candidates else None
+
+    @property
+    def content_hash(self) -> str:
+        """已读取块文本的 SHA-256"""
+        return self.hasher.hexdigest()
+
+
+def _record_key(path: str, body: bytes) -> str:
+    """录制文件中的键：接口路径 + 规范化的请求体"""
+    try:
+        body = json.dumps(json.loads(body), sort_keys=True).encode('utf-8')
+    except ValueError:
+        pass
+    return f"{path} {hashlib.sha256(body).hexdigest()}"
+
+
+def record(notion_url: str, output: str):
+    """录制一次提取过程中的接口响应"""
+    fetcher = NotionApiFetcher(notion_url)
+    recorded: Dict[str, Any] = {}
+    original = fetcher.transport.request
+
+    def recording_request(method, url, **kwargs):
+        response = original(method, url, **kwargs)
+        body = json.dumps(kwargs.get('json')).encode('utf-8')
+        recorded[_record_key(urlparse(url).path, body)] = response.json()
+        return response
+
+    fetcher.transport.request = recording_request
+    try:
+        extraction = fetcher.extract(max_candidates=MAX_BLOCKS)
+    finally:
+        del fetcher.transport.request
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(recorded, f, ensure_ascii=False, indent=2)
+    print(f"已录制 {len(recorded)} 个响应到 {output}，候选域名: {extraction.candidates}")
+
+
+def serve(recording: str, port: int = 8765):
+    """在本地回放录制的接口响应（用于离线测试）"""
+    with open(recording, 'r', encoding='utf-8') as f:
+        recorded = json.load(f)
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            data = recorded.get(_record_key(urlparse(self.path).path, body))
+            payload = json.dumps(data if data is not None else {"recordMap": {}}).encode('utf-8')
+            self.send_response(200 if data is not None else 404)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+    server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+    print(f"回放服务器: http://127.0.0.1:{port}/api/v3（按 Ctrl+C 停止）")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+def main():
+    """命令行入口"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+
+    args = sys.argv[1:]
+    if len(args) >= 2 and args[0] == 'fetch':
+        fetcher = NotionApiFetcher(args[1], api_base=args[2] if len(args) > 2 else None)
+        extraction = fetcher.extract()
+        print(f"域名: {extraction.domain}（传输 {extraction.bytes_transferred} 字节，解码后 {extraction.bytes_decoded} 字节）")
+    elif len(args) == 3 and args[0] == 'record':
+        record(args[1], args[2])
+    elif len(args) >= 2 and args[0] == 'serve':
+        serve(args[1], int(args[2]) if len(args) > 2 else 8765)
+    else:
+        print(__doc__)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+自适应轮询调度
+- 来源稳定时逐步拉长检查间隔
+- 域名变化或抓取失败恢复后进入短间隔的突发检查
+- 抓取失败时指数退避
+- 所有间隔加入随机抖动，并受全局请求预算（令牌桶）约束
+"""
+
+import logging
+import math
+import random
+import threading
+import time
+from typing import Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+# 全局请求预算默认值：每个来源每小时 60 次（基础间隔更短时按间隔放大，见 default_budget），允许连续 10 次突发
+DEFAULT_BUDGET_PER_SOURCE = 60
+DEFAULT_BUDGET_PERIOD = 3600
+DEFAULT_BUDGET_BURST = 10
+
+# 稳定时每次检查后间隔乘以该系数，直到 max_interval
+DEFAULT_WIDEN_FACTOR = 1.25
+
+# 突发模式的检查次数
+DEFAULT_BURST_CHECKS = 6
+
+# 抖动比例（±10%）
+DEFAULT_JITTER = 0.1
+
+
+class RequestBudget:
+    """
+    全局请求预算（GCRA 令牌桶）
+
+    平均每 period 秒最多 max_requests 次请求，最多允许连续 burst 次请求不受间隔限制
+    """
+
+    def __init__(self, max_requests: int = DEFAULT_BUDGET_PER_SOURCE, period: float = DEFAULT_BUDGET_PERIOD,
+                 burst: int = DEFAULT_BUDGET_BURST):
+        """
+        Args:
+            max_requests: 每个周期允许的请求数
+            period: 周期（秒）
+            burst: 允许的突发请求数
+        """
+        self.max_requests = max_requests
+        self.period = period
+        self.burst = burst
+        self._emission = period / max_requests
+        self._tolerance = self._emission * (burst - 1)
+        self._tat = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self, at: float) -> float:
+        """
+        预约一次请求
+
+        Args:
+            at: 期望的请求时间（time.monotonic() 时间）
+
+        Returns:
+            预算允许的实际请求时间（不早于 at）
+        """
+        with self._lock:
+            allowed = max(at, self._tat - self._tolerance)
+            self._tat = max(self._tat, allowed) + self._emission
+            return allowed
+
+
+def default_budget(intervals: Iterable[float]) -> Dict:
+    """
+    按各来源的基础检查间隔推算默认的请求预算参数
+
+    每个来源每小时至少 DEFAULT_BUDGET_PER_SOURCE 次；基础间隔更短时按间隔放大，
+    用户配置的短间隔不会被默认预算悄悄拉长（突发检查由 burst 吸收）
+
+    Args:
+        intervals: 各来源的基础检查间隔（秒）
+
+    Returns:
+        RequestBudget 的构造参数
+    """
+    return {'max_requests': sum(max(DEFAULT_BUDGET_PER_SOURCE, math.ceil(DEFAULT_BUDGET_PERIOD / interval))
+                                for interval in intervals) or DEFAULT_BUDGET_PER_SOURCE}
+
+
+_budgets: Dict[str, RequestBudget] = {}
+_budgets_lock = threading.Lock()
+
+
+def get_budget(name: str = "default", options: Optional[Dict] = None) -> RequestBudget:
+    """
+    获取进程内共享的请求预算（同名只创建一次）
+
+    Args:
+        name: 预算名称（例如 "notion"）
+        options: 首次创建时使用的参数（max_requests / period / burst）
+
+    Returns:
+        共享的 RequestBudget
+    """
+    with _budgets_lock:
+        budget = _budgets.get(name)
+        if budget is None:
+            budget = _budgets[name] = RequestBudget(**(options or {}))
+        return budget
+
+
+class PollScheduler:
+    """单个来源的自适应轮询间隔"""
+
+    def __init__(self, base_interval: float = 300, min_interval: Optional[float] = None,
+                 max_interval: Optional[float] = None, widen_factor: float = DEFAULT_WIDEN_FACTOR,
+                 burst_interval: Optional[float] = None, burst_checks: int = DEFAULT_BURST_CHECKS,
+                 jitter: float = DEFAULT_JITTER, budget: Optional[RequestBudget] = None):
+        """
+        Args:
+            base_interval: 基础检查间隔（秒），即原来的 check_interval
+            min_interval: 最短间隔（默认 base_interval / 10，至少 10 秒）
+            max_interval: 最长间隔（默认 base_interval * 4）
+            widen_factor: 稳定时每次检查后间隔的放大系数
+            burst_interval: 突发模式的间隔（默认 min_interval）
+            burst_checks: 变化或失败恢复后突发检查的次数
+            jitter: 抖动比例
+            budget: 全局请求预算（可选）
+        """
+        self.base_interval = base_interval
+        self.min_interval = min_interval if min_interval is not None else max(base_interval / 10, 10)
+        self.max_interval = max_interval if max_interval is not None else base_interval * 4
+        self.widen_factor = widen_factor
+        self.burst_interval = burst_interval if burst_interval is not None else self.min_interval
+        self.burst_checks = burst_checks
+        self.jitter = jitter
+        self.budget = budget
+
+        self.interval = base_interval
+        self.failures = 0
+        self._burst_remaining = 0
+        self._budget_warned = False
+
+    @classmethod
+    def from_config(cls, base_interval: float, config: Optional[Dict] = None,
+                    budget: Optional[RequestBudget] = None) -> 'PollScheduler':
+        """
+        根据配置中的 polling 字段创建调度器
+
+        Args:
+            base_interval: 基础检查间隔（秒）
+            config: polling 配置（min_interval / max_interval / widen_factor / burst_interval /
+                    burst_checks / jitter）
+            budget: 全局请求预算
+        """
+        return cls(base_interval, budget=budget, **(config or {}))
+
+    def _plan(self, changed: bool, failed: bool) -> float:
+        """根据本次检查结果计算下一次的基础间隔（未加抖动）"""
+        if failed:
+            # 失败时从最短间隔开始指数退避
+            self.failures += 1
+            return min(self.min_interval * (2 ** (self.failures - 1)), self.max_interval)
+
+        if changed or self.failures:
+            # 域名刚变化（常会很快再次变化）或失败刚恢复（期间可能错过变化）：进入突发模式
+            reason = "域名变化" if changed else f"连续 {self.failures} 次失败后恢复"
+            logger.info(f"{reason}，接下来 {self.burst_checks} 次检查间隔缩短为 {self.burst_interval:g} 秒")
+            self.failures = 0
+            self._burst_remaining = self.burst_checks
+            self.interval = self.base_interval
+
+        if self._burst_remaining > 0:
+            self._burst_remaining -= 1
+            return self.burst_interval
+
+        # 来源稳定：逐步拉长间隔
+        interval = self.interval
+        self.interval = min(self.interval * self.widen_factor, self.max_interval)
+        return interval
+
+    def _finalize(self, delay: float) -> float:
+        """加入抖动并按全局预算推迟"""
+        if self.jitter:
+            delay *= random.uniform(1 - self.jitter, 1 + self.jitter)
+        if self.budget is None:
+            return delay
+
+        now = time.monotonic()
+        allowed = self.budget.reserve(now + delay) - now
+        if allowed > delay + 1:
+            if not self._budget_warned:
+                # 第一次被推迟时警告并说明如何调整，之后只记录 info
+                self._budget_warned = True
+                logger.warning(f"请求预算（每 {self.budget.period:g} 秒 {self.budget.max_requests} 次）"
+                               f"不足以按计划的间隔检查，下次检查从 {delay:.0f} 秒推迟到 {allowed:.0f} 秒后；"
+                               f"可在配置中调大 request_budget.max_requests")
+            else:
+                logger.info(f"全局请求预算已用尽，下次检查推迟到 {allowed:.0f} 秒后（计划 {delay:.0f} 秒）")
+        return allowed
+
+    def first_delay(self, max_stagger: float = 0) -> float:
+        """
+        首次检查前的等待时间（随机错开，并预约预算）
+
+        Args:
+            max_stagger: 最大随机错开时间（秒）
+        """
+        delay = random.uniform(0, max_stagger) if max_stagger else 0.0
+        if self.budget is None:
+            return delay
+        now = time.monotonic()
+        return self.budget.reserve(now + delay) - now
+
+    def next_delay(self, changed: bool = False, failed: bool = False) -> float:
+        """
+        记录本次检查结果，返回到下一次检查的等待时间
+
+        Args:
+            changed: 本次检查发现了变化
+            failed: 本次检查失败
+
+        Returns:
+            等待时间（秒）
+        """
+        return self._finalize(self._plan(changed, failed))
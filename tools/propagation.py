@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+变化传播管道
+检测到新域名后，把它并发推送到多个目标（Cloudflare、站点文件、git、Webhook 等）。
+每个目标有独立的超时与状态，可以声明依赖（例如 git 依赖文件改写），
+互不依赖的目标同时进行，Cloudflare 301 不必等待磁盘和 git I/O
+"""
+
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+# 默认单个目标的超时（秒）
+DEFAULT_SINK_TIMEOUT = 60
+
+# 目标状态
+STATUS_OK = 'ok'            # 已执行并产生了变化
+STATUS_NOOP = 'noop'        # 已执行，但没有需要变化的内容（返回假值）
+STATUS_FAILED = 'failed'    # 抛出异常
+STATUS_TIMEOUT = 'timeout'  # 超时（线程无法中断，会在后台继续运行）
+STATUS_SKIPPED = 'skipped'  # 依赖未产生变化或上一次仍在运行，未执行
+
+
+class Sink:
+    """传播目标"""
+
+    def __init__(self, name: str, func: Callable[[Any], Any], timeout: float = DEFAULT_SINK_TIMEOUT,
+                 depends_on: Iterable[str] = ()):
+        """
+        Args:
+            name: 目标名称
+            func: 执行函数 func(新值)，返回真值表示产生了变化，抛出异常表示失败
+            timeout: 超时（秒）
+            depends_on: 依赖的目标名称；所有依赖都产生变化（STATUS_OK）后才执行
+        """
+        self.name = name
+        self.func = func
+        self.timeout = timeout
+        self.depends_on = list(depends_on)
+        self._future: Optional[Future] = None
+
+    @property
+    def busy(self) -> bool:
+        """上一次执行（例如超时后）是否仍在运行"""
+        return self._future is not None and not self._future.done()
+
+
+class SinkResult:
+    """单个目标的执行结果"""
+
+    def __init__(self, name: str, status: str, elapsed: float = 0.0,
+                 value: Any = None, error: Optional[str] = None):
+        self.name = name
+        self.status = status
+        self.elapsed = elapsed
+        self.value = value
+        self.error = error
+
+    def __repr__(self) -> str:
+        return f"SinkResult({self.name}, {self.status}, {self.elapsed * 1000:.1f}ms)"
+
+
+class PropagationResult:
+    """一次传播的汇总结果"""
+
+    def __init__(self):
+        self.results: Dict[str, SinkResult] = {}
+        self.elapsed = 0.0
+
+    @property
+    def changed(self) -> bool:
+        """是否有目标产生了变化"""
+        return any(r.status == STATUS_OK for r in self.results.values())
+
+    @property
+    def ok(self) -> bool:
+        """是否没有目标失败或超时"""
+        return all(r.status not in (STATUS_FAILED, STATUS_TIMEOUT) for r in self.results.values())
+
+    def status(self, name: str) -> Optional[str]:
+        """指定目标的状态"""
+        result = self.results.get(name)
+        return result.status if result else None
+
+    def summary(self) -> str:
+        return '，'.join(f"{r.name} {r.status} {r.elapsed * 1000:.0f}ms" for r in self.results.values())
+
+
+class PropagationPipeline:
+    """并发执行传播目标"""
+
+    def __init__(self, sinks: Iterable[Sink] = (), max_workers: int = 4):
+        """
+        Args:
+            sinks: 传播目标
+            max_workers: 线程池大小
+        """
+        self.sinks: Dict[str, Sink] = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='propagate')
+        for sink in sinks:
+            self.add_sink(sink)
+
+    def add_sink(self, sink: Sink):
+        """添加传播目标（依赖的目标必须先添加）"""
+        if sink.name in self.sinks:
+            raise ValueError(f"重复的传播目标: {sink.name}")
+        missing = [d for d in sink.depends_on if d not in self.sinks]
+        if missing:
+            raise ValueError(f"传播目标 {sink.name} 依赖未知的目标: {', '.join(missing)}")
+        self.sinks[sink.name] = sink
+
+    def run(self, value: Any) -> PropagationResult:
+        """
+        把新值推送到所有目标，等待全部完成、失败或超时
+
+        Args:
+            value: 新值（例如新链接）
+
+        Returns:
+            汇总结果
+        """
+        result = PropagationResult()
+        started = time.perf_counter()
+        running: Dict[Future, Sink] = {}
+        deadlines: Dict[Future, float] = {}
+        starts: Dict[str, float] = {}
+
+        def finish(sink: Sink, status: str, value: Any = None, error: Optional[str] = None):
+            elapsed = time.perf_counter() - starts[sink.name] if sink.name in starts else 0.0
+            result.results[sink.name] = SinkResult(sink.name, status, elapsed, value, error)
+            log = logger.info if status in (STATUS_OK, STATUS_NOOP, STATUS_SKIPPED) else logger.error
+            log(f"传播目标 {sink.name}: {status}（{elapsed * 1000:.1f} ms）" + (f": {error}" if error else ""))
+
+        def schedule():
+            """启动依赖已满足的目标，跳过依赖未产生变化的目标"""
+            progress = True
+            while progress:
+                progress = False
+                for sink in self.sinks.values():
+                    if sink.name in result.results or sink.name in starts:
+                        continue
+                    states = [result.status(d) for d in sink.depends_on]
+                    if any(s is None for s in states):
+                        continue
+                    if any(s != STATUS_OK for s in states):
+                        finish(sink, STATUS_SKIPPED, error="依赖未产生变化")
+                    elif sink.busy:
+                        finish(sink, STATUS_SKIPPED, error="上一次执行仍在运行")
+                    else:
+                        starts[sink.name] = time.perf_counter()
+                        future = sink._future = self._executor.submit(sink.func, value)
+                        running[future] = sink
+                        deadlines[future] = starts[sink.name] + sink.timeout
+                        continue
+                    progress = True
+
+        schedule()
+        while running:
+            timeout = max(0.0, min(deadlines.values()) - time.perf_counter())
+            done, _ = wait(list(running), timeout=timeout, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                sink = running.pop(future)
+                deadlines.pop(future)
+                error = future.exception()
+                if error is not None:
+                    finish(sink, STATUS_FAILED, error=str(error))
+                else:
+                    ret = future.result()
+                    finish(sink, STATUS_OK if ret else STATUS_NOOP, ret)
+
+            now = time.perf_counter()
+            for future in [f for f, deadline in deadlines.items() if deadline <= now and f not in done]:
+                sink = running.pop(future)
+                deadlines.pop(future)
+                finish(sink, STATUS_TIMEOUT, error=f"超过 {sink.timeout:g} 秒")
+
+            schedule()
+
+        # 按目标添加顺序排列
+        result.results = {name: result.results[name] for name in self.sinks}
+        result.elapsed = time.perf_counter() - started
+        logger.info(f"传播完成（{result.elapsed * 1000:.1f} ms）: {result.summary()}")
+        return result
+
+    def close(self):
+        """关闭线程池（不等待超时后仍在运行的目标）"""
+        self._executor.shutdown(wait=False)
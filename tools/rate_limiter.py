@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+API 客户端限流
+- 令牌桶：同一进程内所有调用方共享，按 API 允许的最大速率排队发送请求
+- 收到 429 时按 Retry-After 暂停整个桶，而不是各自重试
+- 相同的并发 GET 请求合并为一次
+- 记录排队等待时间等指标
+"""
+
+import copy
+import email.utils
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Cloudflare API 默认限制：每个用户每 5 分钟 1200 次请求
+DEFAULT_MAX_REQUESTS = 1200
+DEFAULT_PERIOD = 300
+
+# 允许连续发送的请求数
+DEFAULT_BURST = 10
+
+# 没有 Retry-After 时 429 后的暂停时间（秒）
+DEFAULT_RETRY_AFTER = 5.0
+
+# 单次 Retry-After 暂停的上限（秒）
+MAX_RETRY_AFTER = 300.0
+
+
+def parse_retry_after(value: Optional[str], default: float = DEFAULT_RETRY_AFTER) -> float:
+    """
+    解析 Retry-After 头（秒数或 HTTP 日期）
+
+    Args:
+        value: 头的值
+        default: 缺失或无法解析时的暂停时间
+
+    Returns:
+        暂停时间（秒，不超过 MAX_RETRY_AFTER）
+    """
+    if not value:
+        return default
+    value = value.strip()
+    try:
+        delay = float(value)
+    except ValueError:
+        try:
+            delay = email.utils.parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return default
+    return min(max(delay, 0.0), MAX_RETRY_AFTER)
+
+
+class _Call:
+    """进行中的请求（供合并的调用方等待）"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class RateLimiter:
+    """
+    共享令牌桶限流器
+
+    平均每 period 秒最多 max_requests 次请求，最多允许连续 burst 次；
+    调用方按到达顺序预约发送时间，pause() 使所有后续请求等待到指定时间之后
+    """
+
+    def __init__(self, max_requests: int = DEFAULT_MAX_REQUESTS, period: float = DEFAULT_PERIOD,
+                 burst: int = DEFAULT_BURST):
+        """
+        Args:
+            max_requests: 每个周期允许的请求数
+            period: 周期（秒）
+            burst: 允许的突发请求数
+        """
+        self.max_requests = max_requests
+        self.period = period
+        self.burst = burst
+        self._emission = period / max_requests
+        self._tolerance = self._emission * (burst - 1)
+        self._tat = 0.0
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+        # 指标
+        self.requests = 0
+        self.throttled = 0
+        self.throttled_seconds = 0.0
+        self.rate_limited = 0
+        self.coalesced = 0
+
+    def acquire(self) -> float:
+        """
+        等待到允许发送下一个请求
+
+        Returns:
+            本次等待的时间（秒）
+        """
+        started = time.monotonic()
+        with self._lock:
+            allowed = max(started, self._tat - self._tolerance, self._paused_until)
+            self._tat = max(self._tat, allowed) + self._emission
+            self.requests += 1
+
+        while True:
+            delay = allowed - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            # 等待期间可能收到了 429，再次检查暂停时间
+            with self._lock:
+                allowed = self._paused_until
+            if allowed <= time.monotonic():
+                break
+
+        waited = time.monotonic() - started
+        if waited > 0.001:
+            with self._lock:
+                self.throttled += 1
+                self.throttled_seconds += waited
+            if waited >= 1:
+                logger.info(f"请求因限流排队 {waited:.1f} 秒")
+        return waited
+
+    def pause(self, seconds: float):
+        """
+        收到 429 后暂停所有请求
+
+        Args:
+            seconds: 暂停时间（秒）
+        """
+        until = time.monotonic() + seconds
+        with self._lock:
+            self.rate_limited += 1
+            if until > self._paused_until:
+                self._paused_until = until
+                # 暂停结束后从空桶开始，避免排队的请求同时涌出
+                self._tat = max(self._tat, until)
+        logger.warning(f"API 限流（429），所有请求暂停 {seconds:.1f} 秒")
+
+    def coalesce(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        """
+        合并相同的并发调用：同一 key 的调用进行中时，后来的调用方等待其结果而不重复请求
+
+        Args:
+            key: 调用的标识（例如 (token, URL)）
+            func: 实际执行的函数
+
+        Returns:
+            func 的返回值（合并的调用方得到深拷贝，可以直接修改）
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                call.waiters += 1
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result)
+
+        result = None
+        try:
+            result = func()
+            return result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                waiters = call.waiters
+            if waiters and call.error is None:
+                # 留一份副本给合并的调用方，调用方修改返回值互不影响
+                call.result = copy.deepcopy(result)
+            call.done.set()
+
+    def metrics(self) -> Dict[str, Any]:
+        """限流指标"""
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'throttled': self.throttled,
+                'throttled_seconds': round(self.throttled_seconds, 3),
+                'rate_limited': self.rate_limited,
+                'coalesced': self.coalesced,
+                'paused_for': round(max(0.0, self._paused_until - time.monotonic()), 3),
+            }
+
+
+_limiters: Dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(name: str = "default", options: Optional[Dict] = None) -> RateLimiter:
+    """
+    获取进程内共享的限流器（同名只创建一次）
+
+    Args:
+        name: 限流器名称（例如 "cloudflare"）
+        options: 首次创建时使用的参数（max_requests / period / burst）
+
+    Returns:
+        共享的 RateLimiter
+    """
+    with _limiters_lock:
+        limiter = _limiters.get(name)
+        if limiter is None:
+            limiter = _limiters[name] = RateLimiter(**(options or {}))
+        return limiter
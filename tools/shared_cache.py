@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+进程间共享的抓取缓存与单飞（single-flight）协调
+domain_monitor.py 与 link_updater.py 在同一台主机上运行时：
+- 同一 Notion 来源在 TTL 内只抓取一次，其他进程直接复用磁盘上的结果
+- 同一个 Cloudflare 写入在时间窗口内只执行一次
+并发的进程通过文件锁排队，拿到锁后先检查其他进程是否已经完成了同样的工作
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from file_rewriter import atomic_write_text
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+logger = logging.getLogger(__name__)
+
+# 默认缓存目录
+DEFAULT_CACHE_DIR = Path(__file__).parent / 'shared_cache'
+
+# 抓取结果默认有效期（秒）
+DEFAULT_FETCH_TTL = 60
+
+# 相同写入的默认去重窗口（秒）
+DEFAULT_WRITE_WINDOW = 120
+
+# 等待文件锁的默认超时（秒）
+DEFAULT_LOCK_TIMEOUT = 120
+
+# 未能立即获得锁时的重试间隔（秒）
+LOCK_POLL_INTERVAL = 0.05
+
+
+class FileLock:
+    """跨进程的排他文件锁（Unix 使用 fcntl.flock，Windows 使用 msvcrt.locking）"""
+
+    def __init__(self, path: Path, timeout: float = DEFAULT_LOCK_TIMEOUT):
+        """
+        Args:
+            path: 锁文件路径
+            timeout: 等待锁的超时（秒）
+        """
+        self.path = Path(path)
+        self.timeout = timeout
+        self._fd: Optional[int] = None
+
+    def _try_lock(self, fd: int) -> bool:
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            elif msvcrt is not None:
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            return False
+
+    def acquire(self):
+        """获取锁，超时抛出 TimeoutError"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(str(self.path), os.O_RDWR | os.O_CREAT, 0o644)
+        deadline = time.monotonic() + self.timeout
+        while not self._try_lock(fd):
+            if time.monotonic() >= deadline:
+                os.close(fd)
+                raise TimeoutError(f"等待文件锁超时: {self.path}")
+            time.sleep(LOCK_POLL_INTERVAL)
+        self._fd = fd
+
+    def release(self):
+        """释放锁"""
+        if self._fd is None:
+            return
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            elif msvcrt is not None:
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self) -> 'FileLock':
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class SharedCache:
+    """磁盘上的共享缓存（每个 key 一个 JSON 文件和一个锁文件）"""
+
+    def __init__(self, directory: Path = DEFAULT_CACHE_DIR, ttl: float = DEFAULT_FETCH_TTL,
+                 write_window: float = DEFAULT_WRITE_WINDOW, lock_timeout: float = DEFAULT_LOCK_TIMEOUT):
+        """
+        Args:
+            directory: 缓存目录
+            ttl: 抓取结果有效期（秒）
+            write_window: 相同写入的去重窗口（秒）
+            lock_timeout: 等待文件锁的超时（秒）
+        """
+        self.directory = Path(directory)
+        self.ttl = ttl
+        self.write_window = write_window
+        self.lock_timeout = lock_timeout
+
+    def _paths(self, key: str) -> Tuple[Path, Path]:
+        """key 对应的数据文件与锁文件"""
+        digest = hashlib.sha256(key.encode('utf-8')).hexdigest()[:32]
+        return self.directory / f"{digest}.json", self.directory / f"{digest}.lock"
+
+    def _read(self, path: Path, max_age: float) -> Optional[dict]:
+        """读取未过期的记录"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                record = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if time.time() - record.get('stored_at', 0) >= max_age:
+            return None
+        return record
+
+    def _write(self, path: Path, key: str, value: Any, token: Optional[str] = None):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        atomic_write_text(path, json.dumps({'key': key, 'token': token, 'stored_at': time.time(),
+                                            'pid': os.getpid(), 'value': value}, ensure_ascii=False))
+
+    def _foreign(self, key: str, max_age: float) -> Optional[Any]:
+        """其他进程写入的未过期值（本进程自己的结果由各自的条件请求缓存负责，不在这里复用）"""
+        record = self._read(self._paths(key)[0], max_age)
+        if record is None or record.get('pid') == os.getpid():
+            return None
+        return record.get('value')
+
+    def get(self, key: str, max_age: Optional[float] = None) -> Optional[Any]:
+        """
+        读取未过期的缓存值
+
+        Args:
+            key: 缓存键
+            max_age: 最大有效期（默认 ttl）
+
+        Returns:
+            缓存值，不存在或已过期时返回 None
+        """
+        record = self._read(self._paths(key)[0], self.ttl if max_age is None else max_age)
+        return record.get('value') if record else None
+
+    def fetch(self, key: str, func: Callable[[], Any]) -> Any:
+        """
+        单飞抓取：TTL 内复用其他进程的结果；否则加锁后再次检查，仍无结果时才调用 func
+
+        func 返回 None 表示抓取失败，不写入缓存
+
+        Args:
+            key: 缓存键（例如 notion_key(URL)）
+            func: 实际的抓取函数（返回值需可 JSON 序列化）
+
+        Returns:
+            抓取结果
+        """
+        value = self._foreign(key, self.ttl)
+        if value is not None:
+            logger.info(f"复用其他进程的抓取结果: {key}")
+            return value
+
+        data_path, lock_path = self._paths(key)
+        with FileLock(lock_path, self.lock_timeout):
+            # 等锁期间其他进程可能已完成抓取
+            value = self._foreign(key, self.ttl)
+            if value is not None:
+                logger.info(f"其他进程刚完成抓取，复用结果: {key}")
+                return value
+            value = func()
+            if value is not None:
+                self._write(data_path, key, value)
+            return value
+
+    def run_once(self, key: str, token: str, func: Callable[[], Any],
+                 window: Optional[float] = None) -> Tuple[bool, Any]:
+        """
+        写入去重：window 内已有进程对同一 key 执行过相同 token 的写入时跳过
+
+        Args:
+            key: 写入对象（例如 "cloudflare:<zone>:<rule>"）
+            token: 写入内容（例如目标 URL）；同一对象写入了不同内容后，之前的记录不再用于去重
+            func: 实际的写入函数（返回值需可 JSON 序列化），抛出异常时不记录
+            window: 去重窗口（秒，默认 write_window）
+
+        Returns:
+            (是否执行了 func, func 的返回值或上次记录的返回值)
+        """
+        window = self.write_window if window is None else window
+        data_path, lock_path = self._paths(key)
+        with FileLock(lock_path, self.lock_timeout):
+            record = self._read(data_path, window)
+            if record is not None and record.get('token') == token:
+                logger.info(f"相同的写入已由进程 {record.get('pid')} 完成，跳过: {key}")
+                return False, record.get('value')
+            value = func()
+            self._write(data_path, key, value, token)
+            return True, value
+
+
+def notion_key(notion_url: str) -> str:
+    """Notion 来源的抓取缓存键（值为提取到的基础域名）"""
+    return f"notion:{notion_url}"
+
+
+_caches: Dict[Path, SharedCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_shared_cache(options: Optional[dict] = None) -> SharedCache:
+    """
+    获取进程内共享的 SharedCache（按目录复用）
+
+    Args:
+        options: 构造参数（directory / ttl / write_window / lock_timeout）
+
+    Returns:
+        SharedCache 实例
+    """
+    options = dict(options or {})
+    directory = Path(options.pop('directory', DEFAULT_CACHE_DIR))
+    if not directory.is_absolute():
+        directory = Path(__file__).parent / directory
+    with _caches_lock:
+        cache = _caches.get(directory)
+        if cache is None:
+            cache = _caches[directory] = SharedCache(directory, **options)
+        return cache
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""测试公共设施：tools 下的模块是平铺的脚本，测试时把 tools 目录加入导入路径；假的 Cloudflare API 传输"""
+
+import sys
+from pathlib import Path
+
+import pytest
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+API_BASE = 'https://api.cloudflare.com/client/v4'
+
+
+class FakeResponse:
+    """requests.Response 的最小替身"""
+
+    def __init__(self, status_code: int, body: dict, headers: dict = None):
+        self.status_code = status_code
+        self._body = body
+        self.headers = headers or {}
+
+    def json(self):
+        return self._body
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} Error", response=self)
+
+
+class FakeCloudflare:
+    """
+    按 (方法, 路径) 路由的假 Cloudflare API 传输
+
+    routes 的值可以是结果对象（返回 200 + success），也可以是 handler(json) -> (状态码, 结果[, result_info])；
+    未注册的路由返回 404。calls 按顺序记录 (方法, 路径, 请求体)
+    """
+
+    def __init__(self):
+        self.routes = {}
+        self.calls = []
+
+    def request(self, method, url, headers=None, json=None, **kwargs):
+        path = url[len(API_BASE):]
+        self.calls.append((method, path, json))
+        route = self.routes.get((method, path))
+        if route is None:
+            return FakeResponse(404, {'success': False, 'errors': [{'message': 'not found'}]})
+        status, result, *info = route(json) if callable(route) else (200, route)
+        body = {'success': status < 400, 'result': result, 'errors': []}
+        if info:
+            body['result_info'] = info[0]
+        return FakeResponse(status, body)
+
+    def methods(self):
+        return [(method, path) for method, path, _ in self.calls]
+
+
+@pytest.fixture
+def cf_api():
+    return FakeCloudflare()
+
+
+@pytest.fixture
+def make_updater(cf_api):
+    """创建使用假传输、独立缓存与不限速限流器的 CloudflareUpdater"""
+    from cloudflare_updater import CloudflareUpdater, RulesetCache
+    from rate_limiter import RateLimiter
+
+    def make(**kwargs):
+        kwargs.setdefault('rule_id', 'rule1')
+        kwargs.setdefault('ruleset_cache', RulesetCache())
+        return CloudflareUpdater('token', 'zone1', transport=cf_api,
+                                 rate_limiter=RateLimiter(max_requests=10 ** 6, period=1, burst=10 ** 6),
+                                 **kwargs)
+
+    return make
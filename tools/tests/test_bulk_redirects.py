@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""BulkRedirectList：规则创建、分页与同步方式"""
+
+from cloudflare_updater import BulkRedirectList
+
+ENTRYPOINT = '/accounts/acc/rulesets/phases/http_request_redirect/entrypoint'
+LISTS = '/accounts/acc/rules/lists'
+
+
+def _bulk(make_updater, cf_api):
+    cf_api.routes[('GET', LISTS)] = [{'id': 'list1', 'name': 'join_links'}]
+    return BulkRedirectList(make_updater(), 'acc', 'join_links')
+
+
+def test_ensure_rule_appends_without_rewriting_other_rules(make_updater, cf_api):
+    other = {'id': 'keep1', 'action': 'redirect', 'expression': 'true', 'enabled': True}
+    cf_api.routes[('GET', ENTRYPOINT)] = {'id': 'rs1', 'rules': [other]}
+    cf_api.routes[('POST', '/accounts/acc/rulesets/rs1/rules')] = {'id': 'rs1'}
+
+    assert _bulk(make_updater, cf_api).ensure_rule() is True
+    assert ('PUT', ENTRYPOINT) not in cf_api.methods()
+    method, path, body = cf_api.calls[-1]
+    assert (method, path) == ('POST', '/accounts/acc/rulesets/rs1/rules')
+    assert body['action_parameters']['from_list']['name'] == 'join_links'
+
+
+def test_ensure_rule_creates_entrypoint_and_skips_existing(make_updater, cf_api):
+    bulk = _bulk(make_updater, cf_api)
+    cf_api.routes[('PUT', ENTRYPOINT)] = {'id': 'rs1'}
+    assert bulk.ensure_rule() is True
+    assert cf_api.calls[-1][0] == 'PUT' and len(cf_api.calls[-1][2]['rules']) == 1
+
+    cf_api.routes[('GET', ENTRYPOINT)] = {'id': 'rs1', 'rules': [cf_api.calls[-1][2]['rules'][0]]}
+    assert bulk.ensure_rule() is False
+
+
+def test_list_items_encodes_cursor(make_updater, cf_api):
+    items = f'{LISTS}/list1/items'
+    cf_api.routes[('GET', items)] = lambda _: (
+        200, [{'id': 'i1', 'redirect': {'source_url': 'a.com/1'}}], {'cursors': {'after': 'a+b/c=='}})
+    cf_api.routes[('GET', f'{items}?cursor=a%2Bb%2Fc%3D%3D')] = [{'id': 'i2', 'redirect': {'source_url': 'a.com/2'}}]
+
+    assert set(_bulk(make_updater, cf_api).list_items()) == {'a.com/1', 'a.com/2'}
+
+
+def test_sync_replaces_atomically_when_targets_change(make_updater, cf_api):
+    items = f'{LISTS}/list1/items'
+    cf_api.routes[('GET', items)] = [
+        {'id': 'i1', 'redirect': {'source_url': 'a.com/1', 'target_url': 'https://old.com', 'status_code': 301}},
+    ]
+    cf_api.routes[('PUT', items)] = {'operation_id': 'op1'}
+    cf_api.routes[('GET', f'{LISTS}/bulk_operations/op1')] = {'status': 'completed'}
+    bulk = _bulk(make_updater, cf_api)
+
+    stats = bulk.point_all(['a.com/1', 'a.com/2'], 'https://new.com')
+
+    assert stats == {'added': 2, 'deleted': 1, 'unchanged': 0}
+    puts = [body for method, path, body in cf_api.calls if method == 'PUT']
+    assert len(puts) == 1 and {i['redirect']['source_url'] for i in puts[0]} == {'a.com/1', 'a.com/2'}
+    assert not [c for c in cf_api.calls if c[0] in ('POST', 'DELETE')]
+
+
+def test_sync_appends_new_items_in_batches(make_updater, cf_api):
+    items = f'{LISTS}/list1/items'
+    cf_api.routes[('GET', items)] = []
+    cf_api.routes[('POST', items)] = {}
+    bulk = _bulk(make_updater, cf_api)
+    bulk.batch_size = 2
+
+    stats = bulk.point_all([f'a.com/{i}' for i in range(5)], 'https://new.com')
+
+    assert stats['added'] == 5
+    assert [len(body) for method, path, body in cf_api.calls if method == 'POST'] == [2, 2, 1]
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""CloudflareUpdater：规则集缓存、单条规则 PATCH、跳过写入与 405 回退"""
+
+import copy
+
+import pytest
+import requests
+
+from cloudflare_updater import RulesetCache
+
+RULESETS = '/zones/zone1/rulesets'
+RULESET = '/zones/zone1/rulesets/rs1'
+RULE = '/zones/zone1/rulesets/rs1/rules/rule1'
+
+
+def _rule(rule_id, target):
+    return {
+        'id': rule_id, 'action': 'redirect', 'expression': f'http.host eq "{rule_id}.com"', 'enabled': True,
+        'action_parameters': {'from_value': {'status_code': 301, 'target_url': {'value': target}}},
+        'version': '1', 'last_updated': '2026-01-01T00:00:00Z',
+    }
+
+
+@pytest.fixture
+def ruleset(cf_api):
+    """rs1 包含 rule1 与 other 两条规则；PATCH / PUT 会修改并返回它"""
+    state = {'id': 'rs1', 'phase': 'http_request_redirect', 'version': '1',
+             'rules': [_rule('rule1', 'https://old.com/join/1'), _rule('other', 'https://other.com')]}
+
+    def patch(body):
+        for i, rule in enumerate(state['rules']):
+            if rule['id'] == 'rule1':
+                state['rules'][i] = dict(body, id='rule1')
+        state['version'] = str(int(state['version']) + 1)
+        return 200, copy.deepcopy(state)
+
+    def put(body):
+        state['rules'] = copy.deepcopy(body['rules'])
+        state['version'] = str(int(state['version']) + 1)
+        return 200, copy.deepcopy(state)
+
+    cf_api.routes[('GET', RULESETS)] = [{'id': 'rs1', 'phase': 'http_request_redirect'}]
+    cf_api.routes[('GET', RULESET)] = lambda _: (200, copy.deepcopy(state))
+    cf_api.routes[('PATCH', RULE)] = patch
+    cf_api.routes[('PUT', RULESET)] = put
+    return state
+
+
+def test_ruleset_id_outlives_content_ttl(make_updater, cf_api, ruleset, monkeypatch):
+    cache = RulesetCache(ttl=300)
+    updater = make_updater(ruleset_cache=cache)
+    updater.get_redirect_ruleset()
+    assert cf_api.methods() == [('GET', RULESETS), ('GET', RULESET)]
+
+    # 内容过期后只重新读取规则集，不再列出 zone 的规则集
+    monkeypatch.setattr(cache, '_fresh', lambda stored_at: False)
+    cf_api.calls.clear()
+    updater.get_redirect_ruleset()
+    assert cf_api.methods() == [('GET', RULESET)]
+
+
+def test_ruleset_id_is_dropped_only_on_404(make_updater, cf_api, ruleset):
+    cache = RulesetCache()
+    updater = make_updater(ruleset_cache=cache)
+    updater.get_redirect_ruleset()
+
+    cf_api.routes[('GET', RULESET)] = lambda _: (500, None)
+    with pytest.raises(requests.HTTPError):
+        updater.get_redirect_ruleset(use_cache=False)
+    assert cache.get_id('zone1', 'http_request_redirect') == 'rs1'
+    assert cache.get_ruleset('zone1', 'http_request_redirect') is None
+
+    cf_api.routes[('GET', RULESET)] = lambda _: (404, None)
+    with pytest.raises(requests.HTTPError):
+        updater.get_redirect_ruleset(use_cache=False)
+    assert cache.get_id('zone1', 'http_request_redirect') is None
+
+
+def test_update_patches_single_rule_when_ruleset_is_cached(make_updater, cf_api, ruleset):
+    updater = make_updater()
+    updater.get_redirect_ruleset()
+    cf_api.calls.clear()
+
+    result = updater.update_redirect_rule('rule1', 'https://new.com/join/1')
+
+    assert cf_api.methods() == [('PATCH', RULE)]
+    body = cf_api.calls[0][2]
+    assert body['action_parameters']['from_value']['target_url']['value'] == 'https://new.com/join/1'
+    assert 'id' not in body and 'version' not in body
+    assert result['skipped'] is False and result['version'] == '2'
+    # 返回的规则集写回缓存，下次更新无需重新读取
+    cf_api.calls.clear()
+    assert updater.update_redirect_rule('rule1', 'https://new.com/join/1')['skipped'] is True
+    assert cf_api.calls == []
+
+
+def test_update_skips_rule_already_pointing_at_target(make_updater, cf_api, ruleset):
+    updater = make_updater()
+    result = updater.update_redirect_rule('rule1', 'https://old.com/join/1')
+    assert result['skipped'] is True
+    assert [method for method, _ in cf_api.methods()] == ['GET', 'GET']
+
+    # 源模式不同时仍然写入
+    cf_api.calls.clear()
+    updater.update_redirect_rule('rule1', 'https://old.com/join/1', source_url_pattern='http.host eq "x.com"')
+    assert cf_api.methods() == [('PATCH', RULE)]
+
+
+def test_patch_405_falls_back_to_fresh_put(make_updater, cf_api, ruleset):
+    updater = make_updater()
+    updater.get_redirect_ruleset()
+    # 缓存之后其他人修改了另一条规则
+    ruleset['rules'][1] = _rule('other', 'https://edited.com')
+    cf_api.routes[('PATCH', RULE)] = lambda _: (405, None)
+    cf_api.calls.clear()
+
+    result = updater.update_redirect_rule('rule1', 'https://new.com/join/1')
+
+    assert cf_api.methods() == [('PATCH', RULE), ('GET', RULESET), ('PUT', RULESET)]
+    assert updater.patch_rules is False
+    assert result['skipped'] is False
+    targets = {rule['id']: rule['action_parameters']['from_value']['target_url']['value']
+               for rule in ruleset['rules']}
+    assert targets == {'rule1': 'https://new.com/join/1', 'other': 'https://edited.com'}
+
+    # 之后的更新直接读取最新规则集并提交整个规则集
+    cf_api.calls.clear()
+    updater.update_redirect_rule('rule1', 'https://newer.com/join/1')
+    assert cf_api.methods() == [('GET', RULESET), ('PUT', RULESET)]
+
+
+def test_failed_patch_with_stale_cache_retries_after_refresh(make_updater, cf_api, ruleset):
+    updater = make_updater()
+    updater.get_redirect_ruleset()
+    original_patch = cf_api.routes[('PATCH', RULE)]
+    attempts = []
+
+    def patch(body):
+        attempts.append(body)
+        return (409, None) if len(attempts) == 1 else original_patch(body)
+
+    cf_api.routes[('PATCH', RULE)] = patch
+    cf_api.calls.clear()
+
+    result = updater.update_redirect_rule('rule1', 'https://new.com/join/1')
+
+    assert cf_api.methods() == [('PATCH', RULE), ('GET', RULESET), ('PATCH', RULE)]
+    assert result['skipped'] is False
+    assert updater.patch_rules is True
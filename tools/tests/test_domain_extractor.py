@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""合并后的 DOMAIN_PATTERN 与流式提取器：结果与原先的三个正则一致"""
+
+import hashlib
+import random
+import re
+
+import pytest
+
+from domain_extractor import StreamingDomainExtractor, extract_domain, iter_domains
+
+# 原先 DomainMonitor.extract_domain_from_notion 中的三个正则
+LEGACY_PATTERNS = [
+    r'(https?://)?(?:www\.)?([a-zA-Z0-9-]+\.com)(?:/join)?',
+    r'(https?://(?:www\.)?[a-zA-Z0-9-]+\.com)(?:/join)?',
+    r'(?:域名|网址|链接|URL|Domain)[:：\s]*([a-zA-Z0-9-]+\.com)',
+]
+
+
+def legacy_extract(content):
+    """原先的实现：逐个模式 findall，取第一个结果"""
+    for pattern in LEGACY_PATTERNS:
+        for match in re.findall(pattern, content, re.IGNORECASE):
+            domain = match
+            if isinstance(match, tuple):
+                domain = match[-1] if match[-1] else match[0]
+            domain = domain.split('/join')[0].rstrip('/')
+            if not domain.startswith('http'):
+                domain = 'https://' + domain
+            return domain
+    return None
+
+
+SAMPLES = [
+    '',
+    'no domain here',
+    '<a href="https://www.firgrouxywebb.com/join/88596413">注册</a>',
+    'APK 下载 网址：okx-mirror.com 备用 https://www.backup.com/join/1',
+    'Domain: Example-Site.COM',
+    '链接: abc.com.cn and www.x-y.com',
+    'http://plain.com/path then www.second.com',
+    '{"title":[["官方 域名 www.a1.com"]],"url":"https://b2.com/join/1"}',
+    'mail user@host.com first',
+    '中文内容' * 200 + ' https://www.deep.com/join/2',
+    'notacom.co then real.com',
+]
+
+
+def _random_text(rng):
+    parts = ['www.', 'https://', 'http://', '域名：', 'Domain ', 'abc', 'x-y', '.com', '.cn', '/join/1',
+             ' ', '\n', '中文', '.', '-', 'COM', '<a href="', '">']
+    return ''.join(rng.choice(parts) for _ in range(rng.randint(0, 40)))
+
+
+def _corpus():
+    rng = random.Random(20261017)
+    return SAMPLES + [_random_text(rng) for _ in range(500)]
+
+
+@pytest.mark.parametrize('text', _corpus())
+def test_combined_pattern_matches_legacy_regexes(text):
+    assert extract_domain(text) == legacy_extract(text)
+
+
+@pytest.mark.parametrize('chunk_size', [1, 3, 7, 64, 1 << 20])
+def test_streaming_matches_whole_text(chunk_size):
+    for text in _corpus():
+        data = text.encode('utf-8')
+        extractor = StreamingDomainExtractor()
+        for i in range(0, len(data), chunk_size):
+            if extractor.feed(data[i:i + chunk_size]):
+                break
+        assert extractor.finish() == extract_domain(text), text
+
+
+def test_streaming_stops_early_and_hashes_what_it_read():
+    data = ('<p>官方网址 https://www.first.com/join/1</p>' + 'x' * 100000).encode('utf-8')
+    extractor = StreamingDomainExtractor()
+    consumed = b''
+    for i in range(0, len(data), 1024):
+        chunk = data[i:i + 1024]
+        consumed += chunk
+        if extractor.feed(chunk):
+            break
+    assert extractor.domain == 'https://first.com'
+    assert extractor.bytes_consumed == len(consumed) == 1024
+    assert extractor.content_hash == hashlib.sha256(consumed).hexdigest()
+
+
+def test_streaming_collects_candidates_in_page_order():
+    text = 'www.a.com https://b.com/join/1 www.a.com 域名: c.com d.com'
+    extractor = StreamingDomainExtractor(max_candidates=3)
+    data = text.encode('utf-8')
+    for i in range(0, len(data), 5):
+        extractor.feed(data[i:i + 5])
+    extractor.finish()
+    assert extractor.candidates == ['https://a.com', 'https://b.com', 'https://c.com']
+    assert extractor.candidates == list(iter_domains(text))[:3]
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""候选域名探测：可访问判断与排序"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+import domain_prober
+from domain_prober import DomainProber, ProbeResult, probe_url
+
+
+def _result(domain, status=200, ttfb=0.1, location=None):
+    result = ProbeResult(domain, f'{domain}/join/1')
+    result.status, result.ttfb, result.location = status, ttfb, location
+    result.dns = result.connect = ttfb / 2 if ttfb else None
+    return result
+
+
+@pytest.fixture
+def prober(monkeypatch):
+    def use(results):
+        by_domain = {r.domain: r for r in results}
+        monkeypatch.setattr(domain_prober, 'probe_url', lambda domain, path, timeout: by_domain[domain])
+        return [r.domain for r in results]
+
+    prober = DomainProber('/join/1', tolerance=0.05)
+    prober.use = use
+    yield prober
+    prober.close()
+
+
+def test_lowest_latency_wins_outside_tolerance(prober):
+    candidates = prober.use([_result('https://a.com', ttfb=0.30), _result('https://b.com', ttfb=0.10)])
+    assert prober.pick(candidates) == 'https://b.com'
+
+
+def test_page_order_breaks_ties_within_tolerance(prober):
+    candidates = prober.use([_result('https://a.com', ttfb=0.14), _result('https://b.com', ttfb=0.10),
+                             _result('https://c.com', ttfb=0.12)])
+    assert [r.domain for r in prober.rank(candidates)] == ['https://a.com', 'https://b.com', 'https://c.com']
+
+
+def test_unreachable_candidates_rank_last(prober):
+    candidates = prober.use([
+        _result('https://a.com', status=None, ttfb=None),
+        _result('https://b.com', status=301, ttfb=0.01, location='https://elsewhere.com/'),
+        _result('https://c.com', status=302, ttfb=0.20, location='/zh-CN/join/1'),
+        _result('https://d.com', ttfb=0.40),
+    ])
+    ranked = prober.rank(candidates)
+    assert [r.domain for r in ranked] == ['https://c.com', 'https://d.com', 'https://a.com', 'https://b.com']
+    assert prober.pick(candidates) == 'https://c.com'
+
+
+def test_pick_returns_none_when_nothing_is_reachable(prober):
+    candidates = prober.use([_result('https://a.com', status=503)])
+    assert prober.pick(candidates) is None
+
+
+def test_probe_url_reads_status_and_location():
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(302)
+            self.send_header('Location', '/en/join/1')
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        result = probe_url(f'http://127.0.0.1:{server.server_port}', '/join/1', timeout=2)
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert (result.status, result.location, result.ok) == (302, '/en/join/1', True)
+    assert result.ttfb is not None and result.tls is None
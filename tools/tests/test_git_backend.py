@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+"""git_backend 的冒烟测试"""
+
+import subprocess
+
+import pytest
+
+from git_backend import PlumbingBackend, PorcelainBackend, benchmark
+
+
+def _init_repo(path):
+    for args in (['init', '-q'], ['config', 'user.email', 't@example.com'], ['config', 'user.name', 't']):
+        subprocess.run(['git'] + args, cwd=path, check=True)
+
+
+def test_benchmark_runs_with_small_repo(capsys):
+    benchmark(num_files=20, rounds=2)
+    out = capsys.readouterr().out
+    assert 'porcelain' in out and 'plumbing' in out
+    assert '工作区状态: 干净' in out
+
+
+@pytest.mark.parametrize('backend_cls', [PorcelainBackend, PlumbingBackend])
+def test_commit_and_nothing_to_commit(tmp_path, backend_cls):
+    _init_repo(tmp_path)
+    target = tmp_path / 'page.tsx'
+    target.write_text('a\n')
+    backend = backend_cls(tmp_path)
+
+    first = backend.commit('init', [target])
+    assert first
+    assert backend.commit('again', [target]) is None
+
+    target.write_text('b\n')
+    second = backend.commit('change', [target])
+    assert second and second != first
+    status = subprocess.run(['git', 'status', '--porcelain'], cwd=tmp_path,
+                            capture_output=True, text=True, check=True).stdout
+    assert status == ''
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""CommitQueue：静默窗口内合并提交、flush / stop 立即提交、推送重试"""
+
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from git_queue import CommitQueue
+
+
+class Recorder:
+    """记录提交与推送，可指定推送结果序列"""
+
+    def __init__(self, push_results=()):
+        self.commits = []
+        self.pushes = 0
+        self.push_results = list(push_results)
+        self.committed = threading.Event()
+
+    def commit(self, link, files):
+        self.commits.append((link, list(files)))
+        self.committed.set()
+        return True
+
+    def push(self):
+        self.pushes += 1
+        return self.push_results.pop(0) if self.push_results else True
+
+
+@pytest.fixture
+def recorder():
+    return Recorder()
+
+
+def _queue(recorder, **kwargs):
+    queue = CommitQueue(recorder.commit, recorder.push, **kwargs)
+    queue.start()
+    return queue
+
+
+def test_changes_within_quiet_window_coalesce(recorder):
+    queue = _queue(recorder, quiet_window=0.3)
+    queue.submit('https://a.com', [Path('a.html')])
+    queue.submit('https://b.com', [Path('b.html'), Path('a.html')])
+    queue.submit('https://c.com')
+
+    # 静默窗口内没有提交
+    time.sleep(0.1)
+    assert recorder.commits == []
+
+    assert recorder.committed.wait(2)
+    assert queue.flush(2)
+    assert recorder.commits == [('https://c.com', [Path('a.html'), Path('b.html')])]
+    assert recorder.pushes == 1
+    queue.stop(2)
+
+
+def test_each_submit_restarts_quiet_window(recorder):
+    queue = _queue(recorder, quiet_window=0.2)
+    for link in ('https://a.com', 'https://b.com', 'https://c.com'):
+        queue.submit(link)
+        time.sleep(0.1)
+    assert recorder.commits == []
+
+    assert recorder.committed.wait(2)
+    assert recorder.commits == [('https://c.com', [])]
+    queue.stop(2)
+
+
+def test_stop_flushes_pending_change(recorder):
+    queue = _queue(recorder, quiet_window=60)
+    queue.submit('https://a.com')
+    queue.submit('https://b.com')
+
+    started = time.monotonic()
+    queue.stop(5)
+
+    assert time.monotonic() - started < 5
+    assert recorder.commits == [('https://b.com', [])]
+    assert recorder.pushes == 1
+    assert not queue._thread.is_alive()
+
+
+def test_push_is_retried_with_backoff():
+    recorder = Recorder(push_results=[False, False, True])
+    queue = _queue(recorder, quiet_window=0, retry_backoff=0.01)
+    queue.submit('https://a.com')
+    assert queue.flush(2)
+    assert recorder.pushes == 3
+    assert len(recorder.commits) == 1
+    queue.stop(2)
+
+
+def test_failed_commit_is_not_pushed():
+    recorder = Recorder()
+    queue = CommitQueue(lambda link, files: False, recorder.push, quiet_window=0)
+    queue.start()
+    queue.submit('https://a.com')
+    assert queue.flush(2)
+    assert recorder.pushes == 0
+    queue.stop(2)
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""历史记录存储：查询、轮转后的归档、压缩与旧版导入"""
+
+import json
+
+import pytest
+
+from history_store import JsonlHistoryStore, SqliteHistoryStore, open_history_store
+
+
+def _record(i, domain=None):
+    return {'timestamp': f'2026-10-{1 + i // 24:02d}T{i % 24:02d}:00:00',
+            'domain': domain or f'https://d{i % 3}.com', 'change_type': 'update'}
+
+
+@pytest.fixture(params=['jsonl', 'sqlite'])
+def store(request, tmp_path):
+    store = (JsonlHistoryStore(tmp_path / 'history.jsonl') if request.param == 'jsonl'
+             else SqliteHistoryStore(tmp_path / 'history.db'))
+    yield store
+    store.close()
+
+
+def test_query_filters_and_pages(store):
+    records = [_record(i) for i in range(30)]
+    for record in records:
+        store.append(record)
+
+    assert store.count() == 30
+    assert list(store.query()) == records
+    assert list(store.query(offset=5, limit=3)) == records[5:8]
+    assert list(store.query(start=records[10]['timestamp'], end=records[12]['timestamp'])) == records[10:12]
+    assert list(store.query(domain='https://d1.com')) == records[1::3]
+    assert store.domains() == ['https://d0.com', 'https://d1.com', 'https://d2.com']
+
+
+def test_compact_keeps_recent_records(store):
+    records = [_record(i) for i in range(10)]
+    for record in records:
+        store.append(record)
+    store.compact(keep_last=4)
+    assert list(store.query()) == records[-4:]
+    store.compact(before=records[8]['timestamp'])
+    assert list(store.query()) == records[8:]
+
+
+def test_jsonl_rotation_keeps_archives_indexed(tmp_path):
+    path = tmp_path / 'history.jsonl'
+    line_size = len(json.dumps(_record(0)) + '\n')
+    store = JsonlHistoryStore(path, max_bytes=line_size * 3)
+    records = [_record(i, f'https://r{i}.com') for i in range(10)]
+    for record in records:
+        store.append(record)
+
+    archives = sorted(p.name for p in tmp_path.glob('history.*.jsonl'))
+    assert len(archives) == 3
+    assert list(store.query()) == records
+    assert list(store.query(domain='https://r0.com')) == records[:1]
+    assert store.domains()[0] == 'https://r0.com'
+
+    # 重新打开时从归档文件重建索引
+    reopened = JsonlHistoryStore(path, max_bytes=line_size * 3)
+    assert list(reopened.query()) == records
+    assert reopened.count() == 10
+
+
+def test_jsonl_compact_merges_archives(tmp_path):
+    path = tmp_path / 'history.jsonl'
+    line_size = len(json.dumps(_record(0)) + '\n')
+    store = JsonlHistoryStore(path, max_bytes=line_size * 2)
+    records = [_record(i) for i in range(7)]
+    for record in records:
+        store.append(record)
+
+    store.compact(keep_last=5)
+
+    assert not list(tmp_path.glob('history.*.jsonl'))
+    assert [json.loads(line) for line in path.read_text().splitlines()] == records[2:]
+    assert list(store.query()) == records[2:]
+    store.append(_record(7))
+    assert list(store.query())[-1] == _record(7)
+
+
+def test_jsonl_compact_on_fresh_store_is_a_noop(tmp_path):
+    store = JsonlHistoryStore(tmp_path / 'history.jsonl')
+    store.compact(keep_last=10)
+    assert not (tmp_path / 'history.jsonl').exists()
+    assert store.count() == 0
+
+
+def test_jsonl_skips_corrupt_lines(tmp_path):
+    path = tmp_path / 'history.jsonl'
+    path.write_text(json.dumps(_record(0)) + '\n{broken\n' + json.dumps(_record(1)) + '\n')
+    assert list(JsonlHistoryStore(path).query()) == [_record(0), _record(1)]
+
+
+def test_legacy_history_is_imported_once(tmp_path):
+    legacy = tmp_path / 'history.json'
+    legacy.write_text(json.dumps([_record(0), _record(1)]))
+
+    store = open_history_store(tmp_path / 'history.jsonl', legacy_file=legacy)
+    assert store.count() == 2
+    store = open_history_store(tmp_path / 'history.jsonl', legacy_file=legacy)
+    assert store.count() == 2
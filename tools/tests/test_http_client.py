@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""HttpTransport 提前停止读取后的连接复用"""
+
+import gzip
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from http_client import HttpTransport
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    body = b''
+    encoding = None
+    connections = set()
+
+    def do_GET(self):
+        type(self).connections.add(self.client_address)
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        if self.encoding:
+            self.send_header('Content-Encoding', self.encoding)
+        self.send_header('Content-Length', str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, *args):
+        pass
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # 客户端主动关闭连接是预期行为
+        pass
+
+
+@pytest.fixture
+def server():
+    def start(body, encoding=None):
+        handler = type('Handler', (_Handler,), {'body': body, 'encoding': encoding, 'connections': set()})
+        httpd = _Server(('127.0.0.1', 0), handler)
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        servers.append(httpd)
+        return f'http://127.0.0.1:{httpd.server_port}/', handler
+
+    servers = []
+    yield start
+    for httpd in servers:
+        httpd.shutdown()
+        httpd.server_close()
+
+
+def _poll(transport, url):
+    """与 DomainMonitor 相同：读到第一块就停止，然后结束响应"""
+    response = transport.request('GET', url, stream=True)
+    first = next(response.iter_content(1024))
+    transport.finish(response)
+    return first
+
+
+@pytest.mark.parametrize('encoding', [None, 'gzip'])
+def test_small_remainder_is_drained_and_connection_reused(server, encoding):
+    text = os.urandom(40 * 1024).hex().encode()
+    body = gzip.compress(text) if encoding == 'gzip' else text
+    url, handler = server(body, encoding)
+    transport = HttpTransport(max_retries=0)
+    try:
+        for _ in range(3):
+            assert _poll(transport, url) == text[:1024]
+    finally:
+        transport.close()
+    assert len(handler.connections) == 1
+
+
+def test_large_remainder_closes_connection(server):
+    url, handler = server(b'x' * (1024 * 1024))
+    transport = HttpTransport(max_retries=0)
+    try:
+        response = transport.request('GET', url, stream=True)
+        next(response.iter_content(1024))
+        transport.finish(response, drain_limit=64 * 1024)
+        assert transport.transferred_bytes(response) < 64 * 1024
+        _poll(transport, url)
+    finally:
+        transport.close()
+    assert len(handler.connections) == 2
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""LinkIndex：查询结果与 str.replace 一致，增量刷新与格式版本"""
+
+import json
+
+import pytest
+
+from file_rewriter import splice_files
+from link_index import LinkIndex
+
+OLD = 'https://www.old.com/join/abc'
+NEW = 'https://www.new.com/join/abc'
+
+CONTENTS = [
+    f'<a href="{OLD}">join</a>\n',
+    f'<a href="{OLD}?ref=nav">join</a> {OLD}/extra\n',
+    f'<a href="https://x.com/go?url={OLD}">share</a>\n',
+    f'<a href="https://x.com/go?url={OLD}&r=https://y.com/?next={OLD}">share</a> ({OLD})\n',
+    f'{OLD}?next={OLD}\n',
+    '<a href="https://www.other.com/join/abc">other</a>\n',
+    f'中文 {OLD} 链接\n',
+]
+
+
+@pytest.mark.parametrize('content', CONTENTS)
+def test_rewrite_matches_str_replace(tmp_path, content):
+    page = tmp_path / 'page.tsx'
+    page.write_text(content, encoding='utf-8')
+    index = LinkIndex(tmp_path / 'index.json')
+    index.refresh([page])
+
+    usage = index.where_used(OLD)
+    results = splice_files({page: usage[str(page)]} if usage else {}, OLD, NEW)
+
+    assert all(r.error is None for r in results)
+    assert page.read_text(encoding='utf-8') == content.replace(OLD, NEW)
+
+
+def test_refresh_rescans_only_changed_files(tmp_path):
+    a, b = tmp_path / 'a.tsx', tmp_path / 'b.tsx'
+    a.write_text(OLD)
+    b.write_text('nothing')
+    index = LinkIndex(tmp_path / 'index.json')
+    assert sorted(index.refresh([a, b])) == [str(a), str(b)]
+    index.save()
+
+    b.write_text(f'x {OLD}')
+    reloaded = LinkIndex(tmp_path / 'index.json')
+    assert reloaded.refresh([a, b]) == [str(b)]
+    assert reloaded.where_used(OLD) == {str(a): [0], str(b): [2]}
+
+
+def test_index_from_older_format_is_rebuilt(tmp_path):
+    page = tmp_path / 'page.tsx'
+    page.write_text(f'https://x.com/?u={OLD}')
+    path = tmp_path / 'index.json'
+    index = LinkIndex(path)
+    index.refresh([page])
+    # 旧格式：没有版本号，也没有记录嵌套的链接
+    path.write_text(json.dumps({'files': {str(page): {'key': index.files[str(page)]['key'], 'links': {}}}}))
+
+    reloaded = LinkIndex(path)
+    assert reloaded.refresh([page]) == [str(page)]
+    assert reloaded.where_used(OLD) == {str(page): [17]}
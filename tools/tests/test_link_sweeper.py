@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""旧域名清扫：匹配边界与改写"""
+
+import re
+
+import pytest
+
+from link_sweeper import build_pattern, sweep
+
+
+@pytest.mark.parametrize('text, expected', [
+    (b'https://old.com/join/1', b'https://new.com/join/1'),
+    (b'https://www.old.com/join/1', b'https://new.com/join/1'),
+    (b'visit old.com.', b'visit new.com.'),
+    (b'visit old.com.\n', b'visit new.com.\n'),
+    (b'"https://OLD.com"', b'"https://new.com"'),
+    (b'https://old.com.cn/join/1', b'https://old.com.cn/join/1'),
+    (b'https://old.com.evil.io/', b'https://old.com.evil.io/'),
+    (b'https://bold.com/', b'https://bold.com/'),
+    (b'https://sub.old.com/', b'https://sub.old.com/'),
+    (b'https://old.company/', b'https://old.company/'),
+    (b'https://old.com-mirror.net/', b'https://old.com-mirror.net/'),
+])
+def test_host_boundaries(text, expected):
+    regex = re.compile(build_pattern(['old.com']), re.IGNORECASE)
+    assert regex.sub(b'new.com', text) == expected
+
+
+def test_longer_hosts_win(tmp_path):
+    page = tmp_path / 'page.tsx'
+    page.write_text('<a href="https://www.a.old.com/join/1">a</a> <a href="https://old.com/x">b</a>\n')
+    (tmp_path / 'logo.png').write_bytes(b'\x89PNG old.com')
+
+    result = sweep(tmp_path, ['https://old.com', 'a.old.com', 'https://www.new.com'], 'https://www.new.com/join/1')
+
+    assert result.matches == {str(page): 2}
+    assert page.read_text() == '<a href="https://www.new.com/join/1">a</a> <a href="https://www.new.com/x">b</a>\n'
+    assert (tmp_path / 'logo.png').read_bytes() == b'\x89PNG old.com'
+
+
+def test_dry_run_does_not_write(tmp_path):
+    page = tmp_path / 'page.tsx'
+    page.write_text('https://old.com/join/1')
+    result = sweep(tmp_path, ['old.com'], 'https://new.com/join/1', dry_run=True)
+    assert result.matches == {str(page): 1}
+    assert page.read_text() == 'https://old.com/join/1'
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""LinkUpdater 的传播管道与 monitor_manager 的文件更新回调"""
+
+import json
+import logging.handlers
+import subprocess
+
+import pytest
+
+import link_updater
+from link_index import LinkIndex
+from monitor_manager import make_file_update_callback
+
+OLD_LINK = 'https://www.old.com/join/abc'
+NEW_LINK = 'https://www.new.com/join/abc'
+
+
+def _git(cwd, *args):
+    return subprocess.run(['git'] + list(args), cwd=cwd, check=True,
+                          capture_output=True, text=True).stdout.strip()
+
+
+@pytest.fixture
+def updater(tmp_path, monkeypatch):
+    remote = tmp_path / 'remote.git'
+    repo = tmp_path / 'repo'
+    _git(tmp_path, 'init', '-q', '--bare', str(remote))
+    repo.mkdir()
+    _git(repo, 'init', '-q')
+    _git(repo, 'config', 'user.email', 't@example.com')
+    _git(repo, 'config', 'user.name', 't')
+
+    page = repo / 'page.tsx'
+    page.write_text(f'<a href="{OLD_LINK}">join</a>\n')
+    config_path = repo / 'link_config.json'
+    config_path.write_text(json.dumps({
+        'current_link': OLD_LINK, 'invite_code': 'abc', 'files': [str(page)],
+        'notion_url': 'https://example.notion.site/page', 'last_updated': None,
+        'shared_cache': {'directory': str(tmp_path / 'cache')},
+    }))
+    _git(repo, 'add', '-A')
+    _git(repo, 'commit', '-q', '-m', 'init')
+    _git(repo, 'remote', 'add', 'origin', str(remote))
+    _git(repo, 'push', '-q', '-u', 'origin', 'HEAD')
+
+    monkeypatch.setattr(link_updater, 'CONFIG_PATH', config_path)
+    monkeypatch.setattr(link_updater, 'STATE_PATH', tmp_path / 'link_state.json')
+    monkeypatch.setattr(link_updater, 'REPO_PATH', repo)
+    monkeypatch.setattr(link_updater, 'LinkIndex', lambda: LinkIndex(tmp_path / 'link_index.json'))
+    monkeypatch.setattr(link_updater, 'load_cf_config', lambda: (_ for _ in ()).throw(FileNotFoundError()))
+    updater = link_updater.LinkUpdater()
+    updater.repo, updater.remote, updater.page = repo, remote, page
+    yield updater
+    updater.stop_commit_queue()
+
+
+def test_file_callback_commits_and_pushes(updater):
+    callback = make_file_update_callback(updater)
+    callback('main', 'https://www.old.com', 'https://www.new.com')
+
+    assert NEW_LINK in updater.page.read_text()
+    assert updater.config['current_link'] == NEW_LINK
+    assert _git(updater.repo, 'status', '--porcelain') == ''
+    assert NEW_LINK in _git(updater.remote, 'log', '-1', '--format=%s')
+
+    # 链接未变化时不再传播
+    callback('main', 'https://www.new.com', 'https://www.new.com')
+    assert _git(updater.remote, 'rev-list', '--count', 'HEAD') == '2'
+
+
+def test_file_callback_uses_commit_queue(updater):
+    updater.start_commit_queue()
+    make_file_update_callback(updater)('main', None, 'https://www.new.com')
+    updater.stop_commit_queue()
+
+    assert NEW_LINK in _git(updater.remote, 'log', '-1', '--format=%s')
+
+
+def test_file_callback_raises_when_files_fail(updater, monkeypatch):
+    def fail(*args, **kwargs):
+        raise OSError('disk full')
+
+    monkeypatch.setattr(updater, 'update_files', fail)
+    updater._files_pipeline = None
+    with pytest.raises(Exception, match='链接传播失败'):
+        make_file_update_callback(updater)('main', None, 'https://www.new.com')
+    assert _git(updater.remote, 'rev-list', '--count', 'HEAD') == '1'
+
+
+def test_constructor_leaves_logging_to_the_caller(updater):
+    root = logging.getLogger()
+    assert not any(isinstance(h, logging.handlers.QueueHandler) for h in root.handlers)
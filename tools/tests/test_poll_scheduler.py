@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""RequestBudget 与 PollScheduler"""
+
+import logging
+
+import pytest
+
+import poll_scheduler
+from poll_scheduler import PollScheduler, RequestBudget, default_budget
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """假的 monotonic 时钟：run() 依次等待调度器给出的间隔"""
+    now = [1000.0]
+    monkeypatch.setattr(poll_scheduler.time, 'monotonic', lambda: now[0])
+
+    def run(scheduler, checks):
+        delays = []
+        for _ in range(checks):
+            delays.append(scheduler.next_delay())
+            now[0] += delays[-1]
+        return delays
+
+    return run
+
+
+def test_budget_allows_burst_then_spaces_requests():
+    budget = RequestBudget(max_requests=60, period=3600, burst=3)
+    allowed = [budget.reserve(1000.0) for _ in range(5)]
+    assert allowed[:3] == [1000.0] * 3
+    assert allowed[3:] == [1060.0, 1120.0]
+
+
+def test_budget_never_moves_requests_earlier():
+    budget = RequestBudget(max_requests=60, period=3600, burst=1)
+    assert budget.reserve(500.0) == 500.0
+    assert budget.reserve(5000.0) == 5000.0
+    assert budget.reserve(5000.0) == 5060.0
+
+
+def test_default_budget_follows_short_intervals():
+    assert default_budget([300]) == {'max_requests': 60}
+    assert default_budget([30]) == {'max_requests': 120}
+    assert default_budget([300, 30, 45]) == {'max_requests': 60 + 120 + 80}
+    assert default_budget([]) == {'max_requests': 60}
+
+
+def test_default_budget_does_not_stretch_configured_interval(clock, caplog):
+    budget = RequestBudget(**default_budget([30]))
+    scheduler = PollScheduler(30, min_interval=30, max_interval=30, jitter=0, budget=budget)
+    with caplog.at_level(logging.WARNING, logger='poll_scheduler'):
+        delays = clock(scheduler, 200)
+    assert max(delays) == 30
+    assert not caplog.records
+
+
+def test_scheduler_warns_once_when_budget_overrides_interval(clock, caplog):
+    budget = RequestBudget(max_requests=60, period=3600, burst=2)
+    scheduler = PollScheduler(10, min_interval=10, max_interval=10, jitter=0, budget=budget)
+    with caplog.at_level(logging.INFO, logger='poll_scheduler'):
+        delays = clock(scheduler, 10)
+    assert delays[:2] == [10, 10]
+    assert delays[-1] == 60
+    warnings = [r for r in caplog.records if r.levelno == logging.WARNING]
+    assert len(warnings) == 1 and 'request_budget' in warnings[0].getMessage()
+
+
+def test_scheduler_widens_bursts_and_backs_off():
+    scheduler = PollScheduler(100, min_interval=10, max_interval=200, widen_factor=2, burst_checks=2, jitter=0)
+    assert [scheduler.next_delay() for _ in range(3)] == [100, 200, 200]
+    assert [scheduler.next_delay(changed=True), scheduler.next_delay()] == [10, 10]
+    assert scheduler.next_delay() == 100
+    assert [scheduler.next_delay(failed=True) for _ in range(3)] == [10, 20, 40]
+    # 失败恢复后进入突发模式
+    assert scheduler.next_delay() == 10
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""PropagationPipeline：并发、依赖、失败与超时"""
+
+import threading
+
+import pytest
+
+from propagation import (STATUS_FAILED, STATUS_NOOP, STATUS_OK, STATUS_SKIPPED, STATUS_TIMEOUT,
+                         PropagationPipeline, Sink)
+
+
+@pytest.fixture
+def pipeline():
+    pipeline = PropagationPipeline()
+    yield pipeline
+    pipeline.close()
+
+
+def test_dependent_runs_after_dependency_with_its_value(pipeline):
+    order = []
+
+    def files(value):
+        order.append('files')
+        return ['index.html']
+
+    def git(value):
+        order.append('git')
+        return value
+
+    pipeline.add_sink(Sink('files', files))
+    pipeline.add_sink(Sink('git', git, depends_on=['files']))
+    result = pipeline.run('https://new.com')
+
+    assert order == ['files', 'git']
+    assert result.status('files') == STATUS_OK and result.status('git') == STATUS_OK
+    assert result.results['files'].value == ['index.html']
+    assert result.ok and result.changed
+
+
+def test_independent_sinks_run_concurrently(pipeline):
+    barrier = threading.Barrier(2, timeout=2)
+    pipeline.add_sink(Sink('cloudflare', lambda v: barrier.wait() is not None))
+    pipeline.add_sink(Sink('files', lambda v: barrier.wait() is not None))
+    result = pipeline.run('x')
+    assert result.status('cloudflare') == STATUS_OK and result.status('files') == STATUS_OK
+
+
+def test_failure_and_noop_skip_dependents(pipeline):
+    def fail(value):
+        raise RuntimeError('disk full')
+
+    pipeline.add_sink(Sink('files', fail))
+    pipeline.add_sink(Sink('git', lambda v: True, depends_on=['files']))
+    pipeline.add_sink(Sink('webhook', lambda v: None))
+    pipeline.add_sink(Sink('notify', lambda v: True, depends_on=['webhook']))
+    pipeline.add_sink(Sink('cloudflare', lambda v: True))
+    result = pipeline.run('x')
+
+    assert result.status('files') == STATUS_FAILED
+    assert result.results['files'].error == 'disk full'
+    assert result.status('git') == STATUS_SKIPPED
+    assert result.status('webhook') == STATUS_NOOP
+    assert result.status('notify') == STATUS_SKIPPED
+    assert result.status('cloudflare') == STATUS_OK
+    assert not result.ok and result.changed
+    # 结果按目标添加顺序排列
+    assert list(result.results) == ['files', 'git', 'webhook', 'notify', 'cloudflare']
+
+
+def test_timeout_does_not_block_and_busy_sink_is_skipped(pipeline):
+    release = threading.Event()
+    pipeline.add_sink(Sink('slow', lambda v: release.wait(5), timeout=0.05))
+    pipeline.add_sink(Sink('after', lambda v: True, depends_on=['slow']))
+    pipeline.add_sink(Sink('fast', lambda v: True))
+
+    result = pipeline.run('x')
+    assert result.status('slow') == STATUS_TIMEOUT
+    assert result.status('after') == STATUS_SKIPPED
+    assert result.status('fast') == STATUS_OK
+    assert not result.ok
+
+    # 超时的目标仍在后台运行，下一次传播不会重复启动它
+    result = pipeline.run('y')
+    assert result.status('slow') == STATUS_SKIPPED
+    release.set()
+
+
+def test_add_sink_rejects_duplicate_and_unknown_dependency(pipeline):
+    pipeline.add_sink(Sink('files', lambda v: True))
+    with pytest.raises(ValueError):
+        pipeline.add_sink(Sink('files', lambda v: True))
+    with pytest.raises(ValueError):
+        pipeline.add_sink(Sink('git', lambda v: True, depends_on=['missing']))
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""RateLimiter：令牌桶、429 暂停、请求合并"""
+
+import email.utils
+import threading
+import time
+
+import pytest
+
+import rate_limiter
+from rate_limiter import MAX_RETRY_AFTER, RateLimiter, parse_retry_after
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """假的时钟：sleep 直接推进 monotonic"""
+    now = [100.0]
+    monkeypatch.setattr(rate_limiter.time, 'monotonic', lambda: now[0])
+    monkeypatch.setattr(rate_limiter.time, 'sleep', lambda seconds: now.__setitem__(0, now[0] + seconds))
+    return now
+
+
+def test_burst_then_steady_rate(clock):
+    limiter = RateLimiter(max_requests=10, period=10, burst=3)
+    waits = [limiter.acquire() for _ in range(5)]
+    assert waits[:3] == [0, 0, 0]
+    assert waits[3:] == pytest.approx([1.0, 1.0])
+    assert limiter.metrics()['requests'] == 5
+    assert limiter.metrics()['throttled'] == 2
+
+
+def test_idle_time_refills_the_bucket(clock):
+    limiter = RateLimiter(max_requests=10, period=10, burst=2)
+    for _ in range(4):
+        limiter.acquire()
+    clock[0] += 60
+    assert [limiter.acquire(), limiter.acquire()] == [0, 0]
+
+
+def test_pause_delays_every_caller(clock):
+    limiter = RateLimiter(max_requests=1000, period=1, burst=10)
+    limiter.acquire()
+    limiter.pause(5)
+    assert limiter.acquire() == pytest.approx(5)
+    assert limiter.metrics()['rate_limited'] == 1
+
+
+def test_parse_retry_after():
+    assert parse_retry_after('7') == 7
+    assert parse_retry_after(None, default=3) == 3
+    assert parse_retry_after('soon', default=3) == 3
+    assert parse_retry_after('-5') == 0
+    assert parse_retry_after('100000') == MAX_RETRY_AFTER
+    date = email.utils.formatdate(time.time() + 30, usegmt=True)
+    assert 25 <= parse_retry_after(date) <= 30
+
+
+def test_coalesce_runs_concurrent_calls_once():
+    limiter = RateLimiter()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return {'rules': [1]}
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(limiter.coalesce('k', fetch)))
+    leader.start()
+    started.wait(5)
+    followers = [threading.Thread(target=lambda: results.append(limiter.coalesce('k', fetch))) for _ in range(3)]
+    for t in followers:
+        t.start()
+    while limiter.metrics()['coalesced'] < 3:
+        time.sleep(0.001)
+    release.set()
+    for t in [leader] + followers:
+        t.join(5)
+
+    assert len(calls) == 1
+    assert results == [{'rules': [1]}] * 4
+    # 合并的调用方拿到各自的副本
+    results[1]['rules'].append(2)
+    assert results[2] == {'rules': [1]}
+
+
+def test_coalesce_propagates_errors_and_forgets_the_call():
+    limiter = RateLimiter()
+    with pytest.raises(ValueError):
+        limiter.coalesce('k', lambda: (_ for _ in ()).throw(ValueError('boom')))
+    assert limiter.coalesce('k', lambda: 1) == 1
+
+
+def test_cloudflare_request_retries_after_429(make_updater, cf_api):
+    responses = iter([(429, None), (200, {'id': 'rs1', 'rules': []})])
+    cf_api.routes[('GET', '/zones/zone1/rulesets/rs1')] = lambda _: next(responses)
+    updater = make_updater(ruleset_id='rs1')
+    original = cf_api.request
+
+    def request(method, url, **kwargs):
+        response = original(method, url, **kwargs)
+        if response.status_code == 429:
+            response.headers['Retry-After'] = '0'
+        return response
+
+    cf_api.request = request
+    assert updater.get_redirect_ruleset()['id'] == 'rs1'
+    assert len(cf_api.calls) == 2
+    assert updater.rate_limiter.metrics()['rate_limited'] == 1
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多 zone 重定向并发更新
+同一个重定向目标需要同步到多个 zone（镜像博客）时，用有界线程池并发更新所有 zone，
+每个 zone 独立重试并返回各自的结果，总耗时接近单个 zone 的更新时间
+"""
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional
+
+from cloudflare_updater import CloudflareUpdater, create_updater, zone_configs
+
+logger = logging.getLogger(__name__)
+
+# 默认同时更新的 zone 数
+DEFAULT_FANOUT_WORKERS = 8
+
+# 单个 zone 失败后的重试次数与首次重试等待时间（秒，之后指数增长）
+DEFAULT_ZONE_RETRIES = 2
+DEFAULT_ZONE_RETRY_BACKOFF = 2.0
+
+# zone 状态
+ZONE_UPDATED = 'updated'    # 已写入新目标
+ZONE_SKIPPED = 'skipped'    # 规则已指向目标，未写入
+ZONE_FAILED = 'failed'      # 重试后仍失败
+
+
+class Zone:
+    """单个 zone 的更新目标"""
+
+    def __init__(self, name: str, updater: CloudflareUpdater, source_pattern: Optional[str] = None,
+                 rule_name: str = "OKX Domain Auto Redirect", config: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            name: zone 名称（用于日志与结果）
+            updater: 该 zone 的 CloudflareUpdater（rule_id 为空时创建规则）
+            source_pattern: 源 URL 模式
+            rule_name: 创建规则时使用的名称
+            config: 该 zone 展开后的完整配置（可选）
+        """
+        self.name = name
+        self.updater = updater
+        self.source_pattern = source_pattern
+        self.rule_name = rule_name
+        self.config = config or {}
+
+
+class ZoneResult:
+    """单个 zone 的更新结果"""
+
+    def __init__(self, name: str, status: str, attempts: int, elapsed: float,
+                 result: Optional[Dict[str, Any]] = None, error: Optional[str] = None):
+        self.name = name
+        self.status = status
+        self.attempts = attempts
+        self.elapsed = elapsed
+        self.result = result or {}
+        self.error = error
+
+    def __repr__(self) -> str:
+        return f"ZoneResult({self.name}, {self.status}, {self.attempts} 次, {self.elapsed * 1000:.0f}ms)"
+
+
+class FanoutResult:
+    """一次多 zone 更新的汇总结果"""
+
+    def __init__(self, results: List[ZoneResult], elapsed: float):
+        self.results = results
+        self.elapsed = elapsed
+
+    @property
+    def changed(self) -> bool:
+        """是否有 zone 写入了新目标"""
+        return any(r.status == ZONE_UPDATED for r in self.results)
+
+    @property
+    def ok(self) -> bool:
+        """是否所有 zone 都已指向目标"""
+        return all(r.status != ZONE_FAILED for r in self.results)
+
+    @property
+    def failed(self) -> List[ZoneResult]:
+        return [r for r in self.results if r.status == ZONE_FAILED]
+
+    def get(self, name: str) -> Optional[ZoneResult]:
+        """指定 zone 的结果"""
+        for result in self.results:
+            if result.name == name:
+                return result
+        return None
+
+    def summary(self) -> str:
+        return '，'.join(f"{r.name} {r.status}" for r in self.results)
+
+
+class ZoneFanout:
+    """把一次目标变化并发应用到多个 zone"""
+
+    def __init__(self, zones: Iterable[Zone], max_workers: int = DEFAULT_FANOUT_WORKERS,
+                 retries: int = DEFAULT_ZONE_RETRIES, retry_backoff: float = DEFAULT_ZONE_RETRY_BACKOFF):
+        """
+        Args:
+            zones: 需要更新的 zone
+            max_workers: 线程池大小（同时更新的 zone 数）
+            retries: 单个 zone 失败后的重试次数
+            retry_backoff: 首次重试前的等待时间（秒），之后每次翻倍
+        """
+        self.zones = list(zones)
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+        self._executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(self.zones))),
+                                            thread_name_prefix='zone-fanout')
+
+    @property
+    def primary(self) -> Optional[Zone]:
+        """第一个 zone（健康检查等只针对单个 zone 的功能使用）"""
+        return self.zones[0] if self.zones else None
+
+    def _apply_zone(self, zone: Zone, target_url: str, update_expression: bool) -> ZoneResult:
+        """更新单个 zone，失败时按指数退避重试"""
+        started = time.perf_counter()
+        error = None
+        for attempt in range(1, self.retries + 2):
+            try:
+                updater = zone.updater
+                if updater.rule_id and not update_expression:
+                    result = updater.update_redirect_rule(updater.rule_id, target_url)
+                else:
+                    result = updater.update_or_create_redirect(zone.source_pattern, target_url, zone.rule_name)
+                status = ZONE_SKIPPED if result.get("skipped") else ZONE_UPDATED
+                return ZoneResult(zone.name, status, attempt, time.perf_counter() - started, result)
+            except Exception as e:
+                error = str(e)
+                if attempt <= self.retries:
+                    delay = self.retry_backoff * (2 ** (attempt - 1))
+                    logger.warning(f"zone {zone.name} 更新失败（第 {attempt} 次），{delay:g} 秒后重试: {e}")
+                    time.sleep(delay)
+        logger.error(f"zone {zone.name} 更新失败: {error}")
+        return ZoneResult(zone.name, ZONE_FAILED, self.retries + 1, time.perf_counter() - started, error=error)
+
+    def apply(self, target_url: str, update_expression: bool = True) -> FanoutResult:
+        """
+        把所有 zone 的重定向目标更新为 target_url
+
+        Args:
+            target_url: 新的目标 URL
+            update_expression: 同时把规则的源模式更新为配置中的 source_pattern
+                               （False 时只修改目标，与原来的 update_redirect_rule 调用一致）
+
+        Returns:
+            各 zone 的结果（与 zones 顺序一致）
+        """
+        started = time.perf_counter()
+        futures = [self._executor.submit(self._apply_zone, zone, target_url, update_expression)
+                   for zone in self.zones]
+        fanout = FanoutResult([f.result() for f in futures], time.perf_counter() - started)
+        log = logger.info if fanout.ok else logger.error
+        log(f"{len(self.zones)} 个 zone 更新完成（{fanout.elapsed * 1000:.0f} ms）: {fanout.summary()}")
+        return fanout
+
+    def close(self):
+        """关闭线程池"""
+        self._executor.shutdown(wait=False)
+
+
+def create_fanout(config: Dict[str, Any]) -> ZoneFanout:
+    """
+    根据 Cloudflare 配置创建多 zone 更新器
+
+    配置中的 zones 列表为每个 zone 覆盖顶层字段，例如：
+    {"api_token": "...", "source_pattern": "...",
+     "zones": [{"name": "blog-a", "zone_id": "...", "rule_id": "..."}, {"name": "blog-b", "zone_id": "..."}],
+     "fanout": {"max_workers": 8, "retries": 2, "retry_backoff": 2}}
+    没有 zones 字段时只包含顶层配置的单个 zone
+
+    Args:
+        config: cloudflare_config.json 的内容
+
+    Returns:
+        ZoneFanout 实例
+    """
+    zones = [Zone(zone_config["name"], create_updater(zone_config), zone_config.get("source_pattern"),
+                  config=zone_config)
+             for zone_config in zone_configs(config)]
+    return ZoneFanout(zones, **config.get("fanout", {}))